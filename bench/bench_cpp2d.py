@@ -0,0 +1,301 @@
+#!/usr/bin/env python
+
+# Benchmarks for cpp2d.py. Times parsing and emission separately over
+# a synthetic corpus (whose shape is set on the command line) and over
+# a checked-in corpus in the shape of preprocessed OpenNURBS headers
+# (hand-written for now, see its header), and writes the results as
+# JSON so that runs from different commits can be compared directly.
+# Everything runs offline: nothing here needs clang or an OpenNURBS
+# checkout.
+#
+#   $ bench/bench_cpp2d.py run -o before.json
+#   $ git checkout some-branch
+#   $ bench/bench_cpp2d.py run -o after.json
+#
+# To replace it with a real cut of filtered.cpp (made by run.sh):
+#
+#   $ bench/bench_cpp2d.py snapshot filtered.cpp opennurbs_point.h ...
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.dirname(bench_dir)
+sys.path.insert(0, repo_dir)
+
+import cpp2d
+
+default_snapshot = os.path.join(bench_dir, 'corpus', 'opennurbs_subset.cpp')
+
+################################################################################
+# synthetic corpus
+
+synthetic_prelude = '''\
+template <class T> class Bench_Array {
+public:
+  Bench_Array() noexcept;
+  virtual ~Bench_Array();
+  int Count() const;
+  T *At(int);
+  const T *At(int) const;
+  T &operator[](int);
+  const T &operator[](int) const;
+  void Append(const T &);
+
+protected:
+  T *m_a;
+  int m_count;
+  int m_capacity;
+};
+'''
+
+def generate_corpus(num_classes=200, depth=4, methods=10, template_args=2,
+                    unions=1, enums=1, seed=0):
+    # Classes come in inheritance chains of the given depth. The root
+    # of each chain declares virtual methods that the rest override,
+    # and every class also shadows a few of its base's non-virtual
+    # methods, so that all of output_class's paths get exercised.
+    rng = random.Random(seed)
+    lines = [synthetic_prelude]
+
+    for i in range(enums):
+        lines.append(f'enum Bench_Enum{i} : unsigned int {{')
+        lines.extend(f'  Bench_Enum{i}_value{j} = {j},' for j in range(7))
+        lines.append(f'  Bench_Enum{i}_value7 = 7')
+        lines.append('};')
+
+    for i in range(num_classes):
+        name = f'Bench_Class{i}'
+        level = i % depth
+        lines.append(f'class {name};')
+        if level == 0:
+            lines.append(f'class {name} {{')
+        else:
+            lines.append(f'class {name} : public Bench_Class{i - 1} {{')
+        lines.append('public:')
+
+        for j in range(enums):
+            lines.append(f'  enum TYPE{j} {{ unknown = 0, first = 1, '
+                         f'second = 2, count = 3 }};')
+
+        lines.append(f'  {name}();')
+        lines.append(f'  {name}(const {name} &);')
+        lines.append(f'  {name}(int index, double tolerance);')
+        lines.append(f'  virtual ~{name}();')
+
+        for j in range(methods):
+            other = f'Bench_Class{rng.randrange(num_classes)}'
+            kind = j % 5
+            if kind == 0:
+                specifier = 'virtual ' if level == 0 else ''
+                suffix = ' override' if level > 0 else ''
+                lines.append(f'  {specifier}bool Virtual{j}(const {other} &other, '
+                             f'int side = 0) const{suffix};')
+            elif kind == 1:
+                lines.append(f'  int Shadowed{j}(double t, int *hint = nullptr) const;')
+            elif kind == 2:
+                lines.append(f'  const {other} *Pointer{j}(unsigned int i) const;')
+            elif kind == 3:
+                lines.append(f'  static {name} *New{j}(Bench_Array<{other} *> &items);')
+            else:
+                lines.append(f'  void Set{j}(double x, double y, double z);')
+
+        lines.append(f'  bool operator==(const {name} &) const;')
+        lines.append('  double operator[](int) const;')
+        lines.append(f'  {name} operator+(const {name} &) const;')
+
+        lines.append(f'  int m_index{i};')
+        lines.append('  double m_tolerance[2];')
+        lines.append('  Bench_Array<int> m_indices;')
+        for j in range(template_args):
+            other = f'Bench_Class{rng.randrange(num_classes)}'
+            # a const pointer argument comes back from the parser as
+            # raw tokens, which takes the re-parse path
+            lines.append(f'  Bench_Array<const {other} *> m_const_items{j};')
+            lines.append(f'  Bench_Array<{other} *> m_items{j};')
+        for j in range(unions):
+            lines.append('  union {')
+            lines.append(f'    int m_union{j}_int;')
+            lines.append(f'    double m_union{j}_double;')
+            lines.append('  };')
+
+        lines.append('};')
+
+    return '\n'.join(lines) + '\n'
+
+################################################################################
+# measurement
+
+def count_declarations(parsed):
+    counts = {'classes': 0, 'methods': 0, 'fields': 0, 'enums': 0,
+              'aliases': 0}
+    def count_class(cls):
+        counts['classes'] += 1
+        counts['methods'] += len(cls.methods)
+        counts['fields'] += len(cls.fields)
+        counts['enums'] += len(cls.enums)
+        for cls_ in cls.classes:
+            count_class(cls_)
+    namespace = parsed.namespace
+    for cls in namespace.classes:
+        count_class(cls)
+    counts['enums'] += len(namespace.enums)
+    counts['aliases'] += len(namespace.typedefs) + len(namespace.using_alias)
+    counts['total'] = sum(counts.values())
+    return counts
+
+def time_runs(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+def measure_peak_kib(fn):
+    # a separate, untimed run, since tracemalloc slows everything down
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak // 1024
+
+def summarize(times, num_declarations):
+    best = min(times)
+    return {
+        'best_seconds': best,
+        'median_seconds': statistics.median(times),
+        'declarations_per_second': num_declarations/best if best > 0 else None,
+    }
+
+def bench_corpus(text, repeat):
+    parse = lambda: cpp2d.parse_source(text)
+    parsed = parse()
+    emit = lambda: cpp2d.Translator().translate(parsed)
+    counts = count_declarations(parsed)
+    total = counts['total']
+    result = {
+        'input_bytes': len(text.encode('utf-8')),
+        'output_bytes': len(emit().encode('utf-8')),
+        'declarations': counts,
+        'parse': summarize(time_runs(parse, repeat), total),
+        'emit': summarize(time_runs(emit, repeat), total),
+    }
+    result['parse']['peak_kib'] = measure_peak_kib(parse)
+    result['emit']['peak_kib'] = measure_peak_kib(emit)
+    return result
+
+def get_git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=repo_dir,
+            stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(args):
+    synthetic_params = {
+        'num_classes': args.classes,
+        'depth': args.depth,
+        'methods': args.methods,
+        'template_args': args.template_args,
+        'unions': args.unions,
+        'enums': args.enums,
+        'seed': args.seed,
+    }
+    report = {
+        'commit': get_git_commit(),
+        'python': platform.python_version(),
+        'cxxheaderparser': cpp2d.get_parser_version(),
+        'repeat': args.repeat,
+        'corpora': {},
+    }
+
+    synthetic = bench_corpus(generate_corpus(**synthetic_params), args.repeat)
+    synthetic['params'] = synthetic_params
+    report['corpora']['synthetic'] = synthetic
+
+    if args.snapshot:
+        with open(args.snapshot, encoding='utf-8') as f:
+            snapshot = bench_corpus(f.read(), args.repeat)
+        snapshot['path'] = os.path.relpath(args.snapshot, repo_dir)
+        report['corpora']['snapshot'] = snapshot
+
+    for name, corpus in report['corpora'].items():
+        print(f'{name}: {corpus["declarations"]["total"]} declarations, '
+              f'parse {corpus["parse"]["best_seconds"]:.3f}s '
+              f'({corpus["parse"]["peak_kib"]} KiB), '
+              f'emit {corpus["emit"]["best_seconds"]:.3f}s '
+              f'({corpus["emit"]["peak_kib"]} KiB)', file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+def snapshot(args):
+    # keep the prologue (header.cpp) plus the chunks of the requested
+    # headers, in their original order
+    with open(args.input, encoding='utf-8-sig') as f:
+        chunks = cpp2d.split_chunks(f.read())
+    headers = set(args.headers)
+    kept = [chunk for name, chunk in chunks
+            if name == cpp2d.prologue_chunk_name
+            or os.path.basename(name) in headers]
+    with open(args.output, 'w') as f:
+        f.write(''.join(kept))
+
+def make_arg_parser():
+    parser = argparse.ArgumentParser(description='Benchmark cpp2d.py')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser(
+        'run', help='time parsing and emission, writing the results as JSON')
+    run_parser.add_argument('-o', '--output', help='write JSON here')
+    run_parser.add_argument('--repeat', type=int, default=5)
+    run_parser.add_argument('--classes', type=int, default=200)
+    run_parser.add_argument('--depth', type=int, default=4,
+                            help='length of each inheritance chain')
+    run_parser.add_argument('--methods', type=int, default=10,
+                            help='methods per class')
+    run_parser.add_argument('--template-args', type=int, default=2,
+                            help='templated fields per class')
+    run_parser.add_argument('--unions', type=int, default=1,
+                            help='anonymous unions per class')
+    run_parser.add_argument('--enums', type=int, default=1,
+                            help='enums per class (and at namespace scope)')
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--snapshot', default=default_snapshot,
+                            help='corpus of preprocessed OpenNURBS headers '
+                            'to benchmark ("" to skip)')
+    run_parser.set_defaults(fn=run)
+
+    snapshot_parser = subparsers.add_parser(
+        'snapshot', help='cut a new OpenNURBS snapshot out of filtered.cpp')
+    snapshot_parser.add_argument('input', help='filtered.cpp made by run.sh')
+    snapshot_parser.add_argument('headers', nargs='+',
+                                 help='headers to keep, e.g. opennurbs_point.h')
+    snapshot_parser.add_argument('-o', '--output', default=default_snapshot)
+    snapshot_parser.set_defaults(fn=snapshot)
+
+    return parser
+
+if __name__ == '__main__':
+    args = make_arg_parser().parse_args()
+    args.fn(args)
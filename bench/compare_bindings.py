@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+# Puts the JSON from bench_bindings.d and bench_bindings.cpp side by
+# side: per benchmark, the time per operation in each language and how
+# many times slower (or faster) the D bindings are. Also checks that
+# both sides computed the same checksums, i.e. did the same work.
+#
+#   $ bench/compare_bindings.py bench_d.json bench_cpp.json -o compare.json
+
+import argparse
+import json
+import math
+import sys
+
+def compare(d, cpp):
+    results = {}
+    for name, d_result in d['results'].items():
+        cpp_result = cpp['results'].get(name)
+        if cpp_result is None:
+            continue
+        ratio = d_result['ns_per_op']/cpp_result['ns_per_op'] \
+            if cpp_result['ns_per_op'] else None
+        results[name] = {
+            'd_ns_per_op': d_result['ns_per_op'],
+            'cpp_ns_per_op': cpp_result['ns_per_op'],
+            'd_over_cpp': ratio,
+            'checksums_match': math.isclose(d_result['checksum'],
+                                            cpp_result['checksum'],
+                                            rel_tol=1e-9),
+        }
+    return {
+        'd': {k: d.get(k) for k in ('compiler', 'scale', 'repeat')},
+        'cpp': {k: cpp.get(k) for k in ('compiler', 'scale', 'repeat')},
+        'results': results,
+    }
+
+def make_arg_parser():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('d', help='JSON from bench_bindings.d')
+    parser.add_argument('cpp', help='JSON from bench_bindings.cpp')
+    parser.add_argument('-o', '--output', help='write JSON here')
+    return parser
+
+if __name__ == '__main__':
+    args = make_arg_parser().parse_args()
+    with open(args.d) as f:
+        d = json.load(f)
+    with open(args.cpp) as f:
+        cpp = json.load(f)
+    if d.get('scale') != cpp.get('scale'):
+        sys.exit(f'the runs used different scales ({d.get("scale")} and '
+                 f'{cpp.get("scale")})')
+
+    report = compare(d, cpp)
+
+    for name, result in report['results'].items():
+        ratio = result['d_over_cpp']
+        print(f'{name:24} d {result["d_ns_per_op"]:10.3f} ns  '
+              f'c++ {result["cpp_ns_per_op"]:10.3f} ns  '
+              + (f'{ratio:6.2f}x' if ratio is not None else '     -')
+              + ('' if result['checksums_match'] else '  (checksums differ)'),
+              file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if not all(_['checksums_match'] for _ in report['results'].values()):
+        sys.exit(1)
@@ -0,0 +1,1177 @@
+// NOT real preprocessor output. This was put together by hand, in the
+// shape run.sh's filtered.cpp has (header.cpp, then line markers for
+// each OpenNURBS header), from cut-down declarations modelled on
+// OpenNURBS: a few headers' worth of classes, enough to exercise the
+// chunking, parsing and emission paths offline. The line markers are
+// only there to be split on. Replace it with a real cut of filtered.cpp
+// (bench/bench_cpp2d.py snapshot) where an OpenNURBS build is at hand.
+
+using ON__INT8 = int8_t;
+using ON__INT16 = int16_t;
+using ON__INT32 = int32_t;
+using ON__INT64 = int64_t;
+
+using ON__UINT8 = uint8_t;
+using ON__UINT16 = uint16_t;
+using ON__UINT32 = uint32_t;
+using ON__UINT64 = uint64_t;
+
+using ON__INT_PTR = ON__INT64;
+using ON__UINT_PTR = ON__UINT64;
+# 1 "../opennurbs/opennurbs_defines.h" 1
+typedef struct ON_UUID_struct {
+  unsigned int Data1;
+  unsigned short Data2;
+  unsigned short Data3;
+  unsigned char Data4[8];
+} ON_UUID;
+
+enum ON_mesh_type : unsigned char {
+  default_mesh = 0,
+  render_mesh = 1,
+  analysis_mesh = 2,
+  preview_mesh = 3,
+  any_mesh = 4
+};
+
+class ON_TextLog;
+class ON_BinaryArchive;
+class ON_Xform;
+# 1 "../opennurbs/opennurbs_point.h" 1
+class ON_Interval {
+public:
+  static const ON_Interval EmptyInterval;
+  static const ON_Interval ZeroToOne;
+
+  ON_Interval();
+  ~ON_Interval() = default;
+  ON_Interval(const ON_Interval &) = default;
+  ON_Interval &operator=(const ON_Interval &) = default;
+
+  ON_Interval(double t0, double t1);
+
+  double &operator[](int);
+  double operator[](int) const;
+  double &operator[](unsigned int);
+  double operator[](unsigned int) const;
+
+  double Min() const;
+  double Max() const;
+  double Mid() const;
+  double Length() const;
+  bool IsIncreasing() const;
+  bool IsDecreasing() const;
+  bool IsValid() const;
+  void Set(double t0, double t1);
+  double ParameterAt(double normalized_parameter) const;
+  double NormalizedParameterAt(double interval_parameter) const;
+  bool Includes(double t, bool bTestOpenInterval = false) const;
+  bool Intersection(const ON_Interval &other);
+  bool Union(const ON_Interval &other);
+
+  double m_t[2];
+};
+
+class ON_2dPoint {
+public:
+  double x, y;
+
+  static const ON_2dPoint Origin;
+  static const ON_2dPoint UnsetPoint;
+
+  ON_2dPoint() = default;
+  ~ON_2dPoint() = default;
+  ON_2dPoint(const ON_2dPoint &) = default;
+  ON_2dPoint &operator=(const ON_2dPoint &) = default;
+
+  ON_2dPoint(double x, double y);
+
+  double operator[](int) const;
+  double &operator[](int);
+
+  bool operator==(const ON_2dPoint &) const;
+  bool operator!=(const ON_2dPoint &) const;
+
+  double DistanceTo(const ON_2dPoint &) const;
+  void Set(double x, double y);
+  bool IsValid() const;
+};
+
+class ON_3dVector;
+
+class ON_3dPoint {
+public:
+  double x, y, z;
+
+  static const ON_3dPoint Origin;
+  static const ON_3dPoint UnsetPoint;
+
+  ON_3dPoint() = default;
+  ~ON_3dPoint() = default;
+  ON_3dPoint(const ON_3dPoint &) = default;
+  ON_3dPoint &operator=(const ON_3dPoint &) = default;
+
+  ON_3dPoint(double x, double y, double z);
+  explicit ON_3dPoint(const double *);
+
+  double operator[](int) const;
+  double &operator[](int);
+
+  ON_3dPoint &operator*=(double);
+  ON_3dPoint &operator/=(double);
+  ON_3dPoint &operator+=(const ON_3dVector &);
+  ON_3dPoint &operator-=(const ON_3dVector &);
+
+  ON_3dPoint operator*(double) const;
+  ON_3dPoint operator/(double) const;
+  ON_3dPoint operator+(const ON_3dPoint &) const;
+  ON_3dPoint operator+(const ON_3dVector &) const;
+  ON_3dVector operator-(const ON_3dPoint &) const;
+  double operator*(const ON_3dPoint &) const;
+
+  bool operator==(const ON_3dPoint &) const;
+  bool operator!=(const ON_3dPoint &) const;
+  bool operator<(const ON_3dPoint &) const;
+
+  bool IsValid() const;
+  bool IsUnsetPoint() const;
+  void Set(double x, double y, double z);
+  double DistanceTo(const ON_3dPoint &) const;
+  double MaximumCoordinate() const;
+  double MinimumCoordinate() const;
+  void Transform(const ON_Xform &);
+  void Rotate(double sin_angle, double cos_angle, const ON_3dVector &axis_of_rotation, const ON_3dPoint &center_of_rotation);
+};
+
+class ON_3dVector {
+public:
+  double x, y, z;
+
+  static const ON_3dVector ZeroVector;
+  static const ON_3dVector XAxis;
+  static const ON_3dVector YAxis;
+  static const ON_3dVector ZAxis;
+
+  ON_3dVector() = default;
+  ~ON_3dVector() = default;
+  ON_3dVector(const ON_3dVector &) = default;
+  ON_3dVector &operator=(const ON_3dVector &) = default;
+
+  ON_3dVector(double x, double y, double z);
+
+  double operator[](int) const;
+  double &operator[](int);
+
+  ON_3dVector &operator*=(double);
+  ON_3dVector &operator/=(double);
+  ON_3dVector &operator+=(const ON_3dVector &);
+  ON_3dVector &operator-=(const ON_3dVector &);
+
+  double operator*(const ON_3dVector &) const;
+  ON_3dVector operator*(double) const;
+  ON_3dVector operator/(double) const;
+  ON_3dVector operator+(const ON_3dVector &) const;
+  ON_3dVector operator-(const ON_3dVector &) const;
+
+  bool operator==(const ON_3dVector &) const;
+  bool operator!=(const ON_3dVector &) const;
+
+  bool IsValid() const;
+  bool IsZero() const;
+  bool IsUnitVector() const;
+  double Length() const;
+  double LengthSquared() const;
+  bool Unitize();
+  ON_3dVector UnitVector() const;
+  void Reverse();
+  bool PerpendicularTo(const ON_3dVector &);
+};
+
+class ON_3fPoint {
+public:
+  float x, y, z;
+
+  ON_3fPoint() = default;
+  ~ON_3fPoint() = default;
+  ON_3fPoint(const ON_3fPoint &) = default;
+  ON_3fPoint &operator=(const ON_3fPoint &) = default;
+
+  ON_3fPoint(float x, float y, float z);
+  explicit ON_3fPoint(const ON_3dPoint &);
+
+  float operator[](int) const;
+  float &operator[](int);
+
+  bool IsValid() const;
+  void Set(float x, float y, float z);
+};
+
+class ON_3fVector {
+public:
+  float x, y, z;
+
+  ON_3fVector() = default;
+  ~ON_3fVector() = default;
+  ON_3fVector(const ON_3fVector &) = default;
+  ON_3fVector &operator=(const ON_3fVector &) = default;
+
+  ON_3fVector(float x, float y, float z);
+  explicit ON_3fVector(const ON_3dVector &);
+
+  float operator[](int) const;
+  float &operator[](int);
+
+  double Length() const;
+  bool Unitize();
+};
+
+class ON_2fPoint {
+public:
+  float x, y;
+
+  ON_2fPoint() = default;
+  ~ON_2fPoint() = default;
+  ON_2fPoint(const ON_2fPoint &) = default;
+  ON_2fPoint &operator=(const ON_2fPoint &) = default;
+
+  ON_2fPoint(float x, float y);
+
+  float operator[](int) const;
+  float &operator[](int);
+};
+# 1 "../opennurbs/opennurbs_array.h" 1
+template <class T> class ON_SimpleArray {
+public:
+  ON_SimpleArray() noexcept;
+  virtual ~ON_SimpleArray();
+  ON_SimpleArray(const ON_SimpleArray<T> &);
+  ON_SimpleArray<T> &operator=(const ON_SimpleArray<T> &);
+  ON_SimpleArray(ON_SimpleArray<T> &&) noexcept;
+  ON_SimpleArray<T> &operator=(ON_SimpleArray<T> &&) noexcept;
+  ON_SimpleArray(size_t);
+
+  T &operator[](int);
+  T &operator[](unsigned int);
+  T &operator[](ON__INT64);
+  T &operator[](ON__UINT64);
+  const T &operator[](int) const;
+  const T &operator[](unsigned int) const;
+  const T &operator[](ON__INT64) const;
+  const T &operator[](ON__UINT64) const;
+
+  operator T *();
+  operator const T *() const;
+
+  T *First();
+  const T *First() const;
+  T *At(int);
+  T *At(unsigned int);
+  T *At(ON__INT64);
+  T *At(ON__UINT64);
+  const T *At(int) const;
+  const T *At(unsigned int) const;
+  const T *At(ON__INT64) const;
+  const T *At(ON__UINT64) const;
+  T *Last();
+  const T *Last() const;
+
+  T &AppendNew();
+  void Append(const T &);
+  void Append(int, const T *);
+  void Insert(int, const T &);
+  void Remove();
+  void Remove(int);
+  void RemoveValue(const T &);
+  void Empty();
+  void Reverse();
+  void Swap(int, int);
+  int Search(const T &) const;
+  void Zero();
+  void MemSet(unsigned char);
+  void Reserve(size_t);
+  void Shrink();
+  void Destroy();
+
+  T *Array();
+  const T *Array() const;
+  int Count() const;
+  unsigned int UnsignedCount() const;
+  int Capacity() const;
+  unsigned int SizeOfArray() const;
+  unsigned int SizeOfElement() const;
+  void SetCount(int);
+  void SetCapacity(size_t);
+  int NewCapacity() const;
+  T *KeepArray();
+  void SetArray(T *);
+  void SetArray(T *, int, int);
+
+protected:
+  void Move(int, int, int);
+  T *m_a;
+  int m_count;
+  int m_capacity;
+};
+
+template <class T> class ON_ClassArray {
+public:
+  ON_ClassArray() noexcept;
+  ON_ClassArray(size_t);
+  virtual ~ON_ClassArray();
+  ON_ClassArray(const ON_ClassArray<T> &);
+  ON_ClassArray<T> &operator=(const ON_ClassArray<T> &);
+  ON_ClassArray(ON_ClassArray<T> &&) noexcept;
+  ON_ClassArray<T> &operator=(ON_ClassArray<T> &&) noexcept;
+
+  T &operator[](int);
+  T &operator[](unsigned int);
+  const T &operator[](int) const;
+  const T &operator[](unsigned int) const;
+
+  operator T *();
+  operator const T *() const;
+
+  T *First();
+  const T *First() const;
+  T *At(int);
+  T *At(unsigned int);
+  const T *At(int) const;
+  const T *At(unsigned int) const;
+  T *Last();
+  const T *Last() const;
+
+  T &AppendNew();
+  void Append(const T &);
+  void Insert(int, const T &);
+  void Remove();
+  void Remove(int);
+  void Empty();
+  void Reverse();
+  void Swap(int, int);
+  void Reserve(size_t);
+  void Shrink();
+  void Destroy();
+
+  T *Array();
+  const T *Array() const;
+  int Count() const;
+  unsigned int UnsignedCount() const;
+  int Capacity() const;
+  unsigned int SizeOfArray() const;
+  void SetCount(int);
+  void SetCapacity(size_t);
+  T *KeepArray();
+  void SetArray(T *);
+
+protected:
+  void Move(int, int, int);
+  void ConstructDefaultElement(T *);
+  void DestroyElement(T &);
+  T *m_a;
+  int m_count;
+  int m_capacity;
+};
+
+template <class T> class ON_ObjectArray : public ON_ClassArray<T> {
+public:
+  ON_ObjectArray();
+  ~ON_ObjectArray();
+  ON_ObjectArray(const ON_ObjectArray<T> &);
+  ON_ObjectArray<T> &operator=(const ON_ObjectArray<T> &);
+  ON_ObjectArray(size_t);
+  bool QuickSortAndRemoveDuplicates(int (*)(const T *, const T *));
+};
+
+class ON_3dPointArray : public ON_SimpleArray<ON_3dPoint> {
+public:
+  ON_3dPointArray();
+  ON_3dPointArray(int);
+  ON_3dPointArray(const ON_SimpleArray<ON_3dPoint> &);
+  ~ON_3dPointArray();
+  ON_3dPointArray &operator=(const ON_3dPointArray &);
+  bool GetBBox(double boxmin[3], double boxmax[3], bool bGrowBox = false) const;
+  bool Rotate(double sin_angle, double cos_angle, const ON_3dVector &axis_of_rotation, const ON_3dPoint &center_of_rotation);
+  bool Translate(const ON_3dVector &delta);
+  int Search(const ON_3dPoint &) const;
+};
+
+class ON_3fPointArray : public ON_SimpleArray<ON_3fPoint> {
+public:
+  ON_3fPointArray();
+  ON_3fPointArray(int);
+  ~ON_3fPointArray();
+  bool GetBBox(float boxmin[3], float boxmax[3], bool bGrowBox = false) const;
+};
+
+class ON_3fVectorArray : public ON_SimpleArray<ON_3fVector> {
+public:
+  ON_3fVectorArray();
+  ON_3fVectorArray(int);
+  ~ON_3fVectorArray();
+  bool Unitize();
+};
+
+class ON_2fPointArray : public ON_SimpleArray<ON_2fPoint> {
+public:
+  ON_2fPointArray();
+  ON_2fPointArray(int);
+  ~ON_2fPointArray();
+};
+# 1 "../opennurbs/opennurbs_array_defs.h" 1
+template <class T> T &ON_SimpleArray<T>::operator[](int i) { return m_a[i]; }
+template <class T> T &ON_SimpleArray<T>::operator[](unsigned int i) {
+  return m_a[i];
+}
+template <class T> T &ON_SimpleArray<T>::operator[](ON__INT64 i) {
+  return m_a[i];
+}
+template <class T> T &ON_SimpleArray<T>::operator[](ON__UINT64 i) {
+  return m_a[i];
+}
+template <class T> const T &ON_SimpleArray<T>::operator[](int i) const {
+  return m_a[i];
+}
+template <class T>
+const T &ON_SimpleArray<T>::operator[](unsigned int i) const {
+  return m_a[i];
+}
+template <class T> const T &ON_SimpleArray<T>::operator[](ON__INT64 i) const {
+  return m_a[i];
+}
+template <class T>
+const T &ON_SimpleArray<T>::operator[](ON__UINT64 i) const {
+  return m_a[i];
+}
+template <class T> ON_SimpleArray<T>::operator T *() {
+  return (m_count > 0) ? m_a : 0;
+}
+template <class T> T *ON_SimpleArray<T>::First() {
+  return (m_count > 0) ? m_a : 0;
+}
+template <class T> const T *ON_SimpleArray<T>::First() const {
+  return (m_count > 0) ? m_a : 0;
+}
+template <class T> T *ON_SimpleArray<T>::At(int i) {
+  return (i >= 0 && i < m_count) ? &m_a[i] : 0;
+}
+template <class T> T *ON_SimpleArray<T>::At(unsigned int i) {
+  return (i < (unsigned int)m_count) ? &m_a[i] : 0;
+}
+template <class T> const T *ON_SimpleArray<T>::At(int i) const {
+  return (i >= 0 && i < m_count) ? &m_a[i] : 0;
+}
+template <class T> const T *ON_SimpleArray<T>::At(unsigned int i) const {
+  return (i < (unsigned int)m_count) ? &m_a[i] : 0;
+}
+template <class T> T *ON_SimpleArray<T>::Last() {
+  return (m_count > 0) ? m_a + (m_count - 1) : 0;
+}
+template <class T> const T *ON_SimpleArray<T>::Last() const {
+  return (m_count > 0) ? m_a + (m_count - 1) : 0;
+}
+template <class T> T *ON_SimpleArray<T>::Array() { return m_a; }
+template <class T> const T *ON_SimpleArray<T>::Array() const { return m_a; }
+template <class T> int ON_SimpleArray<T>::Count() const { return m_count; }
+template <class T> unsigned int ON_SimpleArray<T>::UnsignedCount() const {
+  return ((unsigned int)m_count);
+}
+template <class T> int ON_SimpleArray<T>::Capacity() const {
+  return m_capacity;
+}
+template <class T> unsigned int ON_SimpleArray<T>::SizeOfElement() const {
+  return ((unsigned int)(sizeof(T)));
+}
+template <class T> void ON_SimpleArray<T>::Empty() {
+  if (m_a) {
+    memset((void *)m_a, 0, m_capacity * sizeof(T));
+  }
+  m_count = 0;
+}
+template <class T> void ON_SimpleArray<T>::SetCount(int count) {
+  if (count >= 0) {
+    if (count > m_capacity)
+      SetCapacity(count);
+    if (count <= m_capacity)
+      m_count = count;
+  }
+}
+template <class T> T &ON_ClassArray<T>::operator[](int i) { return m_a[i]; }
+template <class T> T &ON_ClassArray<T>::operator[](unsigned int i) {
+  return m_a[i];
+}
+template <class T> const T &ON_ClassArray<T>::operator[](int i) const {
+  return m_a[i];
+}
+template <class T>
+const T &ON_ClassArray<T>::operator[](unsigned int i) const {
+  return m_a[i];
+}
+template <class T> T *ON_ClassArray<T>::At(int i) {
+  return (i >= 0 && i < m_count) ? &m_a[i] : 0;
+}
+template <class T> const T *ON_ClassArray<T>::At(int i) const {
+  return (i >= 0 && i < m_count) ? &m_a[i] : 0;
+}
+template <class T> T *ON_ClassArray<T>::Array() { return m_a; }
+template <class T> const T *ON_ClassArray<T>::Array() const { return m_a; }
+template <class T> int ON_ClassArray<T>::Count() const { return m_count; }
+template <class T> int ON_ClassArray<T>::Capacity() const {
+  return m_capacity;
+}
+# 1 "../opennurbs/opennurbs_bounding_box.h" 1
+class ON_BoundingBox {
+public:
+  static const ON_BoundingBox EmptyBoundingBox;
+  static const ON_BoundingBox UnsetBoundingBox;
+
+  ON_BoundingBox() noexcept;
+  ~ON_BoundingBox() = default;
+  ON_BoundingBox(const ON_BoundingBox &) = default;
+  ON_BoundingBox &operator=(const ON_BoundingBox &) = default;
+
+  ON_BoundingBox(const ON_3dPoint &min_pt, const ON_3dPoint &max_pt);
+
+  void Destroy();
+  const ON_3dPoint &operator[](int) const;
+  ON_3dPoint &operator[](int);
+  ON_3dPoint Min() const;
+  ON_3dPoint Max() const;
+  ON_3dVector Diagonal() const;
+  ON_3dPoint Center() const;
+  double Volume() const;
+  bool IsValid() const;
+  bool IsEmpty() const;
+  bool Set(const ON_3dPoint &P, int bGrowBox);
+  bool GetCorners(ON_3dPointArray &box_corners) const;
+  bool IsPointIn(const ON_3dPoint &test_point, int bStrictlyIn = false) const;
+
+  ON_3dPoint m_min;
+  ON_3dPoint m_max;
+};
+# 1 "../opennurbs/opennurbs_object.h" 1
+class ON_Object {
+public:
+  ON_Object() noexcept;
+  ON_Object(const ON_Object &);
+  ON_Object &operator=(const ON_Object &);
+  virtual ~ON_Object();
+
+  void EmergencyDestroy();
+  void PurgeUserData();
+  virtual bool IsValid(class ON_TextLog *text_log = nullptr) const = 0;
+  bool ThisIsNullptr(bool bSilentError) const;
+  bool IsKindOf(const ON_Object *other) const;
+  virtual void MemoryRelocate();
+  virtual void Dump(ON_TextLog &) const;
+  virtual unsigned int SizeOf() const;
+  virtual ON__UINT32 DataCRC(ON__UINT32 current_remainder) const;
+  virtual bool Write(ON_BinaryArchive &binary_archive) const;
+  virtual bool Read(ON_BinaryArchive &binary_archive);
+  virtual ON_UUID ModelObjectId() const;
+  virtual bool DeleteComponents(const class ON_COMPONENT_INDEX *ci_list, size_t ci_count);
+  bool SetUserString(const wchar_t *key, const wchar_t *string_value);
+  bool GetUserString(const wchar_t *key, class ON_wString &string_value) const;
+  int UserStringCount() const;
+
+private:
+  class ON_UserData *m_userdata_list;
+};
+# 1 "../opennurbs/opennurbs_geometry.h" 1
+class ON_Geometry : public ON_Object {
+public:
+  ON_Geometry() noexcept;
+  ~ON_Geometry();
+  ON_Geometry(const ON_Geometry &);
+  ON_Geometry &operator=(const ON_Geometry &);
+
+  ON_BoundingBox BoundingBox() const;
+  bool GetBoundingBox(ON_BoundingBox &bbox, bool bGrowBox = false) const;
+  bool GetBoundingBox(ON_3dPoint &bbox_min, ON_3dPoint &bbox_max, bool bGrowBox = false) const;
+  bool Rotate(double sin_angle, double cos_angle, const ON_3dVector &rotation_axis, const ON_3dPoint &rotation_center);
+  bool Rotate(double rotation_angle, const ON_3dVector &rotation_axis, const ON_3dPoint &rotation_center);
+  bool Translate(const ON_3dVector &translation_vector);
+  bool Scale(double scale_factor);
+
+  virtual int Dimension() const;
+  virtual bool GetBBox(double *boxmin, double *boxmax, bool bGrowBox = false) const;
+  virtual void ClearBoundingBox();
+  virtual bool Transform(const ON_Xform &xform);
+  virtual bool IsDeformable() const;
+  virtual bool MakeDeformable();
+  virtual bool SwapCoordinates(int i, int j);
+  virtual bool HasBrepForm() const;
+  virtual class ON_Brep *BrepForm(class ON_Brep *brep = nullptr) const;
+  virtual bool EvaluatePoint(const class ON_ObjRef &objref, ON_3dPoint &P) const;
+};
+# 1 "../opennurbs/opennurbs_curve.h" 1
+class ON_Curve : public ON_Geometry {
+public:
+  ON_Curve() noexcept;
+  ON_Curve(const ON_Curve &);
+  ON_Curve &operator=(const ON_Curve &);
+  virtual ~ON_Curve();
+
+  virtual ON_Curve *DuplicateCurve() const;
+  void DestroyCurveTree();
+  virtual ON_Interval Domain() const = 0;
+  virtual bool SetDomain(double t0, double t1);
+  bool SetDomain(ON_Interval domain);
+  virtual bool ChangeDimension(int desired_dimension);
+  virtual int SpanCount() const = 0;
+  virtual bool GetSpanVector(double *knots) const = 0;
+  virtual int Degree() const = 0;
+  virtual bool IsLinear(double tolerance = 1.0e-12) const;
+  virtual bool IsClosed() const;
+  virtual bool IsPeriodic() const;
+  virtual bool Reverse() = 0;
+  virtual bool SetStartPoint(ON_3dPoint start_point);
+  virtual bool SetEndPoint(ON_3dPoint end_point);
+
+  ON_3dPoint PointAt(double t) const;
+  ON_3dPoint PointAtStart() const;
+  ON_3dPoint PointAtEnd() const;
+  ON_3dVector DerivativeAt(double t) const;
+  ON_3dVector TangentAt(double t) const;
+  ON_3dVector CurvatureAt(double t) const;
+  bool EvPoint(double t, ON_3dPoint &point, int side = 0, int *hint = 0) const;
+  bool Ev1Der(double t, ON_3dPoint &point, ON_3dVector &first_derivative, int side = 0, int *hint = 0) const;
+  virtual bool Evaluate(double t, int der_count, int v_stride, double *v, int side = 0, int *hint = 0) const = 0;
+  virtual int GetNurbForm(class ON_NurbsCurve &nurbs_curve, double tolerance = 0.0, const ON_Interval *subdomain = nullptr) const;
+  class ON_NurbsCurve *NurbsCurve(class ON_NurbsCurve *pNurbsCurve = nullptr, double tolerance = 0.0, const ON_Interval *subdomain = nullptr) const;
+};
+
+class ON_CurveArray : public ON_SimpleArray<ON_Curve *> {
+public:
+  ON_CurveArray(int = 0);
+  ~ON_CurveArray();
+  bool Duplicate(ON_CurveArray &) const;
+  void Destroy();
+};
+# 1 "../opennurbs/opennurbs_curveproxy.h" 1
+class ON_CurveProxy : public ON_Curve {
+public:
+  ON_CurveProxy() noexcept;
+  ON_CurveProxy(const ON_Curve *);
+  ON_CurveProxy(const ON_Curve *, ON_Interval);
+  ON_CurveProxy(const ON_CurveProxy &);
+  ON_CurveProxy &operator=(const ON_CurveProxy &);
+  virtual ~ON_CurveProxy();
+
+  void SetProxyCurve(const ON_Curve *real_curve);
+  const ON_Curve *ProxyCurve() const;
+  bool ProxyCurveIsReversed() const;
+  ON_Interval ProxyCurveDomain() const;
+
+  bool IsValid(class ON_TextLog *text_log = nullptr) const override;
+  int Dimension() const override;
+  ON_Interval Domain() const override;
+  int SpanCount() const override;
+  bool GetSpanVector(double *) const override;
+  int Degree() const override;
+  bool Reverse() override;
+  bool Evaluate(double, int, int, double *, int = 0, int * = 0) const override;
+
+private:
+  const ON_Curve *m_real_curve;
+  bool m_bReversed;
+  ON_Interval m_real_curve_domain;
+  ON_Interval m_this_domain;
+};
+# 1 "../opennurbs/opennurbs_nurbscurve.h" 1
+class ON_NurbsCurve : public ON_Curve {
+public:
+  static ON_NurbsCurve *New();
+  static ON_NurbsCurve *New(int dimension, bool bIsRational, int order, int cv_count);
+
+  ON_NurbsCurve() noexcept;
+  ON_NurbsCurve(const ON_NurbsCurve &);
+  ON_NurbsCurve(int dimension, bool bIsRational, int order, int cv_count);
+  virtual ~ON_NurbsCurve();
+  ON_NurbsCurve &operator=(const ON_NurbsCurve &src);
+
+  bool Create(int dimension, bool bIsRational, int order, int cv_count);
+  bool CreateClampedUniformNurbs(int dimension, int order, int point_count, const ON_3dPoint *point, double knot_delta = 1.0);
+  bool CreatePeriodicUniformNurbs(int dimension, int order, int point_count, const ON_3dPoint *point, double knot_delta = 1.0);
+  void Destroy();
+  void Initialize(void);
+  bool ReserveCVCapacity(int desired_cv_capacity);
+  bool ReserveKnotCapacity(int desired_knot_capacity);
+
+  bool IsValid(class ON_TextLog *text_log = nullptr) const override;
+  void Dump(ON_TextLog &dump) const override;
+  unsigned int SizeOf() const override;
+  bool Write(ON_BinaryArchive &binary_archive) const override;
+  bool Read(ON_BinaryArchive &binary_archive) override;
+  int Dimension() const override;
+  bool Transform(const ON_Xform &xform) override;
+  ON_Interval Domain() const override;
+  bool SetDomain(double t0, double t1) override;
+  int SpanCount() const override;
+  bool GetSpanVector(double *knot_values) const override;
+  int Degree() const override;
+  bool Reverse() override;
+  bool Evaluate(double t, int der_count, int v_stride, double *v, int side = 0, int *hint = 0) const override;
+
+  int Order(void) const;
+  int CVCount(void) const;
+  int CVSize(void) const;
+  int KnotCount(void) const;
+  bool IsRational(void) const;
+  double *CV(int cv_index) const;
+  double Weight(int cv_index) const;
+  bool SetWeight(int cv_index, double weight);
+  bool SetCV(int cv_index, const ON_3dPoint &point);
+  bool GetCV(int cv_index, ON_3dPoint &point) const;
+  double Knot(int knot_index) const;
+  bool SetKnot(int knot_index, double knot_value);
+  const double *Knot() const;
+  bool MakeRational();
+  bool MakeNonRational();
+  bool IncreaseDegree(int desired_degree);
+
+  int m_dim;
+  int m_is_rat;
+  int m_order;
+  int m_cv_count;
+  int m_knot_capacity;
+  double *m_knot;
+  int m_cv_stride;
+  int m_cv_capacity;
+  double *m_cv;
+};
+# 1 "../opennurbs/opennurbs_surface.h" 1
+class ON_Surface : public ON_Geometry {
+public:
+  enum ISO {
+    not_iso = 0,
+    x_iso = 1,
+    y_iso = 2,
+    W_iso = 3,
+    S_iso = 4,
+    E_iso = 5,
+    N_iso = 6,
+    iso_count = 7
+  };
+
+  ON_Surface() noexcept;
+  ON_Surface(const ON_Surface &);
+  ON_Surface &operator=(const ON_Surface &);
+  virtual ~ON_Surface();
+
+  virtual ON_Surface *DuplicateSurface() const;
+  virtual ON_Interval Domain(int dir) const = 0;
+  virtual bool SetDomain(int dir, double t0, double t1);
+  virtual int SpanCount(int dir) const = 0;
+  virtual int Degree(int dir) const = 0;
+  virtual bool IsClosed(int dir) const;
+  virtual bool IsPeriodic(int dir) const;
+  virtual bool Transpose() = 0;
+  virtual bool Evaluate(double u, double v, int num_der, int array_stride, double *der_array, int quadrant = 0, int *hint = 0) const = 0;
+
+  ON_3dPoint PointAt(double u, double v) const;
+  ON_3dVector NormalAt(double u, double v) const;
+  bool EvNormal(double s, double t, ON_3dPoint &point, ON_3dVector &normal, int quadrant = 0, int *hint = 0) const;
+};
+
+class ON_SurfaceArray : public ON_SimpleArray<ON_Surface *> {
+public:
+  ON_SurfaceArray(int = 0);
+  ~ON_SurfaceArray();
+  bool Duplicate(ON_SurfaceArray &) const;
+  void Destroy();
+};
+# 1 "../opennurbs/opennurbs_surfaceproxy.h" 1
+class ON_SurfaceProxy : public ON_Surface {
+public:
+  ON_SurfaceProxy();
+  ON_SurfaceProxy(const ON_Surface *);
+  ON_SurfaceProxy(const ON_SurfaceProxy &);
+  ON_SurfaceProxy &operator=(const ON_SurfaceProxy &);
+  virtual ~ON_SurfaceProxy();
+
+  void SetProxySurface(const ON_Surface *proxy_surface);
+  const ON_Surface *ProxySurface() const;
+  bool ProxySurfaceIsTransposed() const;
+
+  bool IsValid(class ON_TextLog *text_log = nullptr) const override;
+  int Dimension() const override;
+  ON_Interval Domain(int) const override;
+  int SpanCount(int) const override;
+  int Degree(int) const override;
+  bool Transpose() override;
+  bool Evaluate(double, double, int, int, double *, int = 0, int * = 0) const override;
+
+private:
+  const ON_Surface *m_surface;
+  bool m_bTransposed;
+};
+# 1 "../opennurbs/opennurbs_point_geometry.h" 1
+class ON_Point : public ON_Geometry {
+public:
+  ON_3dPoint point;
+
+  ON_Point();
+  ON_Point(const ON_Point &);
+  ON_Point(const ON_3dPoint &);
+  ON_Point(double, double, double);
+  ~ON_Point();
+  ON_Point &operator=(const ON_Point &);
+
+  bool IsValid(class ON_TextLog *text_log = nullptr) const override;
+  int Dimension() const override;
+  bool Transform(const ON_Xform &) override;
+};
+# 1 "../opennurbs/opennurbs_mesh.h" 1
+class ON_MeshFace {
+public:
+  int vi[4];
+
+  static const ON_MeshFace UnsetMeshFace;
+
+  bool IsValid(int mesh_vertex_count) const;
+  bool IsTriangle() const;
+  bool IsQuad() const;
+  void Flip();
+};
+
+class ON_Mesh : public ON_Geometry {
+public:
+  ON_Mesh();
+  ON_Mesh(int initial_face_array_capacity, int initial_vertex_array_capacity, bool has_vertex_normals, bool has_texture_coordinates);
+  ON_Mesh(const ON_Mesh &);
+  ON_Mesh &operator=(const ON_Mesh &);
+  virtual ~ON_Mesh();
+
+  void Destroy();
+  void EmergencyDestroy();
+  bool IsValid(class ON_TextLog *text_log = nullptr) const override;
+  int Dimension() const override;
+  bool Transform(const ON_Xform &) override;
+
+  bool SetVertex(int vertex_index, const ON_3dPoint &vertex_location);
+  bool SetVertex(int vertex_index, const ON_3fPoint &vertex_location);
+  bool SetVertexNormal(int vertex_index, const ON_3dVector &unit_normal);
+  bool SetTextureCoord(int vertex_index, double s, double t);
+  bool SetTriangle(int face_index, int vertex_index0, int vertex_index1, int vertex_index2);
+  bool SetQuad(int face_index, int vertex_index0, int vertex_index1, int vertex_index2, int vertex_index3);
+  ON_3dPoint Vertex(int vertex_index) const;
+  int VertexCount() const;
+  unsigned int VertexUnsignedCount() const;
+  int FaceCount() const;
+  unsigned int FaceUnsignedCount() const;
+  int QuadCount() const;
+  int TriangleCount() const;
+  bool HasVertexNormals() const;
+  bool HasFaceNormals() const;
+  bool HasTextureCoordinates() const;
+  bool HasDoublePrecisionVertices() const;
+  bool ComputeFaceNormals();
+  bool ComputeVertexNormals();
+  bool ConvertQuadsToTriangles();
+  bool CombineIdenticalVertices(bool bIgnoreVertexNormals = false, bool bIgnoreTextureCoordinates = false);
+
+  ON_3fPointArray m_V;
+  ON_3dPointArray m_dV;
+  ON_SimpleArray<ON_MeshFace> m_F;
+  ON_3fVectorArray m_N;
+  ON_3fVectorArray m_FN;
+  ON_2fPointArray m_T;
+  ON_SimpleArray<ON_2dPoint> m_S;
+  ON_Interval m_srf_domain[2];
+  double m_srf_scale[2];
+  int m_packed_tex_rotate;
+};
+# 1 "../opennurbs/opennurbs_textlog.h" 1
+class ON_TextLog {
+public:
+  ON_TextLog();
+  ON_TextLog(FILE *fp);
+  virtual ~ON_TextLog();
+
+  void SetDoubleFormat(const char *sFormat);
+  void SetFloatFormat(const char *sFormat);
+  void PushIndent();
+  void PopIndent();
+  int IndentSize() const;
+  void SetIndentSize(int);
+  void Print(const char *format, ...);
+  void Print(const wchar_t *format, ...);
+  void Print(const ON_3dPoint &);
+  void Print(const ON_3dVector &);
+  void PrintNewLine();
+
+protected:
+  FILE *m_pFile;
+  int m_indent_size;
+  int m_beginning_of_line;
+};
+# 1 "../opennurbs/opennurbs_brep.h" 1
+class ON_Brep;
+class ON_BrepTrim;
+class ON_BrepLoop;
+class ON_BrepFace;
+
+class ON_BrepVertex : public ON_Point {
+public:
+  ON_BrepVertex();
+  ~ON_BrepVertex();
+  ON_BrepVertex(int vertex_index);
+  ON_BrepVertex &operator=(const ON_BrepVertex &);
+
+  bool IsValid(class ON_TextLog *text_log = nullptr) const override;
+  void Dump(ON_TextLog &) const override;
+  bool Write(ON_BinaryArchive &) const override;
+  bool Read(ON_BinaryArchive &) override;
+
+  bool SetPoint(const ON_3dPoint &);
+  ON_3dPoint Point() const;
+  double Tolerance() const;
+  int EdgeCount() const;
+
+  int m_vertex_index;
+  ON_SimpleArray<int> m_ei;
+  double m_tolerance;
+};
+
+class ON_BrepEdge : public ON_CurveProxy {
+public:
+  ON_BrepEdge();
+  ~ON_BrepEdge();
+  ON_BrepEdge(int edge_index);
+  ON_BrepEdge &operator=(const ON_BrepEdge &);
+
+  ON_Brep *Brep() const;
+  ON_BrepTrim *Trim(int eti) const;
+  int TrimCount() const;
+  const ON_Curve *EdgeCurveOf() const;
+  int EdgeCurveIndexOf() const;
+  ON_BrepVertex *Vertex(int evi) const;
+  bool IsClosed() const override;
+
+  int m_edge_index;
+  int m_c3i;
+  int m_vi[2];
+  ON_SimpleArray<int> m_ti;
+  double m_tolerance;
+
+private:
+  ON_Brep *m_brep;
+};
+
+class ON_BrepTrim : public ON_CurveProxy {
+public:
+  enum TYPE {
+    unknown = 0,
+    boundary = 1,
+    mated = 2,
+    seam = 3,
+    singular = 4,
+    crvonsrf = 5,
+    ptonsrf = 6,
+    slit = 7,
+    trim_type_count = 8,
+    force_32_bit_trim_type = 0xFFFFFFFF
+  };
+
+  ON_BrepTrim();
+  ~ON_BrepTrim();
+  ON_BrepTrim(int trim_index);
+  ON_BrepTrim &operator=(const ON_BrepTrim &);
+
+  ON_Brep *Brep() const;
+  ON_BrepLoop *Loop() const;
+  ON_BrepFace *Face() const;
+  ON_BrepEdge *Edge() const;
+  ON_BrepVertex *Vertex(int tvi) const;
+  const ON_Curve *TrimCurveOf() const;
+  const ON_Curve *EdgeCurveOf() const;
+  const ON_Surface *SurfaceOf() const;
+  int TrimCurveIndexOf() const;
+  int EdgeCurveIndexOf() const;
+  int SurfaceIndexOf() const;
+
+  int m_trim_index;
+  int m_c2i;
+  int m_ei;
+  int m_vi[2];
+  bool m_bRev3d;
+  TYPE m_type;
+  ON_Surface::ISO m_iso;
+  int m_li;
+  double m_tolerance[2];
+  ON_BoundingBox m_pbox;
+
+private:
+  ON_Brep *m_brep;
+};
+
+class ON_BrepLoop : public ON_Geometry {
+public:
+  enum TYPE {
+    unknown = 0,
+    outer = 1,
+    inner = 2,
+    slit = 3,
+    crvonsrf = 4,
+    ptonsrf = 5,
+    type_count = 6
+  };
+
+  ON_BrepLoop();
+  ON_BrepLoop(int loop_index);
+  ON_BrepLoop &operator=(const ON_BrepLoop &);
+
+  bool IsValid(class ON_TextLog *text_log = nullptr) const override;
+  int Dimension() const override;
+  bool Transform(const ON_Xform &) override;
+
+  ON_Brep *Brep() const;
+  ON_BrepFace *Face() const;
+  int TrimCount() const;
+  ON_BrepTrim *Trim(int lti) const;
+  int IndexOfTrim(const ON_BrepTrim &) const;
+  const ON_Surface *SurfaceOf() const;
+
+  int m_loop_index;
+  ON_SimpleArray<int> m_ti;
+  TYPE m_type;
+  int m_fi;
+  ON_BoundingBox m_pbox;
+
+private:
+  ON_Brep *m_brep;
+};
+
+class ON_BrepFace : public ON_SurfaceProxy {
+public:
+  ON_BrepFace();
+  ~ON_BrepFace();
+  ON_BrepFace(int face_index);
+  ON_BrepFace &operator=(const ON_BrepFace &);
+
+  bool IsValid(class ON_TextLog *text_log = nullptr) const override;
+  bool Transform(const ON_Xform &) override;
+
+  ON_Brep *Brep() const;
+  int LoopCount() const;
+  ON_BrepLoop *Loop(int fli) const;
+  ON_BrepLoop *OuterLoop() const;
+  int SurfaceIndexOf() const;
+  const ON_Surface *SurfaceOf() const;
+  const ON_Mesh *Mesh(ON_mesh_type mesh_type) const;
+  void DestroyMesh(ON_mesh_type mesh_type);
+
+  int m_face_index;
+  ON_SimpleArray<int> m_li;
+  int m_si;
+  bool m_bRev;
+  int m_face_material_channel;
+  ON_UUID m_face_uuid;
+
+private:
+  ON_BoundingBox m_bbox;
+  ON_Brep *m_brep;
+  ON_Mesh *m_render_mesh;
+  ON_Mesh *m_analysis_mesh;
+  ON_Mesh *m_preview_mesh;
+};
+
+class ON_BrepVertexArray : public ON_ObjectArray<ON_BrepVertex> {
+public:
+  ON_BrepVertexArray();
+  ~ON_BrepVertexArray();
+  bool Read(ON_BinaryArchive &);
+  bool Write(ON_BinaryArchive &) const;
+  unsigned int SizeOf() const;
+};
+
+class ON_BrepEdgeArray : public ON_ObjectArray<ON_BrepEdge> {
+public:
+  ON_BrepEdgeArray();
+  ~ON_BrepEdgeArray();
+  bool Read(ON_BinaryArchive &);
+  bool Write(ON_BinaryArchive &) const;
+  unsigned int SizeOf() const;
+};
+
+class ON_BrepTrimArray : public ON_ObjectArray<ON_BrepTrim> {
+public:
+  ON_BrepTrimArray();
+  ~ON_BrepTrimArray();
+  bool Read(ON_BinaryArchive &);
+  bool Write(ON_BinaryArchive &) const;
+  unsigned int SizeOf() const;
+};
+
+class ON_BrepLoopArray : public ON_ObjectArray<ON_BrepLoop> {
+public:
+  ON_BrepLoopArray();
+  ~ON_BrepLoopArray();
+  bool Read(ON_BinaryArchive &);
+  bool Write(ON_BinaryArchive &) const;
+  unsigned int SizeOf() const;
+};
+
+class ON_BrepFaceArray : public ON_ObjectArray<ON_BrepFace> {
+public:
+  ON_BrepFaceArray();
+  ~ON_BrepFaceArray();
+  bool Read(ON_BinaryArchive &);
+  bool Write(ON_BinaryArchive &) const;
+  unsigned int SizeOf() const;
+};
+
+class ON_Brep : public ON_Geometry {
+public:
+  static ON_Brep *New();
+  static ON_Brep *New(const ON_Brep &);
+
+  ON_Brep();
+  virtual ~ON_Brep();
+  ON_Brep(const ON_Brep &);
+  ON_Brep &operator=(const ON_Brep &);
+
+  void Destroy();
+  bool IsValid(class ON_TextLog *text_log = nullptr) const override;
+  void Dump(ON_TextLog &) const override;
+  bool Write(ON_BinaryArchive &) const override;
+  bool Read(ON_BinaryArchive &) override;
+  int Dimension() const override;
+  bool Transform(const ON_Xform &) override;
+
+  bool IsSolid() const;
+  bool IsManifold() const;
+  bool IsSurface() const;
+  int AddTrimCurve(ON_Curve *trim_curve);
+  int AddEdgeCurve(ON_Curve *edge_curve);
+  int AddSurface(ON_Surface *surface);
+  ON_BrepVertex &NewVertex();
+  ON_BrepVertex &NewVertex(ON_3dPoint vertex_point, double vertex_tolerance = -1.23432101234321e+308);
+  ON_BrepEdge &NewEdge(int c3i = -1);
+  ON_BrepEdge &NewEdge(ON_BrepVertex &, ON_BrepVertex &, int = -1, const ON_Interval * = nullptr, double edge_tolerance = -1.23432101234321e+308);
+  ON_BrepFace &NewFace(int si = -1);
+  ON_BrepLoop &NewLoop(ON_BrepLoop::TYPE);
+  ON_BrepLoop &NewLoop(ON_BrepLoop::TYPE loopt, ON_BrepFace &face);
+  ON_BrepTrim &NewTrim(int c2i = -1);
+  ON_BrepTrim &NewTrim(ON_BrepEdge &edge, bool bRev3d, int c2i = -1);
+  ON_BrepTrim &NewTrim(ON_BrepEdge &edge, bool bRev3d, ON_BrepLoop &loop, int c2i = -1);
+  bool SetTrimIsoFlags();
+  bool SetTrimTypeFlags(bool bLazy = false);
+  bool SetTolerancesBoxesAndFlags(bool bLazy = false, bool bSetVertexTolerances = true, bool bSetEdgeTolerances = true, bool bSetTrimTolerances = true, bool bSetTrimIsoFlags = true, bool bSetTrimTypeFlags = true, bool bSetLoopTypeFlags = true, bool bSetTrimBoxes = true);
+  const ON_Curve *Curve2d(int trim_curve_index) const;
+  const ON_Curve *Curve3d(int edge_curve_index) const;
+  const ON_Surface *Surface(int surface_index) const;
+
+  ON_CurveArray m_C2;
+  ON_CurveArray m_C3;
+  ON_SurfaceArray m_S;
+  ON_BrepVertexArray m_V;
+  ON_BrepEdgeArray m_E;
+  ON_BrepTrimArray m_T;
+  ON_BrepLoopArray m_L;
+  ON_BrepFaceArray m_F;
+
+protected:
+  ON_BoundingBox m_bbox;
+  int m_is_solid;
+};
@@ -0,0 +1,211 @@
+// The C++ baseline for bench_bindings.d: the same operations, on the
+// same data, against the same OpenNURBS build, printing JSON in the
+// same shape.
+//
+//   $ clang++ -O3 -I ../opennurbs -o bench_bindings_cpp bench_bindings.cpp \
+//       -L../opennurbs -lopennurbs
+//   $ ./bench_bindings_cpp [scale] [repeat] > bench_cpp.json
+
+#include "opennurbs.h"
+
+#include <chrono>
+#include <cmath>
+#include <cstdio>
+#include <cstdlib>
+#include <functional>
+#include <vector>
+
+struct Result {
+  const char *name;
+  long long iterations;
+  double best_seconds;
+  double checksum;
+};
+
+static Result measure(const char *name, long long iterations, int repeat,
+                      const std::function<double()> &fn) {
+  double best = INFINITY;
+  double checksum = 0;
+  for (int i = 0; i < repeat; i++) {
+    const auto start = std::chrono::steady_clock::now();
+    checksum = fn();
+    const std::chrono::duration<double> seconds =
+        std::chrono::steady_clock::now() - start;
+    if (seconds.count() < best)
+      best = seconds.count();
+  }
+  return {name, iterations, best, checksum};
+}
+
+////////////////////////////////////////////////////////////////
+// ON_3dPoint arithmetic
+
+static double point_arithmetic(int n) {
+  ON_3dPoint p(0.0, 0.0, 0.0);
+  const ON_3dPoint q(1.0, 2.0, 3.0);
+  double dot = 0.0;
+  for (int i = 0; i < n; i++) {
+    p = (p + q)*0.5;
+    dot += p*q;
+  }
+  return p.x + p.y + p.z + dot;
+}
+
+////////////////////////////////////////////////////////////////
+// ON_SimpleArray access
+
+static void make_points(ON_3dPointArray &points, int n) {
+  points.Reserve(n);
+  for (int i = 0; i < n; i++)
+    points.Append(ON_3dPoint(i, 0.5*i, 0.25*i));
+}
+
+static double array_count_at(const ON_3dPointArray &points) {
+  double sum = 0.0;
+  for (int i = 0; i < points.Count(); i++)
+    sum += points.At(i)->x;
+  return sum;
+}
+
+static double array_index(const ON_3dPointArray &points) {
+  double sum = 0.0;
+  const int count = points.Count();
+  for (int i = 0; i < count; i++)
+    sum += points[i].x;
+  return sum;
+}
+
+static double array_slice(const ON_3dPointArray &points) {
+  // the closest C++ gets to a D slice: a raw pointer and a count
+  double sum = 0.0;
+  const ON_3dPoint *p = points.Array();
+  const int count = points.Count();
+  for (int i = 0; i < count; i++)
+    sum += p[i].x;
+  return sum;
+}
+
+////////////////////////////////////////////////////////////////
+// ON_NurbsCurve evaluation
+
+static double curve_point_at(const ON_NurbsCurve &curve, int n) {
+  const ON_Interval domain = curve.Domain();
+  const double t0 = domain[0], t1 = domain[1];
+  double sum = 0.0;
+  for (int i = 0; i < n; i++) {
+    const ON_3dPoint p = curve.PointAt(t0 + (t1 - t0)*i/(n - 1));
+    sum += p.x + p.y + p.z;
+  }
+  return sum;
+}
+
+////////////////////////////////////////////////////////////////
+// brep face traversal, as in TraverseBrepFace
+
+static void make_grid(ON_Brep &brep, int n) {
+  for (int j = 0; j < n + 1; j++)
+    for (int i = 0; i < n + 1; i++)
+      brep.NewVertex(ON_3dPoint(i, j, 0.0), 0.0);
+  for (int j = 0; j < n + 1; j++)
+    for (int i = 0; i < n; i++)
+      brep.NewEdge(brep.m_V[j*(n + 1) + i], brep.m_V[j*(n + 1) + i + 1],
+                   -1, nullptr, 0.0);
+  for (int j = 0; j < n; j++)
+    for (int i = 0; i < n + 1; i++)
+      brep.NewEdge(brep.m_V[j*(n + 1) + i], brep.m_V[(j + 1)*(n + 1) + i],
+                   -1, nullptr, 0.0);
+  const int vertical = n*(n + 1);
+  for (int j = 0; j < n; j++) {
+    for (int i = 0; i < n; i++) {
+      ON_BrepFace &face = brep.NewFace(-1);
+      ON_BrepLoop &loop = brep.NewLoop(ON_BrepLoop::outer, face);
+      brep.NewTrim(brep.m_E[j*n + i], false, loop, -1);
+      brep.NewTrim(brep.m_E[vertical + j*(n + 1) + i + 1], false, loop, -1);
+      brep.NewTrim(brep.m_E[(j + 1)*n + i], true, loop, -1);
+      brep.NewTrim(brep.m_E[vertical + j*(n + 1) + i], true, loop, -1);
+    }
+  }
+}
+
+static double brep_traversal(const ON_Brep &brep) {
+  double sum = 0.0;
+  const int face_count = brep.m_F.Count();
+  for (int fi = 0; fi < face_count; fi++) {
+    const ON_BrepFace *face = brep.m_F.At(fi);
+    const int loop_count = face->m_li.Count();
+    for (int fli = 0; fli < loop_count; fli++) {
+      const ON_BrepLoop &loop = brep.m_L[face->m_li[fli]];
+      const int trim_count = loop.m_ti.Count();
+      for (int lti = 0; lti < trim_count; lti++) {
+        const ON_BrepTrim &trim = brep.m_T[loop.m_ti[lti]];
+        if (trim.m_ei == -1)
+          continue;
+        const ON_BrepEdge &edge = brep.m_E[trim.m_ei];
+        sum += trim.m_ei + edge.m_vi[0] + edge.m_vi[1];
+      }
+    }
+  }
+  return sum;
+}
+
+////////////////////////////////////////////////////////////////
+
+int main(int argc, const char *argv[]) {
+  ON::Begin();
+
+  const int scale = argc > 1 ? atoi(argv[1]) : 1;
+  const int repeat = argc > 2 ? atoi(argv[2]) : 5;
+
+  const int num_ops = 1000000*scale;
+  const int num_points = 100000*scale;
+  const int cv_count = 64;
+  const int grid = 100;
+
+  ON_3dPointArray points;
+  make_points(points, num_points);
+  ON_NurbsCurve curve;
+  curve.CreateClampedUniformNurbs(3, 4, cv_count, points.Array(), 1.0);
+  ON_Brep brep;
+  make_grid(brep, grid);
+
+  std::vector<Result> results = {
+    measure("point_arithmetic", num_ops, repeat,
+         [&] { return point_arithmetic(num_ops); }),
+    measure("array_count_at", num_points, repeat,
+         [&] { return array_count_at(points); }),
+    measure("array_index", num_points, repeat,
+         [&] { return array_index(points); }),
+    measure("array_slice", num_points, repeat,
+         [&] { return array_slice(points); }),
+    measure("nurbs_curve_point_at", num_ops/10, repeat,
+         [&] { return curve_point_at(curve, num_ops/10); }),
+    measure("brep_face_traversal", brep.m_T.Count(), repeat,
+         [&] { return brep_traversal(brep); }),
+  };
+
+  printf("{\n");
+  printf("  \"language\": \"c++\",\n");
+#if defined(__clang__)
+  printf("  \"compiler\": \"clang %s\",\n", __clang_version__);
+#elif defined(__GNUC__)
+  printf("  \"compiler\": \"gcc %s\",\n", __VERSION__);
+#else
+  printf("  \"compiler\": null,\n");
+#endif
+  printf("  \"scale\": %d,\n", scale);
+  printf("  \"repeat\": %d,\n", repeat);
+  printf("  \"results\": {\n");
+  for (size_t i = 0; i < results.size(); i++) {
+    const Result &result = results[i];
+    printf("    \"%s\": {\"iterations\": %lld, \"best_seconds\": %.9g, "
+           "\"ns_per_op\": %.6g, \"checksum\": %.17g}%s\n",
+           result.name, result.iterations, result.best_seconds,
+           result.best_seconds*1e9/result.iterations, result.checksum,
+           i + 1 < results.size() ? "," : "");
+  }
+  printf("  }\n");
+  printf("}\n");
+
+  ON::End();
+  return 0;
+}
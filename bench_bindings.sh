@@ -0,0 +1,20 @@
+#!/usr/bin/env bash
+
+# Builds bench_bindings.d (against opennurbs.d, made by run.sh) and its
+# C++ baseline bench_bindings.cpp against the same OpenNURBS build,
+# runs both, and compares them with bench/compare_bindings.py. Extra
+# arguments (scale and repeat) are passed on to both benchmarks.
+
+OPENNURBS_PATH=${OPENNURBS_PATH:-../opennurbs}
+OPENNURBS_LIB=${OPENNURBS_LIB:-opennurbs}
+DC=${DC:-ldc2}
+CXX=${CXX:-clang++}
+
+$DC -O3 -release -of=bench_bindings bench_bindings.d opennurbs.d \
+    -L-L$OPENNURBS_PATH -L-l$OPENNURBS_LIB -L-lstdc++ || exit
+$CXX -O3 -I $OPENNURBS_PATH -o bench_bindings_cpp bench_bindings.cpp \
+    -L$OPENNURBS_PATH -l$OPENNURBS_LIB || exit
+
+./bench_bindings "$@" > bench_d.json || exit
+./bench_bindings_cpp "$@" > bench_cpp.json || exit
+bench/compare_bindings.py bench_d.json bench_cpp.json -o bench_compare.json
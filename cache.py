@@ -0,0 +1,142 @@
+import copy
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+
+# A small content-addressed on-disk cache. Entries are pickled values
+# stored under the hex digest of whatever they were derived from. The
+# mtime of an entry is bumped on every hit, so the oldest mtimes are
+# the least recently used entries, and those get evicted first when
+# the cache grows past max_bytes. The total size is only walked for
+# once per run (on the first put, or on handing out a worker cache)
+# and kept up to date after that, and eviction goes down to three
+# quarters of max_bytes, so that the next walk is a good while off.
+# Worker processes write through a copy from get_worker_cache, which
+# never walks or evicts: they hand back how much they wrote, and the
+# parent adds it up (see add_written).
+
+default_cache_dir = '.cpp2d_cache'
+default_max_bytes = 512*1024*1024
+
+def make_key(*parts):
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode('utf-8')
+        h.update(len(part).to_bytes(8, 'little'))
+        h.update(part)
+    return h.hexdigest()
+
+class DiskCache:
+    def __init__(self, path=default_cache_dir, max_bytes=default_max_bytes,
+                 enabled=True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = None # see find_total_bytes
+        self.worker = False
+        self.written_bytes = 0 # with worker
+
+    def entry_path(self, key):
+        return os.path.join(self.path, key[:2], key)
+
+    def get(self, key, default=None):
+        if not self.enabled:
+            return default
+        path = self.entry_path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return default
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if not self.enabled:
+            return
+        path = self.entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            old_size = os.stat(path).st_size
+        except OSError:
+            old_size = 0
+        # write to a temp file and rename so that concurrent readers
+        # never see a partially written entry
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                size = f.tell()
+            os.replace(tmp, path)
+        except:
+            os.unlink(tmp)
+            raise
+        if self.worker:
+            self.written_bytes += size - old_size
+        else:
+            self.add_written(size - old_size)
+
+    def find_total_bytes(self):
+        if self.total_bytes is None:
+            self.total_bytes = sum(size for _, size, _ in self.entries())
+
+    def add_written(self, nbytes):
+        if not self.enabled or nbytes == 0:
+            return
+        self.find_total_bytes()
+        self.total_bytes += nbytes
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+
+    def get_worker_cache(self):
+        # (before any worker writes to it, so as not to count those
+        # entries twice)
+        if self.enabled:
+            self.find_total_bytes()
+        worker_cache = copy.copy(self)
+        worker_cache.worker = True
+        worker_cache.written_bytes = 0
+        return worker_cache
+
+    def entries(self):
+        entries = []
+        if not os.path.isdir(self.path):
+            return entries
+        for dirpath, _, filenames in os.walk(self.path):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes*3//4
+        entries.sort()
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+        self.total_bytes = total
+
+    def clear(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+        self.total_bytes = 0
@@ -1,69 +1,272 @@
 #!/usr/bin/env python
 
+import argparse
+import atexit
+import dataclasses
+import hashlib
+import os
+import re
+import shutil
 import sys
-
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from fnmatch import fnmatchcase
+from itertools import repeat
+
+import cxxheaderparser
+from cxxheaderparser.errors import CxxParseError
+from cxxheaderparser.options import ParserOptions
+from cxxheaderparser.parser import CxxParser
 from cxxheaderparser.simple import *
 from cxxheaderparser.types import *
 
+from cache import DiskCache, default_cache_dir, default_max_bytes, make_key
+from diagnostics import Diagnostics, Unsupported
+from preprocess import PreprocessError, format_source, preprocess
+from profiling import (Profiler, get_peak_since, profile_class, profile_stage,
+                       start_peak, start_tracing)
+
 tabwidth = 2
-spaces = 0
 # current_access = None
 
-file_ = None
+# whether unsupported() can stop in the debugger: only when run from
+# the command line without --batch, and never in a --jobs worker (see
+# init_worker)
+interactive = False
+
+def unsupported(what):
+    # something we don't know how to translate (yet). Normally, stop
+    # right there in the caller to poke around; with --batch, bail out
+    # of the declaration instead, which gets recorded further up. A
+    # worker has no terminal to stop in, so it bails out too, and the
+    # parent redoes the work itself (see get_worker_results)
+    if not interactive:
+        raise Unsupported(what)
+    import ipdb; ipdb.set_trace(sys._getframe(1))
+
+# Emitted D accumulates in a list of fragments and only gets written
+# out to the underlying file (if there is one) in big blocks, at the
+# end of a top-level declaration. The indentation level lives here,
+# too, so that separate emitters don't trip over each other.
+class Emitter:
+    def __init__(self, file=None, flush_size=1 << 16):
+        self.file = file
+        self.flush_size = flush_size
+        self.blocks = []
+        self.parts = []
+        self.size = 0
+        self.spaces = 0
+
+    def output(self, s):
+        self.parts.append(s)
+
+    def newline(self):
+        self.parts.append('\n')
+
+    def indent(self):
+        assert self.spaces % tabwidth == 0
+        self.spaces += tabwidth
+
+    def dedent(self):
+        assert self.spaces >= 0 and self.spaces % tabwidth == 0
+        self.spaces -= tabwidth
+
+    def output_indent(self):
+        self.parts.append(self.spaces * ' ')
+
+    def end_declaration(self):
+        # collapse the fragments of the declaration we just finished,
+        # and write them out once enough have piled up
+        block = ''.join(self.parts)
+        self.parts.clear()
+        self.blocks.append(block)
+        self.size += len(block)
+        if self.file is not None and self.size >= self.flush_size:
+            self.flush()
+
+    def mark(self):
+        return len(self.parts), self.spaces
+
+    def rollback(self, mark):
+        # throw away everything emitted since mark (within the current
+        # declaration)
+        num_parts, self.spaces = mark
+        del self.parts[num_parts:]
+
+    def flush(self):
+        if self.file is None:
+            return
+        self.file.write(''.join(self.blocks) + ''.join(self.parts))
+        self.blocks.clear()
+        self.parts.clear()
+        self.size = 0
+
+    def getvalue(self):
+        return ''.join(self.blocks) + ''.join(self.parts)
+
+parser_options = ParserOptions()
 
+def get_parser_version():
+    try:
+        from importlib.metadata import version
+        return version('cxxheaderparser')
+    except Exception:
+        return cxxheaderparser.__version__
+
+def get_parser_options_key(options):
+    # the preprocessor hook is a function, so key on its name rather
+    # than its repr (which includes an address)
+    fields = []
+    for field in dataclasses.fields(options):
+        value = getattr(options, field.name)
+        if callable(value):
+            value = getattr(value, '__qualname__', type(value).__name__)
+        fields.append(f'{field.name}={value!r}')
+    return ','.join(fields)
+
+class BodyParser(CxxParser):
+    # CxxParser throws away the bodies of inline functions. This keeps
+    # the tokens of method bodies (without the braces) around as
+    # method.body, so that simple ones can be translated into D.
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.body = None
+
+    def _discard_contents(self, start_type, end_type):
+        if self.body is None or start_type != '{':
+            super()._discard_contents(start_type, end_type)
+            return
+        body = []
+        level = 1
+        get_token = self.lex.token
+        while True:
+            tok = get_token()
+            if tok.type == start_type:
+                level += 1
+            elif tok.type == end_type:
+                level -= 1
+                if level == 0:
+                    break
+            body.append(tok.value)
+        self.body = body
+
+    def _parse_method_end(self, method):
+        method.location = self.lex.current_location()
+        self.body = []
+        try:
+            super()._parse_method_end(method)
+            if method.has_body:
+                method.body = self.body
+        finally:
+            self.body = None
+
+class LocatingVisitor(SimpleCxxVisitor):
+    # Remembers where (i.e. in which header, going by the line markers)
+    # each class, enum and alias was declared, for --batch's report.
+    # Methods get theirs from BodyParser.
+    lex = None
+
+    def on_class_start(self, state):
+        result = super().on_class_start(state)
+        state.user_data.location = state.location
+        return result
+
+    def on_enum(self, state, enum):
+        super().on_enum(state, enum)
+        enum.location = self.lex.current_location()
+
+    def on_typedef(self, state, typedef):
+        super().on_typedef(state, typedef)
+        typedef.location = self.lex.current_location()
+
+    def on_using_alias(self, state, using):
+        super().on_using_alias(state, using)
+        using.location = self.lex.current_location()
+
+def parse_source(text, filename='<str>', options=parser_options):
+    visitor = LocatingVisitor()
+    parser = BodyParser(filename, text, visitor, options)
+    visitor.lex = parser.lex
+    parser.parse()
+    return visitor.data
+
+def parse_cached(text, cache, filename='<str>'):
+    # key on everything that could change the parse tree: the input
+    # itself, the parser version, and the parser options
+    key = make_key('parse', 'bodies', 'locations', get_parser_version(),
+                   get_parser_options_key(parser_options), text)
+    parsed = cache.get(key)
+    if parsed is None:
+        parsed = parse_source(text, filename)
+        cache.put(key, parsed)
+    return parsed
+
+# Everything that emitting one class needs to know about the others,
+# boiled down to a few flags and names, so that the class scopes
+# themselves don't have to stay alive once they've been emitted (see
+# --stream). Names are interned, since the same few thousand of them
+# come up over and over, and base classes are linked by their index
+# in Translator.class_table, which finish_class_metadata fills in.
 class ClassMetadata:
-    def __init__(self, cls):
-        self.cls = cls
+    __slots__ = ('id', 'name', 'base_name', 'base_id', 'has_fields',
+                 'all_virtual', 'method_names', 'nothrow_method_signatures',
+                 'inherited_method_names',
+                 'inherited_nothrow_method_signatures',
+                 'needs_dummy_virtual_method', 'has_children', 'is_interface')
+
+    def __init__(self, cls, id_):
+        bases = cls.class_decl.bases
+        self.id = id_
+        self.name = sys.intern(get_class_name(cls))
+        self.base_name = sys.intern(get_class_name(bases[0])) if bases else None
+        self.base_id = None
+        self.has_fields = len(cls.fields) > 0
+        self.all_virtual = all(_.constructor or is_virtual_method(_)
+                               for _ in cls.methods)
+        self.method_names = frozenset(sys.intern(get_method_name(_))
+                                      for _ in cls.methods)
+        # (see get_method_signature and add_class_metadata)
+        self.nothrow_method_signatures = frozenset()
+        # the same, for this class and all of its ancestors, if it has
+        # children (see finish_class_metadata)
+        self.inherited_method_names = None
+        self.inherited_nothrow_method_signatures = None
         self.needs_dummy_virtual_method = False
         self.has_children = False
-        self.is_interface = False
-
-def should_class_be_interface(metadata):
-    has_base = False
-    cls = metadata.cls
-    decl = cls.class_decl
-    if len(decl.bases) > 0:
-        has_base = True
-        base = decl.bases[0]
-        base_metadata = class_metadata[get_class_name(base)]
-    return len(cls.fields) == 0 \
-        and all(_.constructor or is_virtual_method(_) for _ in cls.methods) \
-        and (not has_base or should_class_be_interface(base_metadata))
-
-class_metadata = dict()
-
-def output(s):
-    global file_
-    file_.write(s)
-
-def newline():
-    global file_
-    file_.write('\n')
-
-def indent():
-    global spaces
-    assert spaces % tabwidth == 0
-    spaces += tabwidth
-
-def dedent():
-    global spaces
-    assert spaces >= 0 and spaces % tabwidth == 0
-    spaces -= tabwidth
-
-def output_indent():
-    output(spaces * ' ')
-
-# def reset_access():
-#     global current_access
-#     current_access = None
-
-# def output_and_update_access(access):
-#     global current_access
-#     if current_access != access:
-#         dedent()
-#         print(f'{access}:')
-#         indent()
-#         current_access = access
+        self.is_interface = None # filled in by should_class_be_interface
+
+# ClassMetadata's per-class method names -> the same for the class and
+# its ancestors
+inherited_attrs = {
+    'method_names': 'inherited_method_names',
+    'nothrow_method_signatures': 'inherited_nothrow_method_signatures',
+}
+
+# array templates whose storage gets exposed to D as a slice (through
+# ArrayStorage in header.d): class name -> (pointer field, count field)
+array_storage_fields = {
+    'ON_SimpleArray': ('m_a', 'm_count'),
+    'ON_ClassArray': ('m_a', 'm_count'),
+}
+
+# zero-copy accessors for whole buffers of a class, on top of the
+# array slices above: class name -> [(accessor, field, element type to
+# flatten to, or None)]
+buffer_views = {
+    'ON_Mesh': [
+        ('vertices', 'm_V', None),
+        ('doubleVertices', 'm_dV', None),
+        ('normals', 'm_N', None),
+        ('faces', 'm_F', None),
+        ('textureCoordinates', 'm_T', None),
+        ('vertexComponents', 'm_V', 'float'),
+        ('doubleVertexComponents', 'm_dV', 'double'),
+        ('normalComponents', 'm_N', 'float'),
+        ('faceIndices', 'm_F', 'int'),
+        ('textureCoordinateComponents', 'm_T', 'float'),
+    ],
+}
 
 def remap_param_name(name):
     # avoid collisions with D keywords
@@ -74,11 +277,6 @@ def remap_param_name(name):
     else:
         return name
 
-def output_param(param):
-    output_type(param.type, reset_arrays_to_ptrs=True)
-    if param.name:
-        output(f' {remap_param_name(param.name)}')
-
 def remap_segment_name(name):
     if name == 'std':
         return 'std_'
@@ -103,117 +301,6 @@ def remap_segment_name(name):
     else:
         return name
 
-def output_template_argument(arg):
-    assert not arg.param_pack
-    if isinstance(arg.arg, Type) or isinstance(arg.arg, Pointer):
-        output_type(arg.arg)
-    elif isinstance(arg.arg, Value):
-        try:
-            # If a template argument is even moderately complicated,
-            # this library appears to give up and just return some
-            # tokens. In which case, it makes sense to just parse it
-            # again, grab the type off the result, and output *that*.
-            tokens = arg.arg.tokens
-            type_str = ' '.join([_.value for _ in tokens])
-            var_str = type_str + ' tmp;' # wee!
-            parsed = parse_string(var_str)
-            type_ = parsed.namespace.variables[0].type
-            output_type(type_)
-        except:
-            import ipdb; ipdb.set_trace()
-            pass
-    else:
-        import ipdb; ipdb.set_trace()
-        pass
-
-def output_template_arguments(args):
-    assert len(args) > 0
-    for arg in args[:-1]:
-        output_template_argument(arg)
-        output(', ')
-    output_template_argument(args[-1])
-
-def output_segment(segment):
-    if isinstance(segment, NameSpecifier):
-        name = remap_segment_name(segment.name)
-        output(name)
-        if segment.specialization is not None:
-            output('!(')
-            output_template_arguments(segment.specialization.args)
-            output(')')
-    elif isinstance(segment, FundamentalSpecifier):
-        name = remap_segment_name(segment.name)
-        output(name)
-    elif isinstance(segment, AnonymousName):
-        import ipdb; ipdb.set_trace()
-        pass
-    else:
-        import ipdb; ipdb.set_trace()
-        pass
-
-def output_segments(segments):
-    assert len(segments) > 0
-    for segment in segments[:-1]:
-        output_segment(segment)
-        output('.')
-    output_segment(segments[-1])
-
-def output_typename(typename):
-    output_segments(typename.segments)
-
-def output_type(type_, reset_arrays_to_ptrs=False, reset_refs_to_ptrs=False):
-    if isinstance(type_, Array):
-        output_type(type_.array_of)
-        if reset_arrays_to_ptrs:
-            output('*')
-        else:
-            output('[')
-            output_tokens(type_.size.tokens)
-            output(']')
-    elif isinstance(type_, Pointer) and isinstance(type_.ptr_to, FunctionType):
-        type_ = type_.ptr_to
-        output_type(type_.return_type)
-        output(' function(')
-        if type_.parameters:
-            output_param(type_.parameters[0])
-            for i in range(1, len(type_.parameters)):
-                output(', ')
-                output_param(type_.parameters[i])
-        output(')')
-    elif isinstance(type_, Pointer):
-        output_type(type_.ptr_to)
-        output('*')
-    elif isinstance(type_, Reference):
-        if not reset_refs_to_ptrs:
-            output('ref ')
-        output_type(type_.ref_to)
-        if reset_refs_to_ptrs:
-            output('*')
-    elif isinstance(type_, Type):
-        # NOTE: no volatile in D
-        # assert not type_.volatile
-        typename = type_.typename
-        classkey = typename.classkey
-        if classkey is not None and classkey not in {'class', 'struct', 'union', 'enum class'}:
-            import ipdb; ipdb.set_trace()
-            pass
-        if type_.const:
-            output('const(')
-        output_typename(typename)
-        if type_.const:
-            output(')')
-    else:
-        import ipdb; ipdb.set_trace()
-        pass
-
-def output_tokens(tokens):
-    for token in tokens:
-        assert isinstance(token.value, str)
-        s = token.value
-        if s == '::':
-            s = '.'
-        output(s)
-
 def is_anonymous(_):
     if isinstance(_, ClassScope):
         return is_anonymous(_.class_decl)
@@ -223,8 +310,7 @@ def is_anonymous(_):
     elif isinstance(_, Field):
         return is_anonymous(_.type)
     else:
-        import ipdb; ipdb.set_trace()
-        pass
+        unsupported(f'is_anonymous of a {type(_).__name__}')
 
 def is_union(_):
     if isinstance(_, Array) or isinstance(_, Pointer) or isinstance(_, Reference):
@@ -236,17 +322,15 @@ def is_union(_):
     else:
         try:
             return _.class_decl.typename.classkey == 'union'
-        except:
-            import ipdb; ipdb.set_trace()
-            pass
+        except AttributeError:
+            unsupported(f'is_union of a {type(_).__name__}')
 
 def is_enum(_):
     if isinstance(_, EnumDecl):
         classkey = _.typename.classkey
         return classkey == 'enum' or classkey == 'enum class'
     else:
-        import ipdb; ipdb.set_trace()
-        pass
+        unsupported(f'is_enum of a {type(_).__name__}')
         # return cls.class_decl.typename.classkey == 'enum'
 
 def is_anonymous_union(_):
@@ -265,256 +349,42 @@ def get_anonymous_union_key(_):
     elif isinstance(_, Field):
         return get_anonymous_union_key(_.type)
     else:
-        import ipdb; ipdb.set_trace()
-        pass
-
-def output_union(union):
-    output('union')
-    if not is_anonymous(union):
-        import ipdb; ipdb.set_trace()
-        pass
-    output(' {')
-    newline()
-    indent()
-    for field in union.fields:
-        output_indent()
-        output_type(field.type, reset_refs_to_ptrs=True)
-        output(f' {field.name};')
-        newline()
-    dedent()
-    output_indent()
-    output('}')
-
-def output_enum(_):
-    assert is_enum(_)
-    assert len(_.values) > 0
-    output_indent()
-    output(f'enum')
-    try:
-        if not is_anonymous_enum(_):
-            output(f' ')
-            output_typename(_.typename)
-    except:
-        import ipdb; ipdb.set_trace()
-        pass
-    if _.base:
-        output(' : ')
-        output_typename(_.base)
-    output(' {')
-    newline()
-    indent()
-    for i, value in enumerate(_.values):
-        output_indent()
-        output(f'{value.name}')
-        if value.value:
-            output(' = ')
-            output_tokens(value.value.tokens)
-        output(',' if i + 1 < len(_.values) else '')
-        newline()
-    dedent()
-    output_indent()
-    output('}')
-    newline()
-
-def output_template_parameter(param):
-    assert not param.param_pack
-    assert param.default is None
-    assert param.template is None
-    if param.typekey == 'class':
-        output(param.name)
-    else:
-        assert False
-
-def output_template_parameters(params):
-    assert len(params) > 0
-    output('(')
-    for param in params[:-1]:
-        output_template_parameter(param)
-        output(', ')
-    output_template_parameter(params[-1])
-    output(')')
+        unsupported(f'get_anonymous_union_key of a {type(_).__name__}')
 
 def get_method_name(method):
     return ''.join([_.name for _ in method.name.segments])
 
-def find_base_class(cls):
-    bases = cls.class_decl.bases
-    num_bases = len(bases)
-    assert num_bases <= 1 # no multiple inheritance! (well, sort of)
-    if num_bases == 0:
-        return None
-    base_cls = class_metadata[get_class_name(bases[0])].cls
-    return base_cls
-
-def find_base_class_methods(cls, method_name):
-    base_cls = find_base_class(cls)
-    if base_cls is None:
-        return []
-    else:
-        return [_ for _ in base_cls.methods if get_method_name(_) == method_name]
+def get_method_signature(method):
+    # what D goes by to tell whether a method overrides another
+    params = ', '.join(_.type.format() for _ in method.parameters)
+    const = ' const' if method.const else ''
+    return sys.intern(f'{get_method_name(method)}({params}){const}')
 
-def any_base_class_methods(cls, method_name):
-    base_methods = find_base_class_methods(cls, method_name)
-    return len(base_methods) > 0
-    
 def has_rvalue_ref_param(method):
     return any(type(_.type) == MoveReference for _ in method.parameters)
 
-def output_class_constructor(cls, method):
-    # TODO: not sure what to do about rvalue references at this point...
-    # they may be added in a future version of D
-    if has_rvalue_ref_param(method):
-        return
-
-    # TODO: handle deleted constructors?
-    if method.deleted:
-        return
-
-    is_default_constructor = len(method.parameters) == 0
-    
-    # TODO: just don't emit these for now...
-    if is_default_constructor and not should_be_class(cls):
-        return
-
-    output_indent()
-    output('this(')
-    if method.parameters:
-        output_param(method.parameters[0])
-        for i in range(1, len(method.parameters)):
-            output(', ')
-            output_param(method.parameters[i])
-    if method.vararg:
-        output(', ...')
-    output(');')
-    newline()
-
-def output_class_destructor(cls, method):
-    return # TODO: implement? not sure
-
-def output_class_method(cls, method):
-    method_name = get_method_name(method)
-
-    # these are handled elsewhere
-    assert not method.constructor and not method.destructor
-
-    # TODO: not sure what to do about rvalue references at this point...
-    # they may be added in a future version of D
-    if has_rvalue_ref_param(method):
-        return
-
-    # skip overloaded operators for now
-    if method.operator:
-        # TODO: not sure if this is kosher... anyway, not sure what
-        # the equivalent of "= default" in D is...
-        if method.default:
-            return
-
-        # TODO: not sure what D equivalent of "= delete" is
-        if method.deleted:
-            return
-
-        if method_name == 'operator=':
-            # TODO: need to handle issues like this:
-            #
-            #  opennurbs.d(3410): Error: class `opennurbs.ON_ClassArray!(ON_UserString).ON_ClassArray`
-            #                     identity assignment operator overload is illegal
-            #    final ref ON_ClassArray!(T) opAssign(ref const(ON_ClassArray!(T)));
-            #                                ^
-            #
-            # method_name = 'opAssign'
-            return
-        elif method_name == 'operator==':
-            method_name = 'opEquals'
-        elif method_name == 'operator!=':
-            return # see e.g. https://dlang.org/spec/operatoroverloading.html#equals
-        elif method_name in {'operator<', 'operator<=', 'operator>', 'operator>='}:
-            return # TODO: see e.g. https://dlang.org/spec/operatoroverloading.html#compare
-        elif method_name == 'operator[]':
-            method_name = 'opIndex'
-        elif method_name == 'operator':
-            return # TODO: this is cast. See: https://dlang.org/spec/operatoroverloading.html#cast
-        elif method_name in {'operator+=', 'operator-=', 'operator*=', 'operator/=',
-                             'operator|=', 'operator&='}:
-            op = method_name[8]
-            method_name = f'opIndexOpAssign(string op : "{op}")'
-        elif method_name in {'operator+', 'operator-', 'operator*', 'operator/',
-                             'operator<<'}:
-            op = method_name[8]
-            method_name = f'opBinary(string op : "{op}")'
-        elif method_name in {'operator++', 'operator--'}:
-            # TODO: not sure about these:
-            #   https://dlang.org/spec/operatoroverloading.html#postincrement_postdecrement_operators
-            return 
-        else:
-            import ipdb; ipdb.set_trace()
-            pass
-
-    # only wrap public API
-    if method.access == 'private' or method.access == 'protected':
-        return
-
-    # unhandled stuff:
-    assert not method.extern
-    assert not method.has_trailing_return
-    assert not method.default
-    assert not method.final
-    assert method.ref_qualifier is None
-    assert method.template is None
-    assert not method.constexpr
-    assert not method.deleted
-    assert not method.explicit
-    assert method.msvc_convention is None
-    assert method.throw is None
-    assert not method.volatile
-
-    has_matching_base_method = any_base_class_methods(cls, method_name)
-    is_nonvirtual_override = not method.pure_virtual \
-        and not method.virtual and not method.override and has_matching_base_method
-
-    if is_nonvirtual_override:
-        assert method_name not in {'this', '~this'}
-        method_name_cxx = method_name
-        method_name = f'{method_name}__{get_class_name(cls)}'
-
-        output_indent()
-        output(f'pragma(mangle, fixMangle!({method_name}, "{method_name_cxx}"))')
-        newline()
-
-    output_indent()
-    if method.pure_virtual:
-        output('abstract ')
-    elif method.override and not is_nonvirtual_override:
-        output('override ')
-    elif method.static:
-        output('static ')
-    elif method.virtual:
-        # NOTE: if there are any virtual member functions, this will
-        # be inside a D class, in which case the functions are virtual
-        # by default? idk
-        pass
-    else:
-        output('final ')
-    output_type(method.return_type)
-    output(f' {method_name}(')
-    if method.parameters:
-        output_param(method.parameters[0])
-        for i in range(1, len(method.parameters)):
-            output(', ')
-            output_param(method.parameters[i])
-    if method.vararg:
-        output(', ...')
-    output(')')
-    if method.const:
-        output(' const')
-    if method.noexcept:
-        output(' nothrow')
-    output(';')
-    newline()
-
-    if is_nonvirtual_override:
-        output_indent()
-        output(f'alias {method_name_cxx} = {method_name};')
-        newline()
+def get_referenced_type(type_):
+    if type(type_) is Reference:
+        return type_.ref_to
+    if type(type_) is MoveReference:
+        return type_.moveref_to
+    return None
+
+def get_own_class_reference(cls, method):
+    # Reference or MoveReference, if the method's only parameter is a
+    # reference to its own class (as for copy and move constructors and
+    # assignment operators)
+    if len(method.parameters) != 1:
+        return None
+    type_ = method.parameters[0].type
+    referenced_type = get_referenced_type(type_)
+    if type(referenced_type) is not Type:
+        return None
+    segment = referenced_type.typename.segments[-1]
+    if type(segment) is not NameSpecifier or \
+       segment.name != get_class_name(cls):
+        return None
+    return type(type_)
 
 def is_virtual_method(method):
     return method.virtual or method.pure_virtual
@@ -526,179 +396,3018 @@ def is_virtual_class(cls):
     return len(cls.class_decl.bases) >= 1 \
         and any(is_virtual_or_overridden_method(_) for _ in cls.methods)
 
-def output_class_methods(cls):
-    for method in cls.methods:
-        if method.constructor:
-            output_class_constructor(cls, method)
-        elif method.destructor:
-            output_class_destructor(cls, method)
-        else:
-            output_class_method(cls, method)
-
 def get_class_name(_):
     if isinstance(_, BaseClass):
         return _.typename.segments[0].name
     elif isinstance(_, ClassScope):
+        if is_anonymous(_):
+            unsupported('anonymous class') # e.g. typedef struct {...} T;
         return _.class_decl.typename.segments[0].name
     else:
-        import ipdb; ipdb.set_trace()
+        unsupported(f'get_class_name of a {type(_).__name__}')
+
+node_field_names = dict()
+
+def get_node_key(node):
+    # the parse tree's dataclasses compare by value but aren't
+    # hashable, so build a hashable stand-in with the same structure
+    if isinstance(node, list):
+        return tuple(get_node_key(_) for _ in node)
+    cls = type(node)
+    names = node_field_names.get(cls)
+    if names is None:
+        names = tuple(_.name for _ in dataclasses.fields(cls)) \
+            if dataclasses.is_dataclass(cls) else ()
+        node_field_names[cls] = names
+    if not names:
+        return node
+    return (cls,) + tuple(get_node_key(getattr(node, _)) for _ in names)
+
+def get_segment_key(segment):
+    cls = type(segment)
+    if cls is NameSpecifier:
+        if segment.specialization is None:
+            return segment.name
+        return (segment.name,
+                tuple(get_template_argument_key(_)
+                      for _ in segment.specialization.args))
+    elif cls is FundamentalSpecifier:
+        return (cls, segment.name)
+    else:
+        return get_node_key(segment)
+
+def get_template_argument_key(arg):
+    if type(arg.arg) is Value:
+        return (arg.param_pack, tuple(_.value for _ in arg.arg.tokens))
+    return (arg.param_pack, get_type_key(arg.arg))
+
+def get_type_key(type_):
+    # same idea as get_node_key, but only looking at what render_type
+    # does, and quicker about it, since it's called for every type we
+    # emit
+    cls = type(type_)
+    if cls is Type:
+        typename = type_.typename
+        return (type_.const, typename.classkey,
+                tuple(get_segment_key(_) for _ in typename.segments))
+    elif cls is Pointer and type(type_.ptr_to) is not FunctionType:
+        return (cls, get_type_key(type_.ptr_to))
+    elif cls is Reference:
+        return (cls, get_type_key(type_.ref_to))
+    else:
+        return get_node_key(type_)
+
+################################################################################
+# template arguments
+#
+# If a template argument is even moderately complicated, cxxheaderparser
+# appears to give up and just return some tokens. In which case, it
+# makes sense to just parse it again, grab the type off the result, and
+# output *that*. Parsing is expensive, though, so we find all of these
+# ahead of time and parse them together as one big list of variable
+# declarations.
+
+def get_template_argument_string(arg):
+    return ' '.join([_.value for _ in arg.arg.tokens])
+
+def parse_template_argument(type_str):
+    var_str = type_str + ' tmp;' # wee!
+    parsed = parse_string(var_str, options=parser_options)
+    return parsed.namespace.variables[0].type
+
+def parse_template_arguments(type_strs):
+    if not type_strs:
+        return dict()
+    var_str = ''.join(f'{type_str} tmp{i};\n'
+                      for i, type_str in enumerate(type_strs))
+    try:
+        parsed = parse_string(var_str, options=parser_options)
+        variables = parsed.namespace.variables
+        assert len(variables) == len(type_strs)
+        return {type_str: variable.type
+                for type_str, variable in zip(type_strs, variables)}
+    except Exception:
         pass
+    # something in the batch didn't parse... fall back to parsing them
+    # one at a time, leaving out the bad ones so that they get
+    # reported when they're actually emitted
+    types = dict()
+    for type_str in type_strs:
+        try:
+            types[type_str] = parse_template_argument(type_str)
+        except Exception:
+            pass
+    return types
+
+def collect_typename_template_arguments(typename, type_strs):
+    for segment in typename.segments:
+        specialization = getattr(segment, 'specialization', None)
+        if specialization is None:
+            continue
+        for arg in specialization.args:
+            if type(arg.arg) is Value:
+                type_strs[get_template_argument_string(arg)] = None
+            else:
+                collect_type_template_arguments(arg.arg, type_strs)
+
+def collect_type_template_arguments(type_, type_strs):
+    while type_ is not None:
+        cls = type(type_)
+        if cls is Type:
+            collect_typename_template_arguments(type_.typename, type_strs)
+            return
+        elif cls is Pointer:
+            type_ = type_.ptr_to
+        elif cls is Reference:
+            type_ = type_.ref_to
+        elif cls is MoveReference:
+            type_ = type_.moveref_to
+        elif cls is Array:
+            type_ = type_.array_of
+        elif cls is FunctionType:
+            for param in type_.parameters:
+                collect_type_template_arguments(param.type, type_strs)
+            type_ = type_.return_type
+        else:
+            return
 
-def should_be_class(cls):
-    class_name = get_class_name(cls)
-    if class_name not in class_metadata:
+def collect_class_template_arguments(cls, type_strs):
+    for base in cls.class_decl.bases:
+        collect_typename_template_arguments(base.typename, type_strs)
+    for field in cls.fields:
+        collect_type_template_arguments(field.type, type_strs)
+    for method in cls.methods:
+        collect_type_template_arguments(method.return_type, type_strs)
+        for param in method.parameters:
+            collect_type_template_arguments(param.type, type_strs)
+    for cls_ in cls.classes:
+        collect_class_template_arguments(cls_, type_strs)
+
+def collect_template_argument_strings(namespaces):
+    # only look at the types we actually emit, rather than walking the
+    # whole parse tree
+    type_strs = dict()
+    for namespace in namespaces:
+        for using in namespace.using_alias:
+            collect_type_template_arguments(using.type, type_strs)
+        for typedef in namespace.typedefs:
+            collect_type_template_arguments(typedef.type, type_strs)
+        for cls in namespace.classes:
+            collect_class_template_arguments(cls, type_strs)
+    return list(type_strs)
+
+################################################################################
+# native method bodies
+#
+# Inline methods whose bodies just read or write fields, or do a bit of
+# arithmetic on them, get the same body in D instead of being declared
+# extern, so the D compiler can inline them (and there's no need for a
+# C++ symbol that an inline-only definition might never have had).
+# Anything fancier than that (calls, casts, locals, control flow) is
+# left extern.
+
+native_body_operators = {
+    '+', '-', '*', '/', '%', '(', ')', '[', ']', '<', '>', '<=', '>=',
+    '==', '!=', '&&', '||', '!', '?', ':', '&', '|', '^', '~', '<<', '>>',
+}
+
+native_body_unary_operators = {'+', '-', '!', '~', '*', '&'}
+
+# D won't parse a comparison next to another comparison or a bitwise
+# operator without parentheses (e.g. a & m == m), which C++ takes as is
+native_body_comparison_operators = {'<', '>', '<=', '>=', '==', '!='}
+native_body_bitwise_operators = {'&', '|', '^'}
+
+native_body_assign_operators = {'=', '+=', '-=', '*=', '/='}
+
+# typedefs from the C and C++ standard libraries (which never make it
+# into the input) that come out as D integer types
+integer_type_names = {
+    'int8_t', 'int16_t', 'int32_t', 'int64_t', 'uint8_t', 'uint16_t',
+    'uint32_t', 'uint64_t', 'size_t', 'ptrdiff_t', 'intptr_t', 'uintptr_t',
+}
+
+number_re = re.compile(r'(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?[fF]?'
+                       r'|0[xX][0-9a-fA-F]+[uU]?|\d+[uU]?')
+# (D has no octal literals)
+octal_re = re.compile(r'0\d+[uU]?')
+
+def is_operand_end(tok):
+    return tok is not None and (tok in {')', ']'} or
+                                tok not in native_body_operators)
+
+def translate_expression(tokens, names):
+    # D for a C++ expression that only reads the given names (a dict
+    # mapping C++ names to D names) and their members, or None
+    if not tokens:
+        return None
+    parts = []
+    prev = None
+    unary = False
+    # the number of comparisons and bitwise operators between && and ||
+    # (and ?, :) at each level of parentheses
+    counts = [[0, 0]]
+    for i, tok in enumerate(tokens):
+        next_ = tokens[i + 1] if i + 1 < len(tokens) else None
+        if next_ == '(' and identifier_re.fullmatch(tok):
+            return None # a call
+        if tok in {'(', '['}:
+            counts.append([0, 0])
+        elif tok in {')', ']'}:
+            if len(counts) == 1:
+                return None
+            counts.pop()
+        elif tok in {'&&', '||', '?', ':'}:
+            counts[-1] = [0, 0]
+        elif tok in native_body_comparison_operators:
+            counts[-1][0] += 1
+        elif tok in native_body_bitwise_operators and is_operand_end(prev):
+            counts[-1][1] += 1
+        if counts[-1][0] > 1 or counts[-1][0] and counts[-1][1]:
+            return None
+        if tok in {'.', '->'}:
+            if next_ is None or not identifier_re.fullmatch(next_):
+                return None
+            d_tok = '.'
+        elif prev in {'.', '->'}:
+            d_tok = tok
+        elif tok == 'this':
+            if next_ != '->':
+                return None
+            d_tok = 'this'
+        elif tok in names:
+            d_tok = names[tok]
+        elif tok in {'true', 'false'}:
+            d_tok = tok
+        elif tok == 'nullptr':
+            d_tok = 'null'
+        elif number_re.fullmatch(tok) and not octal_re.fullmatch(tok):
+            d_tok = tok
+        elif tok in native_body_operators:
+            d_tok = tok
+        else:
+            return None
+        if prev is not None and not unary and \
+           tok not in {'.', '->', '[', ']', ')'} and \
+           prev not in {'.', '->', '(', '['}:
+            parts.append(' ')
+        elif unary and {prev, tok} <= {'+', '-'}:
+            parts.append(' ') # - -x, not --x
+        parts.append(d_tok)
+        unary = tok in native_body_unary_operators and not is_operand_end(prev)
+        prev = tok
+    if len(counts) != 1:
+        return None
+    return ''.join(parts)
+
+def merge_operators(tokens):
+    # the lexer splits up most two-character operators (e.g. "<=" comes
+    # back as "<", "="), so put them back together
+    merged = []
+    for tok in tokens:
+        if merged and merged[-1] + tok in native_body_operators | \
+           native_body_assign_operators:
+            merged[-1] += tok
+        else:
+            merged.append(tok)
+    return merged
+
+def split_statements(tokens):
+    if tokens[-1] != ';':
+        return None
+    statements = [[]]
+    for tok in tokens[:-1]:
+        if tok == ';':
+            statements.append([])
+        else:
+            statements[-1].append(tok)
+    return statements
+
+def replace_null_pointers(tokens):
+    # a bare 0 where a pointer gets returned, e.g. in
+    # "return (m_count > 0) ? m_a : 0;"
+    replaced = list(tokens)
+    for i, tok in enumerate(tokens):
+        if tok == '0' and tokens[i - 1] in {'return', '?', ':'} and \
+           (i + 1 == len(tokens) or tokens[i + 1] in {':', ')'}):
+            replaced[i] = 'nullptr'
+    return replaced
+
+def translate_body(body, fields, params, return_cast=None,
+                   returns_pointer=False, get_assign_cast=None):
+    # a list of D statements, or None if any of it is too complicated;
+    # return_cast is None for void methods, and get_assign_cast gives
+    # the cast an assignment needs (like return_cast, or None if it
+    # can't tell) from the tokens of its two sides
+    names = {_: _ for _ in fields}
+    names.update((_, remap_param_name(_)) for _ in params)
+    if not body:
+        return [] if return_cast is None else None
+    if '{' in body:
+        return None
+    statements = split_statements(merge_operators(body))
+    if statements is None:
+        return None
+    if return_cast is not None:
+        if len(statements) != 1 or statements[0][:1] != ['return']:
+            return None
+        statement = statements[0]
+        if returns_pointer:
+            statement = replace_null_pointers(statement)
+        expr = translate_expression(statement[1:], names)
+        if expr is None:
+            return None
+        if return_cast:
+            expr = f'{return_cast}({expr})'
+        return [f'return {expr};']
+    d_statements = []
+    for statement in statements:
+        ops = [i for i, _ in enumerate(statement)
+               if _ in native_body_assign_operators]
+        # only assignments to fields
+        if len(ops) != 1 or statement[0] not in fields | {'this'}:
+            return None
+        i = ops[0]
+        lhs = translate_expression(statement[:i], names)
+        rhs = translate_expression(statement[i + 1:], names)
+        if lhs is None or rhs is None:
+            return None
+        # (D narrows implicitly for +=, -= and so on, but not for =)
+        if statement[i] == '=' and get_assign_cast is not None:
+            cast = get_assign_cast(statement[:i], statement[i + 1:])
+            if cast is None:
+                return None
+            if cast:
+                rhs = f'{cast}({rhs})'
+        d_statements.append(f'{lhs} {statement[i]} {rhs};')
+    return d_statements
+
+def is_void_type(type_):
+    if type(type_) is not Type:
         return False
-    metadata = class_metadata[class_name]
-    return is_virtual_class(cls) or \
-        cls.class_decl.bases or \
-        metadata.has_children
+    segment = type_.typename.segments[-1]
+    return type(segment) is FundamentalSpecifier and segment.name == 'void'
+
+def get_used_names(tokens, names):
+    # which of names come up (other than as members of something else)
+    return {tok for i, tok in enumerate(tokens)
+            if tok in names and (i == 0 or tokens[i - 1] not in {'.', '->'})}
+
+def get_stepped_names(tokens, names):
+    # which of names get indexed or have pointer arithmetic done on them
+    stepped = set()
+    for i, tok in enumerate(tokens):
+        if tok not in names or i > 0 and tokens[i - 1] in {'.', '->'}:
+            continue
+        prev = tokens[i - 1] if i > 0 else None
+        next_ = tokens[i + 1] if i + 1 < len(tokens) else None
+        if next_ in {'[', '+', '-', '+=', '-=', '++', '--'} or \
+           prev in {'+', '-', '++', '--'}:
+            stepped.add(tok)
+    return stepped
+
+def get_pointee_name(type_):
+    # e.g. T for a T * (or a const T *)
+    if type(type_) is not Pointer or type(type_.ptr_to) is not Type:
+        return None
+    segments = type_.ptr_to.typename.segments
+    if len(segments) != 1 or type(segments[0]) is not NameSpecifier or \
+       segments[0].specialization is not None:
+        return None
+    return segments[0].name
 
-def output_class(cls):
-    name = get_class_name(cls)
+def get_value_type_name(type_):
+    # e.g. ON_SimpleArray for an ON_SimpleArray<int> (but not for a
+    # pointer or reference to one)
+    if type(type_) is not Type:
+        return None
+    segment = type_.typename.segments[-1]
+    if type(segment) is not NameSpecifier:
+        return None
+    return segment.name
 
-    has_metadata = name in class_metadata
-    if has_metadata:
-        metadata = class_metadata[name]
+def get_template_param_names(cls):
+    template = cls.class_decl.template
+    if template is None:
+        return set()
+    return {_.name for _ in template.params if type(_) is TemplateTypeParam}
 
-    decl = cls.class_decl
-    assert not decl.explicit
+def get_field_names(cls):
+    names = set()
+    for field in cls.fields:
+        if field.name:
+            names.add(field.name)
+    for cls_ in cls.classes:
+        if is_anonymous_union(cls_):
+            names.update(_.name for _ in cls_.fields if _.name)
+    return names
+
+def get_method_body_key(class_name, method_name, method):
+    return (class_name, method_name, method.const,
+            tuple(get_type_key(_.type) for _ in method.parameters))
+
+def is_mutable_indirection(type_):
+    # e.g. T * or T & (rather than const T *)
+    if type(type_) is Pointer:
+        return not type_.ptr_to.const
+    if type(type_) is Reference:
+        return not type_.ref_to.const
+    return False
+
+################################################################################
+# nothrow inference
+#
+# OpenNURBS doesn't use exceptions: failures come back as return values
+# (false, nullptr, ON_UNSET_VALUE, ...) and get reported through
+# ON_ERROR and ON_WARNING, which log and carry on. Anything that
+# allocates with new can still throw std::bad_alloc, though, and so
+# can whatever it calls that isn't OpenNURBS's. So with
+# --infer-nothrow, methods come out nothrow (besides the noexcept ones)
+# only where a rule allows it. Rules are "allow PATTERN" or "deny
+# PATTERN", matched against Class::method with the C++ names (e.g.
+# ON_Brep::ON_Brep for a constructor, ON_3dPoint::operator+), and the
+# last one that matches wins. "allow const PATTERN" only matches const
+# methods, and "allow accessor PATTERN" only accessors (see
+# Translator.is_accessor), and the same goes for deny. Methods that
+# take callbacks or std:: types are never inferred nothrow, since
+# those can throw whatever OpenNURBS itself does.
+#
+# An override of a nothrow method is nothrow as well, whatever the
+# rules say, since D won't let it throw (see get_method_signature).
+
+default_nothrow_rules = '''\
+deny *
+allow accessor *
+# queries that look at what's already there and return a flag, a
+# count or a number
+allow const *::Is*
+allow const *::Has*
+allow const *::*Count
+allow const *::Capacity
+allow const *::Dimension
+allow const *::Degree
+allow const *::SizeOf*
+allow const *::operator[]
+allow const *::operator==
+allow const *::operator!=
+allow const *::operator<
+allow const *::operator<=
+allow const *::operator>
+allow const *::operator>=
+# fixed size math types, which don't allocate
+allow ON_Interval::*
+allow ON_[23][df]Point::*
+allow ON_[23][df]Vector::*
+allow ON_BoundingBox::*
+# these construct and assign their elements with the elements' own
+# code, which needn't follow OpenNURBS conventions
+deny ON_ClassArray::*
+deny ON_ObjectArray::*
+'''
+
+nothrow_rule_kinds = {'const', 'accessor'}
+
+class NothrowRules:
+    def __init__(self, text=default_nothrow_rules):
+        self.rules = []
+        self.add_rules(text)
+
+    def add_rules(self, text, filename='<default>'):
+        for lineno, line in enumerate(text.splitlines(), 1):
+            words = line.split('#', 1)[0].split()
+            if not words:
+                continue
+            kind = words[1] if len(words) == 3 else None
+            if len(words) not in {2, 3} or words[0] not in {'allow', 'deny'} \
+               or len(words) == 3 and kind not in nothrow_rule_kinds:
+                raise ValueError(f'{filename}:{lineno}: expected "allow '
+                                 f'[const|accessor] PATTERN" or "deny '
+                                 f'[const|accessor] PATTERN"')
+            self.rules.append((words[0] == 'allow', kind, words[-1]))
+
+    def is_allowed(self, name, const=False, is_accessor=lambda: False):
+        # (is_accessor only gets called if a rule needs to know)
+        allowed = False
+        accessor = None
+        for allow, kind, pattern in self.rules:
+            if kind == 'const' and not const or \
+               not fnmatchcase(name, pattern):
+                continue
+            if kind == 'accessor':
+                if accessor is None:
+                    accessor = is_accessor()
+                if not accessor:
+                    continue
+            allowed = allow
+        return allowed
+
+    def get_key(self):
+        return ' '.join(f'{"+" if allow else "-"}{kind or ""}:{pattern}'
+                        for allow, kind, pattern in self.rules)
+
+def is_foreign_type(type_):
+    # whether values of a type can run code that isn't OpenNURBS's, i.e.
+    # std:: types and callbacks (function pointers)
+    if type(type_) is Pointer:
+        return is_foreign_type(type_.ptr_to)
+    if type(type_) in {Reference, MoveReference}:
+        return is_foreign_type(get_referenced_type(type_))
+    if type(type_) is Array:
+        return is_foreign_type(type_.array_of)
+    if type(type_) is FunctionType:
+        return True
+    if type(type_) is not Type:
+        return False
+    segments = type_.typename.segments
+    if type(segments[0]) is NameSpecifier and segments[0].name == 'std':
+        return True
+    for segment in segments:
+        specialization = getattr(segment, 'specialization', None)
+        if specialization is None:
+            continue
+        for arg in specialization.args:
+            if type(arg.arg) is Value:
+                if any(_.value == 'std' for _ in arg.arg.tokens):
+                    return True
+            elif is_foreign_type(arg.arg):
+                return True
+    return False
+
+def may_throw_regardless(method):
+    return is_foreign_type(method.return_type) or \
+        any(is_foreign_type(_.type) for _ in method.parameters)
+
+class Translator:
+    def __init__(self, emitter=None):
+        self.emitter = Emitter() if emitter is None else emitter
+        self.class_metadata = dict()
+        self.class_table = []
+        # the type each typedef and using alias names, and None for
+        # other type names (enums and nested classes), see add_type_names
+        self.type_names = dict()
+        self.type_cache = dict()
+        self.type_cache_hits = 0
+        self.type_cache_misses = 0
+        self.template_argument_types = OrderedDict()
+        self.template_argument_cache_size = 1 << 14
+        self.native_bodies = True
+        self.nogc = False
+        self.nothrow_rules = None # a NothrowRules, with --infer-nothrow
+        self.batch = False # see try_output
+        self.method_bodies = dict()
+        self.diagnostics = Diagnostics()
+        self.profiler = None
+
+    def translate(self, parsed):
+        return self.capture(self.output_parsed, parsed)
+
+    def output_parsed(self, parsed):
+        self.clear_class_metadata()
+        # (type names and method bodies first, for is_accessor)
+        self.add_type_names(parsed.namespace)
+        self.build_method_bodies(parsed.namespace.method_impls)
+        self.build_class_metadata(parsed.namespace.classes)
+        self.remove_skipped_classes(parsed.namespace)
+        self.prepare_template_arguments([parsed.namespace])
+        self.newline()
+        self.output_namespace(parsed.namespace)
+
+    def should_class_be_interface(self, metadata):
+        if metadata.is_interface is not None:
+            return metadata.is_interface
+        base_metadata = self.get_base_metadata(metadata)
+        has_base = base_metadata is not None
+        metadata.is_interface = not metadata.has_fields \
+            and metadata.all_virtual \
+            and (not has_base or self.should_class_be_interface(base_metadata))
+        return metadata.is_interface
+
+    def get_inherited_method_names(self, metadata, attr='method_names'):
+        # the methods of a class and all of its ancestors, worked out
+        # once per class. A class that adds no names of its own shares
+        # its base's set, which most of them do for
+        # nothrow_method_signatures
+        inherited_attr = inherited_attrs[attr]
+        method_names = getattr(metadata, inherited_attr)
+        if method_names is not None:
+            return method_names
+        method_names = getattr(metadata, attr)
+        base_metadata = self.get_base_metadata(metadata)
+        if base_metadata is not None:
+            base_method_names = self.get_inherited_method_names(base_metadata,
+                                                                attr)
+            if method_names <= base_method_names:
+                method_names = base_method_names
+            elif base_method_names:
+                method_names = method_names | base_method_names
+        setattr(metadata, inherited_attr, method_names)
+        return method_names
+
+    def get_options(self):
+        # the settings that change what gets emitted, for workers and
+        # cache keys
+        return {'native_bodies': self.native_bodies, 'nogc': self.nogc,
+                'nothrow_rules': self.nothrow_rules, 'batch': self.batch}
+
+    def set_options(self, options):
+        for name, value in options.items():
+            setattr(self, name, value)
+
+    def get_options_key(self):
+        options = self.get_options()
+        rules = options.pop('nothrow_rules')
+        return make_key(repr(sorted(options.items())),
+                        '' if rules is None else rules.get_key())
+
+    def output(self, s):
+        self.emitter.output(s)
+
+    def newline(self):
+        self.emitter.newline()
+
+    def indent(self):
+        self.emitter.indent()
+
+    def dedent(self):
+        self.emitter.dedent()
+
+    def output_indent(self):
+        self.emitter.output_indent()
+
+    # def reset_access():
+    #     global current_access
+    #     current_access = None
+
+    # def output_and_update_access(access):
+    #     global current_access
+    #     if current_access != access:
+    #         self.dedent()
+    #         print(f'{access}:')
+    #         self.indent()
+    #         current_access = access
+
+    def output_param(self, param):
+        self.output_type(param.type, reset_arrays_to_ptrs=True)
+        if param.name:
+            self.output(f' {remap_param_name(param.name)}')
+
+    def output_template_argument(self, arg):
+        assert not arg.param_pack
+        if isinstance(arg.arg, Type) or isinstance(arg.arg, Pointer):
+            self.output_type(arg.arg)
+        elif isinstance(arg.arg, Value):
+            try:
+                # If a template argument is even moderately complicated,
+                # this library appears to give up and just return some
+                # tokens. In which case, it makes sense to just parse it
+                # again, grab the type off the result, and output *that*.
+                type_str = get_template_argument_string(arg)
+                type_ = self.get_template_argument_type(type_str)
+            except Exception:
+                unsupported('unparseable template argument')
+                return
+            self.output_type(type_)
+        else:
+            unsupported(f'template argument of kind {type(arg.arg).__name__}')
+
+    def get_template_argument_type(self, type_str):
+        types = self.template_argument_types
+        if type_str in types:
+            types.move_to_end(type_str)
+            return types[type_str]
+        type_ = parse_template_argument(type_str)
+        self.add_template_argument_type(type_str, type_)
+        return type_
+
+    def add_template_argument_type(self, type_str, type_):
+        # (evicting the least recently used once the cache is full)
+        types = self.template_argument_types
+        types[type_str] = type_
+        types.move_to_end(type_str)
+        while len(types) > self.template_argument_cache_size:
+            types.popitem(last=False)
+
+    def prepare_template_arguments(self, namespaces):
+        # parse all of the template arguments we're going to need up
+        # front, in one go, instead of one at a time as they come up
+        type_strs = [_ for _ in collect_template_argument_strings(namespaces)
+                     if _ not in self.template_argument_types]
+        for type_str, type_ in parse_template_arguments(type_strs).items():
+            self.add_template_argument_type(type_str, type_)
+
+    def output_template_arguments(self, args):
+        assert len(args) > 0
+        for arg in args[:-1]:
+            self.output_template_argument(arg)
+            self.output(', ')
+        self.output_template_argument(args[-1])
+
+    def output_segment(self, segment):
+        if isinstance(segment, NameSpecifier):
+            name = remap_segment_name(segment.name)
+            self.output(name)
+            if segment.specialization is not None:
+                self.output('!(')
+                self.output_template_arguments(segment.specialization.args)
+                self.output(')')
+        elif isinstance(segment, FundamentalSpecifier):
+            name = remap_segment_name(segment.name)
+            self.output(name)
+        elif isinstance(segment, AnonymousName):
+            unsupported('anonymous type in a name')
+        else:
+            unsupported(f'name segment of kind {type(segment).__name__}')
+
+    def output_segments(self, segments):
+        assert len(segments) > 0
+        for segment in segments[:-1]:
+            self.output_segment(segment)
+            self.output('.')
+        self.output_segment(segments[-1])
+
+    def output_typename(self, typename):
+        self.output_segments(typename.segments)
+
+    def output_type(self, type_, reset_arrays_to_ptrs=False, reset_refs_to_ptrs=False):
+        # the same handful of types show up over and over again, so
+        # only render each distinct one once
+        key = (get_type_key(type_), reset_arrays_to_ptrs, reset_refs_to_ptrs)
+        s = self.type_cache.get(key)
+        if s is None:
+            self.type_cache_misses += 1
+            s = self.capture(self.render_type, type_, reset_arrays_to_ptrs,
+                             reset_refs_to_ptrs)
+            self.type_cache[key] = s
+        else:
+            self.type_cache_hits += 1
+        self.output(s)
+
+    def render_type(self, type_, reset_arrays_to_ptrs=False, reset_refs_to_ptrs=False):
+        if isinstance(type_, Array):
+            self.render_type(type_.array_of)
+            if reset_arrays_to_ptrs:
+                self.output('*')
+            else:
+                self.output('[')
+                self.output_tokens(type_.size.tokens)
+                self.output(']')
+        elif isinstance(type_, Pointer) and isinstance(type_.ptr_to, FunctionType):
+            type_ = type_.ptr_to
+            self.render_type(type_.return_type)
+            self.output(' function(')
+            if type_.parameters:
+                self.output_param(type_.parameters[0])
+                for i in range(1, len(type_.parameters)):
+                    self.output(', ')
+                    self.output_param(type_.parameters[i])
+            self.output(')')
+        elif isinstance(type_, Pointer):
+            self.render_type(type_.ptr_to)
+            self.output('*')
+        elif isinstance(type_, Reference):
+            if not reset_refs_to_ptrs:
+                self.output('ref ')
+            self.render_type(type_.ref_to)
+            if reset_refs_to_ptrs:
+                self.output('*')
+        elif isinstance(type_, Type):
+            # NOTE: no volatile in D
+            # assert not type_.volatile
+            typename = type_.typename
+            classkey = typename.classkey
+            if classkey is not None and classkey not in {'class', 'struct', 'union', 'enum class'}:
+                unsupported(f'{classkey} type specifier')
+            if type_.const:
+                self.output('const(')
+            self.output_typename(typename)
+            if type_.const:
+                self.output(')')
+        else:
+            unsupported(f'type of kind {type(type_).__name__}')
+
+    def output_tokens(self, tokens):
+        for token in tokens:
+            assert isinstance(token.value, str)
+            s = token.value
+            if s == '::':
+                s = '.'
+            self.output(s)
+
+    def output_union(self, union):
+        self.output('union')
+        if not is_anonymous(union):
+            unsupported('named union as a field')
+        self.output(' {')
+        self.newline()
+        self.indent()
+        for field in union.fields:
+            self.output_indent()
+            self.output_type(field.type, reset_refs_to_ptrs=True)
+            self.output(f' {field.name};')
+            self.newline()
+        self.dedent()
+        self.output_indent()
+        self.output('}')
+
+    def output_enum(self, _):
+        assert is_enum(_)
+        assert len(_.values) > 0
+        self.output_indent()
+        self.output(f'enum')
+        if not is_anonymous_enum(_):
+            self.output(f' ')
+            self.output_typename(_.typename)
+        if _.base:
+            self.output(' : ')
+            self.output_typename(_.base)
+        self.output(' {')
+        self.newline()
+        self.indent()
+        for i, value in enumerate(_.values):
+            self.output_indent()
+            self.output(f'{value.name}')
+            if value.value:
+                self.output(' = ')
+                self.output_tokens(value.value.tokens)
+            self.output(',' if i + 1 < len(_.values) else '')
+            self.newline()
+        self.dedent()
+        self.output_indent()
+        self.output('}')
+        self.newline()
+
+    def output_template_parameter(self, param):
+        assert not param.param_pack
+        assert param.default is None
+        assert param.template is None
+        if param.typekey == 'class':
+            self.output(param.name)
+        else:
+            assert False
+
+    def output_template_parameters(self, params):
+        assert len(params) > 0
+        self.output('(')
+        for param in params[:-1]:
+            self.output_template_parameter(param)
+            self.output(', ')
+        self.output_template_parameter(params[-1])
+        self.output(')')
+
+    def get_base_metadata(self, metadata):
+        if metadata.base_id is None:
+            return None
+        return self.class_table[metadata.base_id]
+
+    def find_base_class_metadata(self, cls):
+        bases = cls.class_decl.bases
+        num_bases = len(bases)
+        assert num_bases <= 1 # no multiple inheritance! (well, sort of)
+        if num_bases == 0:
+            return None
+        return self.class_metadata[get_class_name(bases[0])]
+
+    def any_base_class_methods(self, cls, method_name, attr='method_names'):
+        # look through the whole ancestor chain, not just the direct
+        # base class (finish_class_metadata merged it for every base)
+        base_metadata = self.find_base_class_metadata(cls)
+        return base_metadata is not None and \
+            method_name in getattr(base_metadata, inherited_attrs[attr])
+
+    def is_nothrow_method(self, cls, method):
+        if method.noexcept:
+            return True
+        if self.nothrow_rules is None or may_throw_regardless(method):
+            return False
+        return self.nothrow_rules.is_allowed(
+            f'{get_class_name(cls)}::{get_method_name(method)}', method.const,
+            lambda: self.is_accessor(cls, method))
+
+    def is_accessor(self, cls, method):
+        # whether a method is defined as just returning a field or
+        # parameter, or something worked out from those with built-in
+        # operators only, so that there's nothing for it to call. (Not
+        # if it's virtual, since an override could do anything.)
+        if method.return_type is None or method.virtual or \
+           method.override or method.pure_virtual:
+            return False
+        impl = self.find_method_body(cls, method)
+        if impl is None:
+            return False
+        statements = split_statements(merge_operators(impl.body))
+        if statements is None or len(statements) != 1 or \
+           statements[0][:1] != ['return']:
+            return False
+        expr = statements[0][1:]
+        types = {} if method.static else \
+            {_.name: _.type for _ in cls.fields if _.name}
+        types.update((_.name, _.type) for _ in impl.parameters if _.name)
+        if translate_expression(expr, {_: _ for _ in types}) is None:
+            return False
+        # handing out a reference to a member copies nothing
+        if len(expr) == 1 and type(method.return_type) is Reference:
+            return True
+        if not self.is_scalar_type(method.return_type):
+            return False
+        # anything else might have operators of its own, so all it can
+        # do is get at its members
+        for i, tok in enumerate(expr):
+            if tok not in types or self.is_scalar_type(types[tok]):
+                continue
+            prev = expr[i - 1] if i > 0 else None
+            if prev == '.' or prev == '->' and expr[i - 2:i] != ['this', '->']:
+                continue # (a member of something else)
+            if expr[i + 1:i + 2] != ['.']:
+                return False
+        return True
+
+    def is_scalar_type(self, type_):
+        # whether a type is a built-in one (or a pointer, or an array of
+        # them), whose operators can't be overloaded
+        type_ = self.resolve_type_aliases(type_)
+        if type(type_) is Pointer:
+            return True
+        if type(type_) is Array:
+            return self.is_scalar_type(type_.array_of)
+        if type(type_) is not Type:
+            return False
+        segment = type_.typename.segments[-1]
+        return type(segment) is FundamentalSpecifier or \
+            type(segment) is NameSpecifier and \
+            segment.name in integer_type_names
+
+    def output_function_attributes(self, nothrow):
+        if nothrow:
+            self.output(' nothrow')
+        if self.nogc:
+            # calls into C++ never touch the D GC
+            self.output(' @nogc')
+        
+    def output_class_constructor(self, cls, method):
+        # nothing to bind to
+        if method.deleted:
+            return
 
-    # TODO: No multiple inheritance unless pure virtual...
-    assert len(decl.bases) <= 1
+        # a defaulted constructor is generated inline wherever it's used,
+        # so there may be no symbol to bind to
+        if method.default:
+            return
 
-    if decl.classkey in {'class', 'struct'}:
-        output(f'extern(C++, {decl.classkey}) ')
+        # D has no rvalue references: move constructors get bound through
+        # Rvalue (see output_move_member), and anything else that takes
+        # one is skipped
+        if has_rvalue_ref_param(method):
+            if get_own_class_reference(cls, method) is MoveReference:
+                self.output_move_member(cls, method, 'moveConstruct__', 'C1')
+            return
 
-    if decl.final:
-        output('final ')
+        is_default_constructor = len(method.parameters) == 0
+        
+        # TODO: just don't emit these for now...
+        if is_default_constructor and not self.should_be_class(cls):
+            return
 
-    if has_metadata and metadata.is_interface:
-        output(f'interface {name}')
-    elif should_be_class(cls):
-        output(f'class {name}')
-    else:
-        output(f'struct {name}')
+        self.output_indent()
+        self.output('this(')
+        if method.parameters:
+            self.output_param(method.parameters[0])
+            for i in range(1, len(method.parameters)):
+                self.output(', ')
+                self.output_param(method.parameters[i])
+        if method.vararg:
+            self.output(', ...')
+        self.output(')')
+        self.output_function_attributes(self.is_nothrow_method(cls, method))
+        self.output(';')
+        self.newline()
+
+    def output_assignment(self, cls, method):
+        if method.access == 'private' or method.access == 'protected':
+            return
+        kind = self.get_class_kind(cls)
+        if kind == 'interface':
+            return
+        own_reference = get_own_class_reference(cls, method)
+        if own_reference is MoveReference:
+            self.output_move_member(cls, method, 'moveAssign__', 'aS')
+            return
+        if has_rvalue_ref_param(method):
+            return
 
-    if decl.template:
-        output_template_parameters(decl.template.params)
+        if own_reference is Reference and kind == 'class':
+            # D doesn't allow identity assignment of classes (a = b just
+            # rebinds a), so copy assignment becomes a.assign(b), mangled
+            # as operator=. An extern(C++) class is passed by pointer,
+            # hence cppRefMangle
+            param = method.parameters[0]
+            self_type = dataclasses.replace(param.type.ref_to, const=False)
+            self.output_indent()
+            self.output('version (Posix) {')
+            self.newline()
+            self.indent()
+            self.output_indent()
+            self.output('pragma(mangle, cppRefMangle!(assign, "aS", \'R\'))')
+            self.newline()
+            self.output_indent()
+            self.output('final ')
+            self.output_type(self_type)
+            self.output(' assign(')
+            self.output_type(param.type.ref_to)
+            if param.name:
+                self.output(f' {remap_param_name(param.name)}')
+            self.output(')')
+            self.output_function_attributes(self.is_nothrow_method(cls, method))
+            self.output(';')
+            self.newline()
+            self.dedent()
+            self.output_indent()
+            self.output('}')
+            self.newline()
+            return
 
-    if decl.bases:
-        base = decl.bases[0]
-        assert not base.virtual # no virtual inheritance
-        output(f': ')
-        output_typename(base.typename)
+        # anything else is a plain opAssign, which D mangles as operator=
+        return_type = method.return_type
+        if kind == 'class' and type(return_type) is Reference:
+            return_type = return_type.ref_to # (already a reference in D)
+        self.output_indent()
+        self.output('final ')
+        self.output_type(return_type)
+        self.output(' opAssign(')
+        self.output_param(method.parameters[0])
+        self.output(')')
+        self.output_function_attributes(self.is_nothrow_method(cls, method))
+        self.output(';')
+        self.newline()
+
+    def output_move_member(self, cls, method, stand_in, cxx_name):
+        # T&& becomes Rvalue!T (see header.d), which is passed the same
+        # way. The mangling comes from a stand-in declaration that takes
+        # a T the way D passes it (by ref, or for a class, as is), with
+        # its name replaced by the C++ one (C1 for the constructor, aS
+        # for operator=)
+        kind = self.get_class_kind(cls)
+        if kind == 'interface':
+            return
+        self_type = self.capture(
+            self.output_type, get_referenced_type(method.parameters[0].type))
+        ref = 'ref ' if kind == 'struct' else ''
+        self.output_indent()
+        self.output('version (Posix) {')
+        self.newline()
+        self.indent()
+        self.output_indent()
+        self.output(f'private final void {stand_in}({ref}{self_type});')
+        self.newline()
+        self.output_indent()
+        self.output(f'pragma(mangle, cppRefMangle!({stand_in}, '
+                    f'"{cxx_name}", \'O\'))')
+        self.newline()
+        self.output_indent()
+        if method.constructor:
+            self.output(f'this(Rvalue!({self_type}))')
+        else:
+            self.output(f'final {ref}{self_type} opAssign(Rvalue!({self_type}))')
+        self.output_function_attributes(self.is_nothrow_method(cls, method))
+        self.output(';')
+        self.newline()
+        self.dedent()
+        self.output_indent()
+        self.output('}')
+        self.newline()
+
+    def output_class_destructor(self, cls, method):
+        return # TODO: implement? not sure
+
+    def output_class_method(self, cls, method):
+        method_name = get_method_name(method)
+
+        # these are handled elsewhere
+        assert not method.constructor and not method.destructor
+
+        # (move assignment is handled by output_assignment)
+        if has_rvalue_ref_param(method) and method_name != 'operator=':
+            return
 
-    output(' {')
-    newline()
+        # skip overloaded operators for now
+        if method.operator:
+            # TODO: not sure if this is kosher... anyway, not sure what
+            # the equivalent of "= default" in D is...
+            if method.default:
+                return
+
+            # TODO: not sure what D equivalent of "= delete" is
+            if method.deleted:
+                return
+
+            if method_name == 'operator=':
+                self.output_assignment(cls, method)
+                return
+            elif method_name == 'operator==':
+                method_name = 'opEquals'
+            elif method_name == 'operator!=':
+                return # see e.g. https://dlang.org/spec/operatoroverloading.html#equals
+            elif method_name in {'operator<', 'operator<=', 'operator>', 'operator>='}:
+                return # TODO: see e.g. https://dlang.org/spec/operatoroverloading.html#compare
+            elif method_name == 'operator[]':
+                method_name = 'opIndex'
+            elif method_name == 'operator':
+                return # TODO: this is cast. See: https://dlang.org/spec/operatoroverloading.html#cast
+            elif method_name in {'operator+=', 'operator-=', 'operator*=', 'operator/=',
+                                 'operator|=', 'operator&='}:
+                op = method_name[8]
+                method_name = f'opIndexOpAssign(string op : "{op}")'
+            elif method_name in {'operator+', 'operator-', 'operator*', 'operator/',
+                                 'operator<<'}:
+                op = method_name[8]
+                method_name = f'opBinary(string op : "{op}")'
+            elif method_name in {'operator++', 'operator--'}:
+                # TODO: not sure about these:
+                #   https://dlang.org/spec/operatoroverloading.html#postincrement_postdecrement_operators
+                return 
+            else:
+                unsupported(f'unknown operator {method_name}')
+                return
+
+        # only wrap public API
+        if method.access == 'private' or method.access == 'protected':
+            return
 
-    indent()
+        # unhandled stuff:
+        assert not method.extern
+        assert not method.has_trailing_return
+        assert not method.default
+        assert not method.final
+        assert method.ref_qualifier is None
+        assert method.template is None
+        assert not method.constexpr
+        assert not method.deleted
+        assert not method.explicit
+        assert method.msvc_convention is None
+        assert method.throw is None
+        assert not method.volatile
+
+        has_matching_base_method = self.any_base_class_methods(cls, method_name)
+        is_nonvirtual_override = not method.pure_virtual \
+            and not method.virtual and not method.override and has_matching_base_method
+
+        if is_nonvirtual_override:
+            assert method_name not in {'this', '~this'}
+            method_name_cxx = method_name
+            method_name = f'{method_name}__{get_class_name(cls)}'
+
+        def output_declaration(parameters, native_body):
+            if is_nonvirtual_override:
+                self.output_indent()
+                self.output(f'pragma(mangle, fixMangle!({method_name}, "{method_name_cxx}"))')
+                self.newline()
+
+            self.output_indent()
+            if method.pure_virtual:
+                self.output('abstract ')
+            elif method.override and not is_nonvirtual_override:
+                self.output('override ')
+            elif method.static:
+                self.output('static ')
+            elif method.virtual:
+                # NOTE: if there are any virtual member functions, this will
+                # be inside a D class, in which case the functions are virtual
+                # by default? idk
+                pass
+            else:
+                self.output('final ')
+            self.output_type(method.return_type)
+            self.output(f' {method_name}(')
+            if parameters:
+                self.output_param(parameters[0])
+                for i in range(1, len(parameters)):
+                    self.output(', ')
+                    self.output_param(parameters[i])
+            if method.vararg:
+                self.output(', ...')
+            self.output(')')
+            if method.const:
+                self.output(' const')
+            self.output_function_attributes(
+                self.is_nothrow_method(cls, method) or
+                # D won't let an override throw if what it overrides can't
+                is_virtual_or_overridden_method(method) and
+                self.any_base_class_methods(cls, get_method_signature(method),
+                                            'nothrow_method_signatures'))
+            if native_body is None:
+                self.output(';')
+            else:
+                if type(method.return_type) is Reference:
+                    self.output(' return')
+                self.output_native_body(native_body)
+            self.newline()
+
+        native_body = self.get_native_body(cls, method)
+        if native_body is None:
+            output_declaration(method.parameters, None)
+        else:
+            parameters, native_body, guard = native_body
+            if guard is None:
+                output_declaration(parameters, native_body)
+            else:
+                # the native body where it works, otherwise the C++ one
+                # (see get_native_body)
+                self.output_indent()
+                self.output(f'static if ({guard}) {{')
+                self.newline()
+                self.indent()
+                output_declaration(parameters, native_body)
+                self.dedent()
+                self.output_indent()
+                self.output('} else {')
+                self.newline()
+                self.indent()
+                output_declaration(method.parameters, None)
+                self.dedent()
+                self.output_indent()
+                self.output('}')
+                self.newline()
+
+        if is_nonvirtual_override:
+            self.output_indent()
+            self.output(f'alias {method_name_cxx} = {method_name};')
+            self.newline()
+
+    def build_method_bodies(self, method_impls):
+        self.method_bodies.clear()
+        self.add_method_bodies(method_impls)
+
+    def add_method_bodies(self, method_impls):
+        # bodies of methods defined outside of their class
+        for impl in method_impls:
+            segments = impl.name.segments
+            if getattr(impl, 'body', None) is None or len(segments) < 2 or \
+               type(segments[-2]) is not NameSpecifier:
+                continue
+            key = get_method_body_key(segments[-2].name, segments[-1].name,
+                                      impl)
+            self.method_bodies[key] = impl
+
+    def find_method_body(self, cls, method):
+        # the method itself (if it was defined in its class) or its
+        # out-of-class definition, whichever has the body
+        if getattr(method, 'body', None) is not None:
+            return method
+        key = get_method_body_key(get_class_name(cls),
+                                  method.name.segments[-1].name, method)
+        return self.method_bodies.get(key)
+
+    def get_native_body(self, cls, method):
+        # returns the parameters (for their names), D statements for the
+        # body of the method, if it's simple enough, and the condition
+        # (if any) under which the statements work in D
+        if not self.native_bodies or method.virtual or method.override or \
+           method.pure_virtual or method.vararg:
+            return None
+        impl = self.find_method_body(cls, method)
+        if impl is None:
+            return None
+        # D's const is transitive, so a const method can't hand out a
+        # mutable pointer or reference into its fields
+        return_type = method.return_type
+        if method.const and is_mutable_indirection(return_type):
+            return None
+        return_cast = None
+        if not is_void_type(return_type):
+            return_cast = self.get_return_cast(cls, return_type, impl.body)
+            if return_cast is None:
+                return None
+        fields = set() if method.static else get_field_names(cls)
+        params = [_.name for _ in impl.parameters if _.name]
+        if len(params) != len(impl.parameters):
+            return None
+        def get_assign_cast(lhs, rhs):
+            return self.get_assign_cast(cls, impl.parameters, lhs, rhs)
+        statements = translate_body(impl.body, fields, params, return_cast,
+                                    type(return_type) is Pointer,
+                                    get_assign_cast)
+        if statements is None:
+            return None
+        # a member that's an InlineClass in D (or an array with
+        # ArrayStorage) isn't of the type C++ says it is, so handing it
+        # out (or its address) would need a conversion; leave it to C++
+        used = get_used_names(impl.body, fields)
+        if any(field.name in used and self.is_inline_member_type(field.type)
+               for field in cls.fields):
+            return None
+        # D steps over a T * by the size of a reference when T is a
+        # class, rather than by the size of the object (as C++ does), so
+        # indexing into an array of class objects (or any other pointer
+        # arithmetic on it) has to be left to C++. For a template, that
+        # depends on what it gets instantiated with.
+        template_params = get_template_param_names(cls)
+        class_params = []
+        stepped = get_stepped_names(merge_operators(impl.body), fields)
+        for field in cls.fields:
+            if field.name not in stepped:
+                continue
+            element = get_pointee_name(field.type)
+            if element in template_params:
+                if element not in class_params:
+                    class_params.append(element)
+            elif self.is_class_name(element):
+                return None
+        guard = ' && '.join(f'!is({_} == class)' for _ in class_params)
+        return impl.parameters, statements, guard or None
+
+    def get_return_cast(self, cls, return_type, body):
+        # the cast that the returned expression needs (see
+        # get_narrowing_cast)
+        expr = body[1:-1] if len(body) == 3 and body[0] == 'return' else None
+        return self.get_narrowing_cast(cls, [], return_type, expr)
+
+    def get_assign_cast(self, cls, parameters, lhs, rhs):
+        # the cast that assigning rhs to lhs needs (see
+        # get_narrowing_cast), or None if it's not a field or an
+        # element of a field, whose type we know
+        if lhs[:2] == ['this', '->']:
+            lhs = lhs[2:]
+        field = next((_ for _ in cls.fields if _.name == lhs[0]), None)
+        if field is None:
+            return None
+        type_ = field.type
+        if len(lhs) > 1:
+            if type(type_) is not Array or lhs[1] != '[' or \
+               lhs[-1] != ']' or lhs.count('[') != 1:
+                return None
+            type_ = type_.array_of
+        return self.get_narrowing_cast(cls, parameters, type_, rhs)
+
+    def get_narrowing_cast(self, cls, parameters, type_, expr=None):
+        # a cast to type_ if a value of it computed in C++ might need
+        # narrowing (which C++ does implicitly, but D doesn't), otherwise
+        # '', or None if type_ is a name we know nothing about (say, a
+        # typedef from a header that isn't in the input). No need if
+        # expr is just a field or parameter of that type.
+        if type(type_) is not Type:
+            return ''
+        resolved = self.resolve_type_aliases(type_)
+        if type(resolved) is not Type:
+            return ''
+        segment = resolved.typename.segments[-1]
+        if type(segment) is NameSpecifier:
+            if segment.name not in integer_type_names:
+                return '' if self.is_known_type_name(cls, segment.name) \
+                    else None
+        elif type(segment) is not FundamentalSpecifier or \
+             segment.name in {'double', 'long double'}:
+            return ''
+        if expr is not None and len(expr) == 1:
+            resolved_key = get_type_key(resolved)[1:]
+            for _ in [*cls.fields, *parameters]:
+                if _.name == expr[0] and get_type_key(
+                        self.resolve_type_aliases(_.type))[1:] == resolved_key:
+                    return ''
+        d_type = self.capture(self.output_type, dataclasses.replace(
+            type_, const=False))
+        return f'cast({d_type})'
+
+    def resolve_type_aliases(self, type_):
+        # follow typedefs and using aliases down to the type they name
+        seen = set()
+        while type(type_) is Type:
+            name = get_value_type_name(type_)
+            target = self.type_names.get(name)
+            if target is None or name in seen:
+                break
+            seen.add(name)
+            type_ = target
+        return type_
+
+    def is_known_type_name(self, cls, name):
+        # whether name is a class, enum, typedef or template parameter
+        # that we've seen
+        return name in self.class_metadata or name in self.type_names or \
+            name in get_template_param_names(cls)
+
+    def is_class_value_type(self, type_):
+        # whether a type is an object (rather than a pointer or a
+        # reference) of a class that comes out as a D class, which would
+        # only be a reference in D
+        return self.is_class_name(get_value_type_name(type_))
+
+    def is_inline_member_type(self, type_):
+        # whether a member of this type comes out as something else in
+        # D: an InlineClass (see output_class), or an array class with
+        # ArrayStorage in it
+        if self.is_class_value_type(type_):
+            return True
+        metadata = self.class_metadata.get(get_value_type_name(type_))
+        while metadata is not None:
+            if metadata.name in array_storage_fields:
+                return True
+            metadata = self.get_base_metadata(metadata)
+        return False
 
-    for enum in cls.enums:
-        # output_and_update_access(enum.access)
-        output_enum(enum)
+    def is_class_name(self, name):
+        # whether a class of that name comes out as a D class (or
+        # interface), as get_class_kind decides
+        metadata = self.class_metadata.get(name)
+        return metadata is not None and (metadata.is_interface or
+                                         metadata.base_name is not None or
+                                         metadata.has_children)
+
+    def output_native_body(self, statements):
+        self.output(' {')
+        if statements:
+            self.newline()
+            self.indent()
+            for statement in statements:
+                self.output_indent()
+                self.output(statement)
+                self.newline()
+            self.dedent()
+            self.output_indent()
+        self.output('}')
+
+    def output_buffer_views(self, cls):
+        field_names = get_field_names(cls)
+        for accessor, field, element in buffer_views.get(get_class_name(cls), []):
+            if field not in field_names:
+                continue
+            view = f'{field}[]' if element is None else \
+                f'flatten!{element}({field}[])'
+            for const in ['', ' const']:
+                self.output_indent()
+                self.output(f'final auto {accessor}(){const} {{ return {view}; }}')
+                self.newline()
+
+    def output_class_member(self, cls, method):
+        if method.constructor:
+            self.output_class_constructor(cls, method)
+        elif method.destructor:
+            self.output_class_destructor(cls, method)
+        else:
+            self.output_class_method(cls, method)
+
+    def output_class_methods(self, cls):
+        for method in cls.methods:
+            # with --batch, leave out methods we can't translate, unless
+            # they're virtual (which would throw off the vtable)
+            diagnostic = self.try_output(
+                self.output_class_member, cls, method, cls=cls, node=method,
+                recover=not is_virtual_or_overridden_method(method),
+                skipped='method')
+            if diagnostic is not None:
+                self.output_indent()
+                self.output_unsupported(diagnostic)
+                self.newline()
+
+    def should_be_class(self, cls):
+        class_name = get_class_name(cls)
+        if class_name not in self.class_metadata:
+            return False
+        metadata = self.class_metadata[class_name]
+        return is_virtual_class(cls) or \
+            cls.class_decl.bases or \
+            metadata.has_children
+
+    def get_class_kind(self, cls):
+        metadata = self.class_metadata.get(get_class_name(cls))
+        if metadata is not None and metadata.is_interface:
+            return 'interface'
+        elif self.should_be_class(cls):
+            return 'class'
+        else:
+            return 'struct'
+
+    def output_class(self, cls):
+        name = get_class_name(cls)
+
+        decl = cls.class_decl
+        assert not decl.explicit
+
+        # TODO: No multiple inheritance unless pure virtual...
+        assert len(decl.bases) <= 1
+
+        if decl.classkey in {'class', 'struct'}:
+            self.output(f'extern(C++, {decl.classkey}) ')
+
+        if decl.final:
+            self.output('final ')
+
+        self.output(f'{self.get_class_kind(cls)} {name}')
+
+        if decl.template:
+            self.output_template_parameters(decl.template.params)
+
+        if decl.bases:
+            base = decl.bases[0]
+            assert not base.virtual # no virtual inheritance
+            self.output(f': ')
+            self.output_typename(base.typename)
+
+        self.output(' {')
+        self.newline()
+
+        self.indent()
+
+        for enum in cls.enums:
+            # output_and_update_access(enum.access)
+            self.output_enum(enum)
+
+        anonymous_union_fields = dict()
+
+        for cls_ in cls.classes:
+            if is_anonymous_union(cls_):
+                key = get_anonymous_union_key(cls_)
+                assert key not in anonymous_union_fields
+                anonymous_union_fields[key] = cls_
+            elif isinstance(cls_, ClassScope):
+                self.output_indent()
+                self.output_class(cls_)
+            else:
+                unsupported(f'nested {type(cls_).__name__}')
+
+        for field in cls.fields:
+            # output_and_update_access(field.access)
+            self.output_indent()
+            if is_anonymous_union(field):
+                key = get_anonymous_union_key(field)
+                self.output_union(anonymous_union_fields[key])
+            else:
+                if field.static:
+                    self.output('__gshared ')
+                if self.is_class_value_type(field.type):
+                    # (see InlineClass in header.d)
+                    self.output('InlineClass!(')
+                    self.output_type(field.type)
+                    self.output(')')
+                else:
+                    self.output_type(field.type, reset_refs_to_ptrs=True)
+                self.output(f' {field.name}')
+            self.output(';')
+            self.newline()
+
+        self.output_class_methods(cls)
+
+        # classes derived from these (e.g. ON_BrepFaceArray) inherit it
+        if name in array_storage_fields and decl.template:
+            pointer_field, count_field = array_storage_fields[name]
+            self.output_indent()
+            self.output(f'mixin ArrayStorage!({decl.template.params[0].name}, '
+                        f'{pointer_field}, {count_field});')
+            self.newline()
+
+        self.output_buffer_views(cls)
+
+        self.dedent()
+        self.output_indent()
+        self.output('}')
+        self.newline()
+
+    def clear_class_metadata(self):
+        self.class_metadata.clear()
+        self.class_table.clear()
+        self.type_names.clear()
+
+    def load_class_metadata(self, class_table, type_names):
+        # metadata that's already been built (and finished) elsewhere
+        self.class_table = list(class_table)
+        self.class_metadata = {_.name: _ for _ in class_table}
+        self.type_names = dict(type_names)
+
+    def remove_skipped_classes(self, namespace):
+        # the classes that add_class_metadata or finish_class_metadata
+        # left out
+        namespace.classes = [_ for _ in namespace.classes
+                             if not is_anonymous(_) and
+                             get_class_name(_) in self.class_metadata]
+
+    def add_type_names(self, scope):
+        # the typedefs, using aliases, enums and nested classes of a
+        # namespace or class (and of the classes in it), for
+        # get_narrowing_cast
+        for using in scope.using_alias:
+            self.type_names[using.alias] = using.type
+        for typedef in scope.typedefs:
+            self.type_names[typedef.name] = typedef.type
+        for decl in [*scope.enums, *(_.class_decl for _ in scope.classes)]:
+            segment = decl.typename.segments[-1]
+            if type(segment) is NameSpecifier:
+                self.type_names.setdefault(segment.name, None)
+        for cls in scope.classes:
+            self.add_type_names(cls)
+
+    def build_class_metadata(self, classes):
+        self.add_class_metadata(classes)
+        self.finish_class_metadata()
+
+    def add_class_metadata(self, classes):
+        # set up metadata for all classes... keep track of things that
+        # can't be sorted out in a single pass over the parse tree
+        for cls in classes:
+            try:
+                metadata = ClassMetadata(cls, len(self.class_table))
+            except Unsupported as e:
+                # with --batch, leave it out (see remove_skipped_classes)
+                if not self.batch:
+                    raise
+                self.diagnostics.record(
+                    e, location=getattr(cls, 'location', None),
+                    skipped='class')
+                continue
+            metadata.nothrow_method_signatures = frozenset(
+                get_method_signature(_) for _ in cls.methods
+                if self.is_nothrow_method(cls, _))
+            assert metadata.name not in self.class_metadata
+            self.class_metadata[metadata.name] = metadata
+            self.class_table.append(metadata)
+
+    def finish_class_metadata(self):
+        # with --batch, leave out the classes whose base class we don't
+        # have, and then the ones derived from those
+        while True:
+            orphans = [_ for _ in self.class_table if _.base_name is not None
+                       and _.base_name not in self.class_metadata]
+            if not orphans:
+                break
+            for metadata in orphans:
+                try:
+                    unsupported(f'unknown base class {metadata.base_name}')
+                except Unsupported as e:
+                    if not self.batch:
+                        raise
+                    self.diagnostics.record(e, class_name=metadata.name,
+                                            skipped='class')
+                del self.class_metadata[metadata.name]
+            self.class_table = [_ for _ in self.class_table
+                                if _.name in self.class_metadata]
+            for id_, metadata in enumerate(self.class_table):
+                metadata.id = id_
+
+        # link every class to its base, now that they're all in
+        for metadata in self.class_table:
+            if metadata.base_name is not None:
+                metadata.base_id = self.class_metadata[metadata.base_name].id
+
+        # figure out which classes are actually interfaces (have no member fields)
+        for metadata in self.class_table:
+            self.should_class_be_interface(metadata)
+
+        # figure out which classes have children (are inherited from)
+        for metadata in self.class_table:
+            if metadata.base_id is not None:
+                self.class_table[metadata.base_id].has_children = True
+
+        # collect the method names (including inherited ones) of every
+        # class that's a base class. Only those ever get looked up (see
+        # any_base_class_methods), so the leaves don't need a copy
+        for metadata in self.class_table:
+            if metadata.has_children:
+                self.get_inherited_method_names(metadata)
+                self.get_inherited_method_names(metadata,
+                                                'nothrow_method_signatures')
+
+    def output_using_alias(self, using):
+        assert using.access is None
+        assert using.template is None
+        self.output(f'alias {using.alias} = ')
+        self.output_type(using.type)
+        self.output(';')
 
-    anonymous_union_fields = dict()
+    def output_typedef(self, typedef):
+        assert typedef.access is None
+        self.output(f'alias {typedef.name} = ')
+        self.output_type(typedef.type)
+        self.output(';')
+
+    def output_namespace_aliases(self, namespace):
+        for fn, decls in [(self.output_using_alias, namespace.using_alias),
+                          (self.output_typedef, namespace.typedefs),
+                          (self.output_enum, namespace.enums)]:
+            for decl in decls:
+                self.newline()
+                diagnostic = self.try_output(fn, decl, node=decl,
+                                             skipped='alias')
+                if diagnostic is not None:
+                    self.output_unsupported(diagnostic)
+
+    def output_classes(self, classes):
+        for cls in classes:
+            with profile_class(self.profiler, get_class_name(cls)):
+                self.newline()
+                diagnostic = self.try_output(self.output_class, cls, cls=cls,
+                                             skipped='stub')
+                if diagnostic is not None:
+                    self.output_unsupported_class(cls, diagnostic)
+                self.emitter.end_declaration()
+
+    def try_output(self, fn, *args, cls=None, node=None, recover=True,
+                   skipped=None):
+        # With --batch, anything that goes wrong in fn gets recorded
+        # (against cls and node), whatever fn emitted gets thrown away,
+        # and the record is returned, unless the caller can't just leave
+        # the declaration out, in which case the error goes on up.
+        # Returns None if nothing went wrong.
+        if not self.batch:
+            fn(*args)
+            return None
+        mark = self.emitter.mark()
+        try:
+            fn(*args)
+            return None
+        except Exception as e:
+            self.emitter.rollback(mark)
+            diagnostic = getattr(e, 'diagnostic', None)
+            if diagnostic is None:
+                diagnostic = e.diagnostic = self.record_unsupported(e, cls,
+                                                                    node)
+            if not recover:
+                raise
+            diagnostic['skipped'] = skipped
+            return diagnostic
+
+    def record_unsupported(self, e, cls=None, node=None):
+        location = getattr(node, 'location', None)
+        if location is None:
+            location = getattr(cls, 'location', None)
+        return self.diagnostics.record(
+            e, class_name=None if cls is None else get_class_name(cls),
+            method_name=get_method_name(node) if isinstance(node, Method)
+            else None, location=location)
+
+    def output_unsupported(self, diagnostic):
+        what = ' '.join(diagnostic['what'].split())
+        self.output(f'// unsupported: {what}')
+
+    def output_unsupported_class(self, cls, diagnostic):
+        # an opaque stub, so that pointers to it still work (there's no
+        # such thing for a template, though)
+        self.output_unsupported(diagnostic)
+        self.newline()
+        decl = cls.class_decl
+        if decl.template is None and decl.classkey in {'class', 'struct'}:
+            self.output(f'extern(C++, {decl.classkey}) '
+                        f'{self.get_class_kind(cls)} {get_class_name(cls)};')
+            self.newline()
+
+    def output_class_stubs(self, classes):
+        # opaque declarations for the classes that pruning left out, so
+        # that pointers to them still resolve (and mangle the same way)
+        for cls in classes:
+            decl = cls.class_decl
+            self.newline()
+            self.output(f'extern(C++, {decl.classkey}) '
+                        f'{self.get_class_kind(cls)} {get_class_name(cls)};')
+        self.emitter.end_declaration()
+
+    def output_namespace(self, namespace):
+        self.output_namespace_aliases(namespace)
+        self.output_classes(namespace.classes)
+
+    def capture(self, fn, *args):
+        # run an output_* function, returning what it emitted as a string
+        emitter = self.emitter
+        self.emitter = Emitter()
+        try:
+            fn(*args)
+            return self.emitter.getvalue()
+        finally:
+            self.emitter = emitter
+
+################################################################################
+# chunking
+#
+# The preprocessed input keeps clang's line markers, which we use to
+# split it back up into chunks, one per contiguous run of lines from
+# the same header. Chunks are parsed (and, with --incremental,
+# emitted) independently of each other. Keeping them in source order
+# means that merging their parse trees gives the same tree as parsing
+# the whole input at once. A declaration that spans an #include (e.g.
+# a class whose body includes another header) stays in one chunk, and
+# if a chunk still doesn't parse on its own, the whole input gets
+# parsed in one go instead, as it would be without chunking.
+
+line_marker_re = re.compile(r'^#\s*(?:line\s+)?\d+\s+"([^"]*)"')
+
+prologue_chunk_name = '<prologue>'
+
+def is_blank_chunk(chunk):
+    return not any(line.strip() and not line_marker_re.match(line)
+                   for line in chunk.splitlines())
+
+# comments (which clang -CC keeps) and string and character literals,
+# whichever starts first
+comment_or_literal_re = re.compile(
+    r'//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'',
+    re.DOTALL)
+
+def get_brace_depth(chunk):
+    # how many more braces a chunk opens than it closes (leaving out
+    # line markers, comments and string and character literals)
+    code = ''.join(line for line in chunk.splitlines(keepends=True)
+                   if not line_marker_re.match(line))
+    code = comment_or_literal_re.sub('', code)
+    return code.count('{') - code.count('}')
+
+def split_chunks(text):
+    chunks = []
+    depth = 0
+    def add_chunk(name, chunk):
+        nonlocal depth
+        # keep adding to the last chunk until its braces balance
+        if depth > 0:
+            chunks[-1] = (chunks[-1][0], chunks[-1][1] + chunk)
+        else:
+            chunks.append((name, chunk))
+        depth = max(depth + get_brace_depth(chunk), 0)
+    name, lines = prologue_chunk_name, []
+    for line in text.splitlines(keepends=True):
+        match = line_marker_re.match(line)
+        if match and match.group(1) != name:
+            add_chunk(name, ''.join(lines))
+            name, lines = match.group(1), []
+        lines.append(line)
+    add_chunk(name, ''.join(lines))
+    # drop chunks that turned out to be nothing but line markers
+    return [(name, chunk) for name, chunk in chunks
+            if not is_blank_chunk(chunk)]
+
+def parse_chunk(text, cache, filename, batch=False):
+    # with batch, a chunk that doesn't parse comes back empty (with its
+    # error, for the report) instead of raising
+    if not batch:
+        return parse_cached(text, cache, filename), None
+    try:
+        return parse_cached(text, cache, filename), None
+    except CxxParseError as e:
+        return ParsedData(), (str(e), getattr(e.tok, 'location', None))
+
+def record_parse_error(diagnostics, name, error):
+    message, location = error
+    diagnostics.add(f'parse error: {message}', location=location,
+                    skipped=f'chunk {name}')
+
+def parse_worker_chunk(text, cache, filename, batch=False):
+    # parse_chunk in a worker (with a cache from get_worker_cache),
+    # which also hands back what the parent can't see otherwise: the
+    # disk cache hits and misses and how much got written to it, and
+    # the peak memory (if tracing it)
+    hits, misses, written = cache.hits, cache.misses, cache.written_bytes
+    mark = start_peak()
+    result = parse_chunk(text, cache, filename, batch)
+    return result, (cache.hits - hits, cache.misses - misses,
+                    cache.written_bytes - written, get_peak_since(mark))
+
+def parse_chunks(chunks, cache, jobs=1, batch=False, profiler=None):
+    # a (parse tree, error) for each chunk, as parse_chunk
+    names = [name for name, _ in chunks]
+    texts = [chunk for _, chunk in chunks]
+    if jobs <= 1 or len(chunks) <= 1:
+        results = list(map(parse_chunk, texts, repeat(cache), names,
+                           repeat(batch)))
+    else:
+        args = (texts, repeat(cache.get_worker_cache()), names, repeat(batch))
+        trace_memory = profiler is not None and profiler.trace_memory
+        with ProcessPoolExecutor(
+                jobs, initializer=start_tracing if trace_memory else None) \
+                as pool:
+            results = []
+            for result, (hits, misses, written, peak_kib) in pool.map(
+                    parse_worker_chunk, *args):
+                cache.hits += hits
+                cache.misses += misses
+                cache.add_written(written)
+                if profiler is not None:
+                    profiler.add_worker_peak(peak_kib)
+                results.append(result)
+    return results
+
+def parse_chunks_or_whole(chunks, text, cache, jobs=1, diagnostics=None,
+                          profiler=None):
+    # returns the chunks as parsed and their parse trees. If a chunk
+    # doesn't parse on its own, fall back to a single chunk of the
+    # whole input. Only if that doesn't parse either does it end the
+    # run, or with diagnostics (i.e. with --batch), get recorded there
+    # and come back empty
+    results = parse_chunks(chunks, cache, jobs, True, profiler)
+    if any(error is not None for _, error in results):
+        chunks = [(prologue_chunk_name, text)]
+        results = parse_chunks(chunks, cache, 1, diagnostics is not None)
+    for (name, _), (_, error) in zip(chunks, results):
+        if error is not None:
+            record_parse_error(diagnostics, name, error)
+    return chunks, [parsed for parsed, _ in results]
+
+def merge_namespaces(namespaces):
+    merged = NamespaceScope()
+    for namespace in namespaces:
+        for field in dataclasses.fields(merged):
+            value = getattr(namespace, field.name)
+            if isinstance(value, list):
+                getattr(merged, field.name).extend(value)
+            elif isinstance(value, dict):
+                getattr(merged, field.name).update(value)
+    return merged
+
+################################################################################
+# reachability pruning
+#
+# With --roots or --roots-from, only the declarations reachable from a
+# set of root names get emitted: the closure over base classes, field
+# types, method parameter and return types, and template arguments.
+# Every other (non-template) class gets an opaque stub instead, so that
+# pointers to it still work. Class metadata is still built from the
+# whole input, so the declarations that do get emitted come out exactly
+# as they would without pruning.
+
+identifier_re = re.compile(r'[A-Za-z_][A-Za-z_0-9]*')
+
+def read_root_identifiers(paths):
+    # every identifier in the D sources (comments and all) is a
+    # candidate root; the ones that don't name a declaration drop out
+    roots = set()
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            roots.update(identifier_re.findall(f.read()))
+    return roots
+
+def collect_typename_references(typename, refs, indirect=False):
+    segments = typename.segments
+    if type(segments[0]) is NameSpecifier:
+        # a nested name (e.g. ON_BrepLoop::TYPE) needs its outer class
+        # in full, even behind a pointer
+        refs.append((segments[0].name, indirect and len(segments) == 1))
+    for segment in segments:
+        specialization = getattr(segment, 'specialization', None)
+        if specialization is None:
+            continue
+        for arg in specialization.args:
+            if type(arg.arg) is Value:
+                values = [_.value for _ in arg.arg.tokens]
+                indirect_ = '*' in values or '&' in values
+                refs.extend((_, indirect_) for _ in values
+                            if identifier_re.fullmatch(_))
+            else:
+                collect_type_references(arg.arg, refs)
+
+def collect_type_references(type_, refs, indirect=False):
+    while type_ is not None:
+        cls = type(type_)
+        if cls is Type:
+            collect_typename_references(type_.typename, refs, indirect)
+            return
+        elif cls is Pointer:
+            type_, indirect = type_.ptr_to, True
+        elif cls is Reference:
+            type_, indirect = type_.ref_to, True
+        elif cls is MoveReference:
+            type_, indirect = type_.moveref_to, True
+        elif cls is Array:
+            type_ = type_.array_of
+        elif cls is FunctionType:
+            for param in type_.parameters:
+                collect_type_references(param.type, refs, True)
+            type_, indirect = type_.return_type, True
+        else:
+            return
 
+def collect_class_references(cls, refs):
+    for base in cls.class_decl.bases:
+        collect_typename_references(base.typename, refs)
+    for field in cls.fields:
+        collect_type_references(field.type, refs)
+    for method in cls.methods:
+        # only what output_class_method actually emits
+        if method.access in {'private', 'protected'} and \
+           not method.constructor:
+            continue
+        collect_type_references(method.return_type, refs)
+        for param in method.parameters:
+            collect_type_references(param.type, refs)
+    for enum in cls.enums:
+        collect_enum_references(enum, refs)
     for cls_ in cls.classes:
-        if is_anonymous_union(cls_):
-            key = get_anonymous_union_key(cls_)
-            assert key not in anonymous_union_fields
-            anonymous_union_fields[key] = cls_
-        elif isinstance(cls_, ClassScope):
-            output_indent()
-            output_class(cls_)
+        collect_class_references(cls_, refs)
+
+def collect_enum_references(enum, refs):
+    # enumerators can be defined in terms of other enums' values
+    for value in enum.values:
+        if value.value is not None:
+            refs.extend((_.value, False) for _ in value.value.tokens
+                        if identifier_re.fullmatch(_.value))
+
+def get_enum_names(enum):
+    names = [value.name for value in enum.values]
+    if not is_anonymous_enum(enum):
+        names.append(enum.typename.segments[0].name)
+    return names
+
+def index_declarations(namespace):
+    # name -> the namespace-level declarations it refers to, along with
+    # the names each one refers to in turn (paired with whether that's
+    # only through a pointer or reference)
+    declarations = dict()
+    def add(name, decl, refs):
+        declarations.setdefault(name, []).append((decl, refs))
+    for using in namespace.using_alias:
+        refs = []
+        collect_type_references(using.type, refs)
+        add(using.alias, using, refs)
+    for typedef in namespace.typedefs:
+        refs = []
+        collect_type_references(typedef.type, refs)
+        add(typedef.name, typedef, refs)
+    for enum in namespace.enums:
+        refs = []
+        collect_enum_references(enum, refs)
+        # enums are reachable through any of their values, too
+        for name in get_enum_names(enum):
+            add(name, enum, refs)
+    for cls in namespace.classes:
+        refs = []
+        collect_class_references(cls, refs)
+        add(get_class_name(cls), cls, refs)
+    return declarations
+
+def is_stubbable(decls):
+    # whether an opaque stub can stand in for a declaration (see
+    # get_class_stubs)
+    return all(isinstance(decl, ClassScope)
+               and decl.class_decl.classkey in {'class', 'struct'}
+               and not decl.class_decl.template
+               for decl, _ in decls)
+
+def find_reachable(namespace, roots, follow_indirect=True):
+    # Without follow_indirect, a class that's only referred to through
+    # pointers and references is left to its stub. Anything else that
+    # is (a typedef, an enum, a template) can't be stubbed, so it's
+    # kept all the same, and what an alias refers to is then only
+    # needed indirectly, too.
+    declarations = index_declarations(namespace)
+    # name -> whether it's only reachable indirectly
+    reachable = dict()
+    stack = [(_, False) for _ in roots if _ in declarations]
+    while stack:
+        name, indirect = stack.pop()
+        if name in reachable and (indirect or not reachable[name]):
+            continue
+        decls = declarations[name]
+        if indirect and not follow_indirect and is_stubbable(decls):
+            continue
+        reachable[name] = indirect
+        for decl, refs in decls:
+            is_alias = isinstance(decl, (Typedef, UsingAlias))
+            for ref, ref_indirect in refs:
+                if ref in declarations:
+                    stack.append((ref, ref_indirect or
+                                  (is_alias and indirect)))
+    return set(reachable)
+
+def is_enum_reachable(enum, reachable):
+    return any(_ in reachable for _ in get_enum_names(enum))
+
+def prune_namespace(namespace, reachable):
+    return dataclasses.replace(
+        namespace,
+        using_alias=[_ for _ in namespace.using_alias if _.alias in reachable],
+        typedefs=[_ for _ in namespace.typedefs if _.name in reachable],
+        enums=[_ for _ in namespace.enums if is_enum_reachable(_, reachable)],
+        classes=[_ for _ in namespace.classes
+                 if get_class_name(_) in reachable])
+
+def get_class_stubs(namespace, reachable):
+    return [cls for cls in namespace.classes
+            if get_class_name(cls) not in reachable
+            and cls.class_decl.classkey in {'class', 'struct'}
+            and not cls.class_decl.template]
+
+def count_declarations(namespace):
+    return len(namespace.using_alias) + len(namespace.typedefs) + \
+        len(namespace.enums) + len(namespace.classes)
+
+################################################################################
+# parallel emission
+#
+# Each worker process has its own Translator, which gets a copy of the
+# parent's class metadata and then emits whatever slice of the
+# namespaces it's asked for. The parent joins the results back
+# together in order, so the output is the same as a serial run.
+
+worker_translator = None
+worker_namespaces = None
+
+def init_worker(namespaces, class_table, type_names, method_impls,
+                template_argument_types, profile, options):
+    global worker_translator, worker_namespaces, interactive
+    interactive = False
+    worker_translator = Translator()
+    if profile is not None:
+        # (profile is whether to trace memory, see Profiler)
+        worker_translator.profiler = Profiler(profile)
+    worker_translator.set_options(options)
+    worker_namespaces = namespaces
+    worker_translator.load_class_metadata(class_table, type_names)
+    worker_translator.build_method_bodies(method_impls)
+    for type_str, type_ in template_argument_types.items():
+        worker_translator.add_template_argument_type(type_str, type_)
+
+def start_worker_profile():
+    if worker_translator.profiler is not None:
+        worker_translator.profiler.start_worker_memory()
+
+def get_worker_profile():
+    # hand back (and forget) the class timings and type cache counts
+    # since the last call, and the peak memory since
+    # start_worker_profile, so that the parent can merge them into its
+    # own profile
+    translator = worker_translator
+    profiler = translator.profiler
+    if profiler is None:
+        return None
+    class_times, profiler.class_times = profiler.class_times, []
+    type_cache = translator.type_cache_hits, translator.type_cache_misses
+    translator.type_cache_hits = translator.type_cache_misses = 0
+    return class_times, type_cache, profiler.take_worker_memory()
+
+def emit_worker_classes(i, start, stop):
+    start_worker_profile()
+    emitted = worker_translator.capture(worker_translator.output_classes,
+                                        worker_namespaces[i].classes[start:stop])
+    return emitted, get_worker_profile(), \
+        worker_translator.diagnostics.take()
+
+def emit_worker_namespace(i):
+    start_worker_profile()
+    emitted = worker_translator.capture(worker_translator.output_namespace,
+                                        worker_namespaces[i])
+    return emitted, get_worker_profile(), \
+        worker_translator.diagnostics.take()
+
+def get_worker_results(pool, fn, redo, *args):
+    # like pool.map(fn, *args), except that whatever a worker found
+    # unsupported gets redone by redo (with the same arguments) in the
+    # parent, which can stop there (see unsupported)
+    futures = [(pool.submit(fn, *_), _) for _ in zip(*args)]
+    for future, args_ in futures:
+        try:
+            yield future.result()
+        except Unsupported:
+            yield redo(*args_)
+
+def add_worker_profile(translator, profile):
+    if translator.profiler is not None and profile is not None:
+        class_times, (hits, misses), peak_kib = profile
+        translator.profiler.class_times.extend(class_times)
+        translator.type_cache_hits += hits
+        translator.type_cache_misses += misses
+        translator.profiler.add_worker_peak(peak_kib)
+
+def make_pool(translator, namespaces, jobs):
+    # hand the workers the template arguments the parent already parsed,
+    # and the metadata of every class and type name (the namespaces to
+    # emit may have been pruned)
+    return ProcessPoolExecutor(
+        jobs, initializer=init_worker,
+        initargs=(namespaces, translator.class_table, translator.type_names,
+                  list(translator.method_bodies.values()),
+                  dict(translator.template_argument_types),
+                  None if translator.profiler is None
+                  else translator.profiler.trace_memory,
+                  translator.get_options()))
+
+def output_classes_parallel(translator, namespace, jobs):
+    classes = namespace.classes
+    # a few batches per worker to even out the load, since class
+    # sizes vary wildly
+    num_batches = min(len(classes), 4*jobs)
+    if num_batches == 0:
+        return
+    bounds = [len(classes)*i//num_batches for i in range(num_batches + 1)]
+    def redo(i, start, stop):
+        return translator.capture(translator.output_classes,
+                                  classes[start:stop]), None, []
+    with make_pool(translator, [namespace], jobs) as pool:
+        for emitted, profile, diagnostics in get_worker_results(
+                pool, emit_worker_classes, redo,
+                repeat(0), bounds[:-1], bounds[1:]):
+            add_worker_profile(translator, profile)
+            translator.diagnostics.records.extend(diagnostics)
+            translator.output(emitted)
+            translator.emitter.end_declaration()
+
+################################################################################
+# incremental regeneration
+#
+# With --incremental, the emitted D for each chunk is cached on the
+# chunk text plus the handful of cross-class facts that emitting it
+# depends on, so only the chunks that changed get re-emitted.
+
+def get_generator_key():
+    with open(__file__, 'rb') as f:
+        return make_key(f.read())
+
+def get_chunk_dependency_key(translator, parsed):
+    # everything outside of the chunk itself that output_class looks
+    # at: the metadata flags of its classes, the method names of their
+    # ancestors (for detecting nonvirtual overrides), the signatures of
+    # the nothrow ones, what kind of class its fields hold or point at,
+    # what its typedefs stand for,
+    # out-of-class method bodies, and which of its declarations survived
+    # pruning
+    namespace = parsed.namespace
+    facts = [','.join(_.alias for _ in namespace.using_alias),
+             ','.join(_.name for _ in namespace.typedefs),
+             ','.join(_ for enum in namespace.enums
+                      for _ in get_enum_names(enum))]
+    for cls in namespace.classes:
+        class_name = get_class_name(cls)
+        metadata = translator.class_metadata[class_name]
+        base_metadata = translator.find_base_class_metadata(cls)
+        base_method_names = base_nothrow_signatures = []
+        if base_metadata is not None:
+            base_method_names = sorted(
+                translator.get_inherited_method_names(base_metadata))
+            base_nothrow_signatures = sorted(
+                translator.get_inherited_method_names(
+                    base_metadata, 'nothrow_method_signatures'))
+        facts.append(f'{class_name}:{metadata.is_interface}:'
+                     f'{metadata.has_children}:{",".join(base_method_names)}:'
+                     f'{";".join(base_nothrow_signatures)}')
+        # whether its fields hold or point at D classes (for inline
+        # class members and native bodies)
+        for field in cls.fields:
+            for name in [get_value_type_name(field.type),
+                         get_pointee_name(field.type)]:
+                if name is not None:
+                    facts.append(f'{name}:{translator.is_class_name(name)}')
+        # what the type names of its fields, return values and
+        # parameters stand for (for the casts in native bodies, and
+        # is_accessor)
+        for type_ in [*(_.type for _ in cls.fields),
+                      *(_.return_type for _ in cls.methods),
+                      *(_.type for method in cls.methods
+                        for _ in method.parameters)]:
+            name = get_value_type_name(type_)
+            if name is not None:
+                known = translator.is_known_type_name(cls, name)
+                resolved = translator.resolve_type_aliases(type_)
+                facts.append(f'{name}:{known}:{get_type_key(resolved)}')
+        # the bodies of its methods that are defined elsewhere
+        for method in cls.methods:
+            impl = translator.find_method_body(cls, method)
+            if impl is not None and impl is not method:
+                facts.append(' '.join(impl.body))
+    return make_key(*facts)
+
+def emit_chunks(translator, chunks, parsed_chunks, cache, jobs=1):
+    profiler = translator.profiler
+
+    # each chunk's emitted D is cached along with its --batch
+    # diagnostics, so that the report is complete on a warm cache
+    with profile_stage(profiler, 'emit cache lookup'):
+        generator_key = get_generator_key()
+        options_key = translator.get_options_key()
+        keys = [make_key('emit', generator_key, options_key, chunk,
+                         get_chunk_dependency_key(translator, parsed))
+                for (_, chunk), parsed in zip(chunks, parsed_chunks)]
+        emitted = [cache.get(key) for key in keys]
+        stale = [i for i, _ in enumerate(emitted) if _ is None]
+
+    namespaces = [parsed.namespace for parsed in parsed_chunks]
+    with profile_stage(profiler, 'template arguments'):
+        translator.prepare_template_arguments([namespaces[i] for i in stale])
+
+    with profile_stage(profiler, 'emit'):
+        if jobs > 1 and len(stale) > 1:
+            def redo(i):
+                return translator.capture(translator.output_namespace,
+                                          namespaces[i]), None, []
+            with make_pool(translator, namespaces, jobs) as pool:
+                results = get_worker_results(pool, emit_worker_namespace,
+                                             redo, stale)
+                for i, (_, profile, diagnostics) in zip(stale, results):
+                    add_worker_profile(translator, profile)
+                    emitted[i] = _, diagnostics
         else:
-            import ipdb; ipdb.set_trace()
-            pass
-
+            diagnostics = translator.diagnostics
+            for i in stale:
+                start = len(diagnostics.records)
+                _ = translator.capture(translator.output_namespace,
+                                       namespaces[i])
+                emitted[i] = _, diagnostics.take(start)
+        for i in stale:
+            cache.put(keys[i], emitted[i])
+
+    if cache.enabled:
+        print(f'cpp2d: re-emitted {len(stale)} of {len(chunks)} chunks',
+              file=sys.stderr)
+    for _, diagnostics in emitted:
+        translator.diagnostics.records.extend(diagnostics)
+    return [_ for _, diagnostics in emitted]
+
+def output_incremental(translator, chunks, parsed_chunks, cache, jobs=1,
+                       stubs=None):
+    emitted = emit_chunks(translator, chunks, parsed_chunks, cache, jobs)
+    translator.newline()
+    if stubs is not None:
+        translator.output_class_stubs([_ for chunk_stubs in stubs
+                                       for _ in chunk_stubs])
+    for _ in emitted:
+        translator.output(_)
+        translator.emitter.end_declaration()
+
+def prune_chunks(parsed_chunks, roots, follow_indirect=True):
+    # returns the pruned chunks, and the stubs for each chunk
+    namespace = merge_namespaces(parsed.namespace for parsed in parsed_chunks)
+    reachable = find_reachable(namespace, roots, follow_indirect)
+    pruned = [dataclasses.replace(
+        parsed, namespace=prune_namespace(parsed.namespace, reachable))
+              for parsed in parsed_chunks]
+    print(f'cpp2d: kept {sum(count_declarations(_.namespace) for _ in pruned)}'
+          f' of {count_declarations(namespace)} declarations',
+          file=sys.stderr)
+    return pruned, [get_class_stubs(parsed.namespace, reachable)
+                    for parsed in parsed_chunks]
+
+def prepare_chunks(translator, text, cache, jobs=1, roots=None,
+                   follow_indirect=True):
+    profiler = translator.profiler
+
+    translator.clear_class_metadata()
+
+    with profile_stage(profiler, 'split'):
+        chunks = split_chunks(text)
+    with profile_stage(profiler, 'parse'):
+        chunks, parsed_chunks = parse_chunks_or_whole(
+            chunks, text, cache, jobs,
+            translator.diagnostics if translator.batch else None, profiler)
+
+    with profile_stage(profiler, 'metadata'):
+        # (type names and method bodies first, for is_accessor)
+        for parsed in parsed_chunks:
+            translator.add_type_names(parsed.namespace)
+        translator.build_method_bodies(
+            [impl for parsed in parsed_chunks
+             for impl in parsed.namespace.method_impls])
+        translator.build_class_metadata(
+            [cls for parsed in parsed_chunks
+             for cls in parsed.namespace.classes])
+        for parsed in parsed_chunks:
+            translator.remove_skipped_classes(parsed.namespace)
+
+    pruned_chunks, stubs = parsed_chunks, None
+    if roots is not None:
+        with profile_stage(profiler, 'prune'):
+            pruned_chunks, stubs = prune_chunks(parsed_chunks, roots,
+                                                follow_indirect)
+
+    return chunks, parsed_chunks, pruned_chunks, stubs
+
+def output_translation(translator, text, cache, incremental=False, jobs=1,
+                       roots=None, follow_indirect=True):
+    profiler = translator.profiler
+
+    chunks, _, parsed_chunks, stubs = prepare_chunks(
+        translator, text, cache, jobs, roots, follow_indirect)
+
+    if incremental:
+        output_incremental(translator, chunks, parsed_chunks, cache, jobs,
+                           stubs)
+        return parsed_chunks
+
+    namespace = merge_namespaces(parsed.namespace for parsed in parsed_chunks)
+    with profile_stage(profiler, 'template arguments'):
+        translator.prepare_template_arguments([namespace])
+
+    with profile_stage(profiler, 'emit'):
+        translator.newline()
+        if stubs is not None:
+            translator.output_class_stubs([_ for chunk_stubs in stubs
+                                           for _ in chunk_stubs])
+        if jobs > 1:
+            translator.output_namespace_aliases(namespace)
+            output_classes_parallel(translator, namespace, jobs)
+        else:
+            translator.output_namespace(namespace)
+
+    return parsed_chunks
+
+################################################################################
+# streaming emission
+#
+# With --stream, peak memory is bounded by the biggest chunk instead of
+# by the whole input. A first pass parses the chunks one at a time,
+# boils their classes down to ClassMetadata (and keeps any
+# out-of-class method bodies), and throws each parse tree away. The
+# second pass parses each chunk again (from the cache, if it's on) and
+# emits its classes one by one, dropping every class scope as soon as
+# it's been written out. The output is the same as --incremental's.
+
+def summarize_chunks(translator, chunks, cache):
+    # returns False if one of several chunks didn't parse (see
+    # parse_chunks_or_whole)
+    translator.clear_class_metadata()
+    translator.method_bodies.clear()
+    for name, chunk in chunks:
+        parsed, error = parse_chunk(chunk, cache, name,
+                                    len(chunks) > 1 or translator.batch)
+        if error is not None:
+            if len(chunks) > 1:
+                return False
+            record_parse_error(translator.diagnostics, name, error)
+        namespace = parsed.namespace
+        translator.add_type_names(namespace)
+        translator.add_method_bodies(namespace.method_impls)
+        translator.add_class_metadata(namespace.classes)
+    translator.finish_class_metadata()
+    return True
+
+def output_streaming(translator, text, cache):
+    profiler = translator.profiler
+
+    with profile_stage(profiler, 'split'):
+        chunks = split_chunks(text)
+    with profile_stage(profiler, 'metadata'):
+        if not summarize_chunks(translator, chunks, cache):
+            chunks = [(prologue_chunk_name, text)]
+            summarize_chunks(translator, chunks, cache)
+
+    with profile_stage(profiler, 'emit'):
+        translator.newline()
+        for name, chunk in chunks:
+            # (parse errors were already recorded the first time around)
+            namespace = parse_chunk(chunk, cache, name,
+                                    translator.batch)[0].namespace
+            translator.remove_skipped_classes(namespace)
+            translator.prepare_template_arguments([namespace])
+            translator.output_namespace_aliases(namespace)
+            # pop the classes off as we go, so that nothing but the
+            # class being emitted holds on to its scope
+            classes, namespace.classes = namespace.classes[::-1], []
+            while classes:
+                translator.output_classes([classes.pop()])
+
+################################################################################
+# layout probe
+#
+# --layout-probe writes a C++ program which, compiled against the real
+# headers and run, prints a D module of static asserts comparing the
+# size, alignment and field offsets of every emitted type with what the
+# C++ compiler came up with. Building that module along with the
+# bindings turns a layout mismatch into a compile error instead of
+# silently corrupted data.
+
+layout_probe_prologue = '''\
+// Generated by cpp2d.py --layout-probe. Prints a D module checking the
+// layouts of the D bindings against the C++ ones:
+//
+//   $ clang++ -I ../opennurbs -o layout_probe layout_probe.cpp
+//   $ ./layout_probe > {module}_layout.d
+//   $ dmd -c {module}_layout.d ...
+
+#include <atomic>
+#include <cmath>
+#include <cstddef>
+#include <cstdint>
+#include <cstdio>
+#include <cstdlib>
+#include <cstring>
+#include <memory>
+#include <mutex>
+#include <new>
+#include <string>
+#include <utility>
+#include <vector>
+
+// offsetof needs to see every field (and the standard headers above
+// are already in, so this only affects the headers being probed)
+#define private public
+#define protected public
+#include "{include}"
+
+#pragma GCC diagnostic ignored "-Winvalid-offsetof"
+
+static void check(const char *d_expr, size_t value) {{
+  std::printf("static assert(%s == %zu, \\"%s should be %zu\\");\\n", d_expr,
+              value, d_expr, value);
+}}
+
+int main() {{
+  std::printf("module {module}_layout;\\n\\nimport {module};\\nimport std_;\\n\\n");
+'''
+
+# the guesses in std_.d, as (D type, C++ type)
+std_layout_probes = [
+    ('vector!(int)', 'std::vector<int>'),
+    ('shared_ptr!(int)', 'std::shared_ptr<int>'),
+    ('weak_ptr!(int)', 'std::weak_ptr<int>'),
+    ('unique_ptr!(int)', 'std::unique_ptr<int>'),
+    ('atomic!(int)', 'std::atomic<int>'),
+    ('atomic_flag', 'std::atomic_flag'),
+]
+
+def get_layout_field_names(cls):
+    # every field that has an offset (so no statics or bitfields),
+    # including the members of anonymous unions
+    unions = {get_anonymous_union_key(_): _ for _ in cls.classes
+              if is_anonymous_union(_)}
     for field in cls.fields:
-        # output_and_update_access(field.access)
-        output_indent()
+        if field.static or field.bits is not None:
+            continue
         if is_anonymous_union(field):
-            key = get_anonymous_union_key(field)
-            output_union(anonymous_union_fields[key])
+            union = unions[get_anonymous_union_key(field)]
+            yield from (_.name for _ in union.fields
+                        if _.name and _.bits is None)
+        elif field.name:
+            yield field.name
+
+def make_layout_probe(translator, namespace, include='opennurbs.h',
+                      module='opennurbs'):
+    lines = [layout_probe_prologue.format(include=include, module=module)]
+    def check(d_expr, cxx_expr):
+        lines.append(f'  check("{d_expr}", {cxx_expr});\n')
+
+    for d_type, cxx_type in std_layout_probes:
+        check(f'{d_type}.sizeof', f'sizeof({cxx_type})')
+        check(f'{d_type}.alignof', f'alignof({cxx_type})')
+
+    for cls in namespace.classes:
+        decl = cls.class_decl
+        if decl.template or decl.classkey not in {'class', 'struct'} or \
+           is_anonymous(cls):
+            continue
+        name = get_class_name(cls)
+        kind = translator.get_class_kind(cls)
+        if kind == 'interface':
+            continue
+        if kind == 'class':
+            # a D class is a reference, so .sizeof would be a pointer's;
+            # what members and arrays of one take up is an InlineClass's
+            # (see header.d)
+            check(f'InlineClass!({name}).sizeof', f'sizeof({name})')
+            check(f'InlineClass!({name}).alignof', f'alignof({name})')
         else:
-            if field.static:
-                output('__gshared ')
-            output_type(field.type, reset_refs_to_ptrs=True)
-            output(f' {field.name}')
-        output(';')
-        newline()
-
-    output_class_methods(cls)
+            check(f'{name}.sizeof', f'sizeof({name})')
+            check(f'{name}.alignof', f'alignof({name})')
+        for field_name in get_layout_field_names(cls):
+            check(f'{name}.{field_name}.offsetof',
+                  f'offsetof({name}, {field_name})')
+
+    lines.append('  return 0;\n}\n')
+    return ''.join(lines)
+
+################################################################################
+# writing output
+#
+# Output files are written to a temporary file next to them and only
+# moved into place if their contents actually changed, so that an
+# unchanged file keeps its mtime and doesn't trigger a rebuild of
+# everything downstream. Whatever did change gets reported by
+# top-level declaration.
+
+def open_temp_output(path):
+    fd, tmp = tempfile.mkstemp(
+        dir=os.path.dirname(path) or '.',
+        prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    atexit.register(remove_temp_output, tmp)
+    return os.fdopen(fd, 'w', buffering=1 << 20, encoding='utf-8'), tmp
+
+def remove_temp_output(tmp):
+    try:
+        os.unlink(tmp)
+    except FileNotFoundError:
+        pass
 
-    dedent()
-    output_indent()
-    output('}')
-    newline()
+def hash_file(path):
+    h = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+    except FileNotFoundError:
+        return None
+    return h.hexdigest()
+
+declaration_name_re = re.compile(
+    r'^(?:extern\([^)]*\) )?(?:final )?'
+    r'(?:class|struct|interface|union|enum|alias) (\w+)')
+
+def split_declarations(text):
+    # top-level declarations start in the first column and run until
+    # the next one does (closing braces aside)
+    declarations = dict()
+    key, lines = None, []
+    def add():
+        if key is None:
+            return
+        key_, i = key, 1
+        while key_ in declarations:
+            i += 1
+            key_ = f'{key}#{i}'
+        declarations[key_] = ''.join(lines)
+    for line in text.splitlines(keepends=True):
+        if line.strip() and not line[0].isspace() and line[0] != '}':
+            add()
+            match = declaration_name_re.match(line)
+            key, lines = match.group(1) if match else line.strip(), []
+        lines.append(line)
+    add()
+    return declarations
+
+def diff_declarations(old_text, new_text):
+    old = split_declarations(old_text)
+    new = split_declarations(new_text)
+    return {
+        'added': [_ for _ in new if _ not in old],
+        'removed': [_ for _ in old if _ not in new],
+        'changed': [_ for _ in new if _ in old and old[_] != new[_]],
+    }
+
+def report_changes(path, changes, limit=20):
+    counts = ', '.join(f'{len(names)} {kind}'
+                       for kind, names in changes.items())
+    print(f'cpp2d: updated {path} ({counts})', file=sys.stderr)
+    names = [f'{kind} {name}' for kind, names in changes.items()
+             for name in names]
+    for _ in names[:limit]:
+        print(f'cpp2d:   {_}', file=sys.stderr)
+    if len(names) > limit:
+        print(f'cpp2d:   ... and {len(names) - limit} more', file=sys.stderr)
+
+def replace_if_changed(tmp, path):
+    # returns whether path was replaced
+    old_hash = hash_file(path)
+    if old_hash is not None and old_hash == hash_file(tmp):
+        os.unlink(tmp)
+        return False
+    if old_hash is None:
+        os.chmod(tmp, 0o644)
+        print(f'cpp2d: created {path}', file=sys.stderr)
+    else:
+        shutil.copymode(path, tmp)
+        with open(path, encoding='utf-8', errors='replace') as f:
+            old_text = f.read()
+        with open(tmp, encoding='utf-8') as f:
+            new_text = f.read()
+        report_changes(path, diff_declarations(old_text, new_text))
+    os.replace(tmp, path)
+    return True
+
+def write_if_changed(path, text):
+    file_, tmp = open_temp_output(path)
+    with file_:
+        file_.write(text)
+    return replace_if_changed(tmp, path)
+
+################################################################################
+# per-header modules
+#
+# With --package-dir, each header gets its own D module (e.g.
+# opennurbs_brep.h becomes opennurbs.brep), importing whichever other
+# modules declare the names it refers to, plus a package.d that
+# publicly imports all of them, so "import opennurbs;" keeps working.
+# The --d-header goes into a module of its own that everything
+# imports.
+
+d_keywords = {
+    'abstract', 'alias', 'align', 'asm', 'assert', 'auto', 'body', 'bool',
+    'break', 'byte', 'case', 'cast', 'catch', 'char', 'class', 'const',
+    'continue', 'dchar', 'debug', 'default', 'delegate', 'delete',
+    'deprecated', 'do', 'double', 'else', 'enum', 'export', 'extern',
+    'false', 'final', 'finally', 'float', 'for', 'foreach', 'function',
+    'goto', 'if', 'immutable', 'import', 'in', 'inout', 'int', 'interface',
+    'invariant', 'is', 'lazy', 'long', 'macro', 'mixin', 'module', 'new',
+    'nothrow', 'null', 'out', 'override', 'package', 'pragma', 'private',
+    'protected', 'public', 'pure', 'real', 'ref', 'return', 'scope',
+    'shared', 'short', 'static', 'struct', 'super', 'switch',
+    'synchronized', 'template', 'this', 'throw', 'true', 'try', 'typeid',
+    'typeof', 'ubyte', 'uint', 'ulong', 'union', 'unittest', 'ushort',
+    'version', 'void', 'wchar', 'while', 'with',
+}
+
+d_header_module_name = 'd_header'
+
+def get_module_name(chunk_name, package='opennurbs'):
+    if chunk_name == prologue_chunk_name:
+        return 'prologue'
+    name = os.path.splitext(os.path.basename(chunk_name))[0]
+    if name.startswith(f'{package}_'):
+        name = name[len(package) + 1:]
+    name = re.sub(r'\W', '_', name)
+    if not name or name[0].isdigit() or name in d_keywords or \
+       name == d_header_module_name:
+        name += '_'
+    return name
+
+def get_module_imports(parsed_chunks, module_names):
+    # which module each name is declared in, and then which modules
+    # each module refers to
+    declared_in = dict()
+    for parsed, module_name in zip(parsed_chunks, module_names):
+        for name in index_declarations(parsed.namespace):
+            declared_in.setdefault(name, module_name)
+    imports = {_: set() for _ in module_names}
+    for parsed, module_name in zip(parsed_chunks, module_names):
+        for decls in index_declarations(parsed.namespace).values():
+            for _, refs in decls:
+                for ref, _indirect in refs:
+                    if ref in declared_in:
+                        imports[module_name].add(declared_in[ref])
+    for module_name, module_imports in imports.items():
+        module_imports.discard(module_name)
+    return imports
+
+def make_d_header_module(d_header, package='opennurbs'):
+    # the modules importing this one need whatever it imports, too
+    text = re.sub(r'^import ', 'public import ', d_header, flags=re.M)
+    return f'module {package}.{d_header_module_name};\n\n{text}'
+
+def output_modules(translator, text, cache, package_dir, package='opennurbs',
+                   d_header=None, incremental=False, jobs=1, roots=None,
+                   follow_indirect=True):
+    chunks, parsed_chunks, pruned_chunks, stubs = prepare_chunks(
+        translator, text, cache, jobs, roots, follow_indirect)
+
+    # only use the emit cache with --incremental
+    emit_cache = cache if incremental else DiskCache(enabled=False)
+    emitted = emit_chunks(translator, chunks, pruned_chunks, emit_cache, jobs)
+
+    with profile_stage(translator.profiler, 'write modules'):
+        module_names = [get_module_name(name, package) for name, _ in chunks]
+        # names come from the unpruned chunks, since stubs live in the
+        # module of the class they stand in for
+        imports = get_module_imports(parsed_chunks, module_names)
+        modules = dict()
+        for i, module_name in enumerate(module_names):
+            modules.setdefault(module_name, []).append(i)
+
+        os.makedirs(package_dir, exist_ok=True)
+        files = dict()
+        common_imports = []
+        if d_header is not None:
+            files[d_header_module_name] = make_d_header_module(d_header,
+                                                               package)
+            common_imports.append(d_header_module_name)
+
+        for module_name, indices in modules.items():
+            parts = [f'module {package}.{module_name};\n\n']
+            for _ in common_imports + sorted(imports[module_name]):
+                parts.append(f'import {package}.{_};\n')
+            if stubs is not None:
+                parts.append(translator.capture(
+                    translator.output_class_stubs,
+                    [_ for i in indices for _ in stubs[i]]))
+            parts.extend(emitted[i] for i in indices)
+            parts.append('\n')
+            files[module_name] = ''.join(parts)
+
+        parts = [f'module {package};\n\n']
+        for _ in common_imports + list(modules):
+            parts.append(f'public import {package}.{_};\n')
+        files['package'] = ''.join(parts)
+
+        num_changed = sum(
+            write_if_changed(os.path.join(package_dir, f'{name}.d'), text)
+            for name, text in files.items())
+
+    print(f'cpp2d: {num_changed} of {len(files)} files in {package_dir} '
+          'changed', file=sys.stderr)
+    return pruned_chunks
+
+def make_arg_parser():
+    parser = argparse.ArgumentParser(
+        description='Translate preprocessed OpenNURBS headers into D')
+    parser.add_argument('input', nargs='?', default='filtered.cpp')
+    parser.add_argument('-o', '--output',
+                        help='write the D module here instead of stdout')
+    parser.add_argument('--driver',
+                        help='run the preprocessor over DRIVER (e.g. '
+                        'driver.cpp) and translate its target region, '
+                        'instead of reading a preprocessed input')
+    parser.add_argument('-I', dest='include_dirs', action='append',
+                        default=[], help='include directory for --driver')
+    parser.add_argument('--header', default='header.cpp',
+                        help='C++ to put in front of the target region '
+                        'with --driver')
+    parser.add_argument('--clang', default='clang++',
+                        help='preprocessor to use with --driver')
+    parser.add_argument('--clang-format', action='store_true',
+                        help='run clang-format over the input before parsing')
+    parser.add_argument('--save-input', metavar='PATH',
+                        help='also write the (preprocessed) input to PATH')
+    parser.add_argument('--package-dir', metavar='DIR',
+                        help='write one D module per header into DIR, '
+                        'plus a package.d importing all of them, instead '
+                        'of a single module')
+    parser.add_argument('--package', default='opennurbs',
+                        help='D package name for --package-dir')
+    parser.add_argument('--d-header',
+                        help='copy this file to the start of the output '
+                        '(e.g. header.d)')
+    parser.add_argument('--cache-dir', default=default_cache_dir,
+                        help='where to keep cached parse trees')
+    parser.add_argument('--cache-size', type=int,
+                        default=default_max_bytes//(1024*1024),
+                        help='cache size cap in MiB (least recently used '
+                        'entries are evicted first)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='always reparse, ignoring the cache')
+    parser.add_argument('--clear-cache', action='store_true',
+                        help='empty the cache before running')
+    parser.add_argument('--incremental', action='store_true',
+                        help='split the input into per-header chunks using '
+                        'line markers, only reparsing and re-emitting the '
+                        'chunks that changed')
+    parser.add_argument('--stream', action='store_true',
+                        help='keep only one header\'s parse tree in memory '
+                        'at a time, emitting and dropping classes as it '
+                        'goes (parses everything twice without the cache)')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='number of worker processes for parsing and '
+                        'emitting')
+    parser.add_argument('--check-serial', action='store_true',
+                        help='also translate serially (without the cache) '
+                        'and fail unless the output is byte-identical')
+    parser.add_argument('--roots', nargs='+', metavar='NAME', default=[],
+                        help='only emit the declarations reachable from '
+                        'these names, plus opaque stubs for other classes')
+    parser.add_argument('--roots-from', nargs='+', metavar='SOURCE',
+                        default=[], help='use every identifier in these D '
+                        'sources (e.g. example_brep.d) as a root')
+    parser.add_argument('--opaque-indirect', action='store_true',
+                        help="when pruning, don't follow types that are only "
+                        'used through pointers or references (they get '
+                        'stubs instead)')
+    parser.add_argument('--layout-probe', metavar='PROBE',
+                        help='also write a C++ program to PROBE that prints '
+                        'a D module of static asserts checking the size, '
+                        'alignment and field offsets of every emitted type')
+    parser.add_argument('--probe-include', default='opennurbs.h',
+                        help='header for the --layout-probe program to '
+                        'include')
+    parser.add_argument('--batch', action='store_true',
+                        help="don't stop at unsupported constructs: record "
+                        'each one, stub out or skip its declaration, and '
+                        'report them all at the end')
+    parser.add_argument('--batch-report', metavar='REPORT',
+                        help='with --batch, write the unsupported constructs '
+                        'to REPORT as JSON, grouped by what went wrong')
+    parser.add_argument('--no-native-bodies', action='store_true',
+                        help='declare every method extern, instead of '
+                        'translating simple inline bodies into D')
+    parser.add_argument('--nogc', action='store_true',
+                        help='mark every method and constructor @nogc')
+    parser.add_argument('--infer-nothrow', action='store_true',
+                        help='also mark methods nothrow where the rules '
+                        'allow it, not just the noexcept ones')
+    parser.add_argument('--nothrow-rules', metavar='RULES', action='append',
+                        default=[],
+                        help='"allow [const|accessor] PATTERN" and "deny '
+                        '[const|accessor] PATTERN" lines to check after the '
+                        'default rules (implies --infer-nothrow)')
+    parser.add_argument('--profile', metavar='REPORT',
+                        help='write per-stage and per-class timings to '
+                        'REPORT as JSON')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='also trace memory per stage and class (slower)')
+    parser.add_argument('--profile-top', type=int, default=20,
+                        help='how many of the slowest classes to report')
+    parser.add_argument('--cprofile', metavar='STATS',
+                        help='run under cProfile, saving the stats to STATS')
+    return parser
 
 if __name__ == '__main__':
-    file_ = sys.stdout
-
-    ############################################################################
-    # parse the file and do a little setup
+    args = make_arg_parser().parse_args()
+    interactive = not args.batch
 
-    parsed = parse_file('filtered.cpp')
+    profiler = None
+    if args.profile:
+        profiler = Profiler(args.profile_memory)
 
-    # set up metadata for all classes... keep track of things that
-    # can't be sorted out in a single pass over the parse tree
-    for cls in parsed.namespace.classes:
-        class_name = get_class_name(cls)
-        assert class_name not in class_metadata
-        class_metadata[class_name] = ClassMetadata(cls)
-
-        # if class_name == 'ON_3dmObjectAttributes':
-        #     import ipdb; ipdb.set_trace()
-        # if class_name != get_class_name(class_metadata[class_name].cls):
-        #     import ipdb; ipdb.set_trace()
-        #     _ = get_class_name(cls)
-        #     get_class_name(class_metadata[_])
-
-    # quick sanity check
-    for class_name, metadata in class_metadata.items():
-        if class_name != get_class_name(metadata.cls):
-            import ipdb; ipdb.set_trace()
-            pass
-        assert class_name == get_class_name(metadata.cls)
+    if args.cprofile:
+        import cProfile
+        cprofiler = cProfile.Profile()
+        cprofiler.enable()
 
-    # figure out which classes are actually interfaces (have no member fields)
-    for class_name, metadata in class_metadata.items():
-        metadata.is_interface = should_class_be_interface(metadata)
+    if args.package_dir and args.check_serial:
+        sys.exit('cpp2d: --check-serial only works for single module output')
 
-    # any class with 
-        
-    # figure out which classes have children (are inherited from)
-    for cls in parsed.namespace.classes:
-        base_cls = find_base_class(cls)
-        if base_cls is None:
-            continue
-        base_cls_name = get_class_name(base_cls)
-        class_metadata[base_cls_name].has_children = True
+    if args.stream and (args.package_dir or args.check_serial or
+                        args.incremental or args.jobs > 1 or args.roots or
+                        args.roots_from or args.layout_probe):
+        sys.exit('cpp2d: --stream only works for serial, unpruned, single '
+                 'module output without --incremental or --layout-probe')
 
-    ############################################################################
-    # start emitting the wrapper
-
-    newline()
-
-    for using in parsed.namespace.using_alias:
-        newline()
-        assert using.access is None
-        assert using.template is None
-        output(f'alias {using.alias} = ')
-        output_type(using.type)
-        output(';')
-
-    for typedef in parsed.namespace.typedefs:
-        newline()
-        assert typedef.access is None
-        output(f'alias {typedef.name} = ')
-        output_type(typedef.type)
-        output(';')
-
-    for enum in parsed.namespace.enums:
-        newline()
-        output_enum(enum)
-
-    for cls in parsed.namespace.classes:
-        newline()
-        output_class(cls)
+    if args.output and not args.package_dir:
+        file_, tmp_output = open_temp_output(args.output)
+    else:
+        file_ = sys.stdout
+    translator = Translator(Emitter(file_))
+    translator.profiler = profiler
+    translator.native_bodies = not args.no_native_bodies
+    translator.nogc = args.nogc
+    translator.batch = args.batch
+    if args.infer_nothrow or args.nothrow_rules:
+        translator.nothrow_rules = NothrowRules()
+        for path in args.nothrow_rules:
+            with open(path, encoding='utf-8') as f:
+                try:
+                    translator.nothrow_rules.add_rules(f.read(), path)
+                except ValueError as e:
+                    sys.exit(f'cpp2d: {e}')
+
+    cache = DiskCache(args.cache_dir, args.cache_size*1024*1024,
+                      enabled=not args.no_cache and not args.check_serial)
+    if args.clear_cache:
+        cache.clear()
+
+    if args.driver:
+        with profile_stage(profiler, 'preprocess'):
+            try:
+                text = preprocess(args.driver, args.include_dirs,
+                                  args.header, args.clang)
+            except PreprocessError as e:
+                sys.exit(f'cpp2d: {e}')
+    else:
+        with profile_stage(profiler, 'read'):
+            with open(args.input, encoding='utf-8-sig') as f:
+                text = f.read()
+
+    if args.clang_format:
+        with profile_stage(profiler, 'clang-format'):
+            try:
+                text = format_source(text)
+            except PreprocessError as e:
+                sys.exit(f'cpp2d: {e}')
+
+    if args.save_input:
+        with open(args.save_input, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    d_header = None
+    if args.d_header:
+        with open(args.d_header, encoding='utf-8') as f:
+            d_header = f.read()
+
+    roots = None
+    if args.roots or args.roots_from:
+        roots = set(args.roots) | read_root_identifiers(args.roots_from)
+    follow_indirect = not args.opaque_indirect
+
+    # the parsed chunks as emitted (i.e. after pruning)
+    emitted_chunks = []
+    def translate(jobs):
+        emitted_chunks[:] = output_translation(
+            translator, text, cache, args.incremental, jobs, roots,
+            follow_indirect)
+
+    if args.package_dir:
+        emitted_chunks = output_modules(
+            translator, text, cache, args.package_dir, args.package,
+            d_header, args.incremental, args.jobs, roots, follow_indirect)
+    elif args.stream:
+        if d_header is not None:
+            translator.output(d_header)
+        output_streaming(translator, text, cache)
+    elif args.check_serial:
+        if d_header is not None:
+            translator.output(d_header)
+        result = translator.capture(translate, args.jobs)
+        # (and report what the first run found, not both)
+        num_diagnostics = len(translator.diagnostics.records)
+        expected = translator.capture(translate, 1)
+        translator.diagnostics.take(num_diagnostics)
+        if result != expected:
+            sys.exit(f'cpp2d: output with --jobs {args.jobs} differs from '
+                     'serial output')
+        translator.output(result)
+    else:
+        if d_header is not None:
+            translator.output(d_header)
+        translate(args.jobs)
+
+    if args.layout_probe:
+        with profile_stage(profiler, 'layout probe'):
+            namespace = merge_namespaces(_.namespace for _ in emitted_chunks)
+            write_if_changed(args.layout_probe, make_layout_probe(
+                translator, namespace, args.probe_include,
+                args.package if args.package_dir else 'opennurbs'))
+
+    with profile_stage(profiler, 'write'):
+        translator.emitter.flush()
+        file_.close()
+        if args.output and not args.package_dir:
+            replace_if_changed(tmp_output, args.output)
+
+    if args.batch:
+        for line in translator.diagnostics.summarize():
+            print(f'cpp2d: {line}', file=sys.stderr)
+        if args.batch_report:
+            translator.diagnostics.write_report(args.batch_report)
+
+    if args.cprofile:
+        cprofiler.disable()
+        cprofiler.dump_stats(args.cprofile)
+
+    if profiler is not None:
+        # (parse and emit lookups, in the parent and the workers)
+        profiler.count('disk cache', hits=cache.hits, misses=cache.misses)
+        profiler.count('type cache', hits=translator.type_cache_hits,
+                       misses=translator.type_cache_misses)
+        profiler.write_report(args.profile, args.profile_top)
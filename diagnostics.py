@@ -0,0 +1,97 @@
+import json
+import os
+import traceback
+
+# Unsupported constructs collected by cpp2d.py --batch. Instead of
+# dropping into the debugger (or dying on an assert) at the first one,
+# each gets recorded along with where it came from, the declaration it
+# was in gets stubbed out or skipped, and everything is reported at
+# the end, grouped by what went wrong.
+
+class Unsupported(Exception):
+    pass
+
+def describe_error(e):
+    # what went wrong, in a form that's the same for every occurrence
+    # of the same problem (so that they group together), and where in
+    # the translator it was noticed
+    frames = traceback.extract_tb(e.__traceback__)
+    if isinstance(e, Unsupported):
+        # (the frame that called unsupported(), not unsupported itself)
+        frames = frames[:-1]
+    frame = frames[-1] if frames else None
+    origin = None if frame is None else \
+        f'{os.path.basename(frame.filename)}:{frame.lineno}'
+    if isinstance(e, Unsupported):
+        what = str(e)
+    elif isinstance(e, AssertionError) and frame is not None and frame.line:
+        what = frame.line
+    else:
+        what = f'{type(e).__name__}: {e}'
+    return what, origin
+
+def format_location(location):
+    if location is None:
+        return None
+    return f'{location.filename}:{location.lineno}'
+
+class Diagnostics:
+    def __init__(self):
+        self.records = []
+
+    def add(self, what, origin=None, class_name=None, method_name=None,
+            location=None, skipped=None):
+        self.records.append({
+            'what': what,
+            'class': class_name,
+            'method': method_name,
+            'location': format_location(location),
+            'origin': origin,
+            'skipped': skipped,
+        })
+        return self.records[-1]
+
+    def record(self, e, **where):
+        what, origin = describe_error(e)
+        return self.add(what, origin, **where)
+
+    def take(self, start=0):
+        # hand back (and forget) the records since start, e.g. so a
+        # worker can send them to the parent
+        records = self.records[start:]
+        del self.records[start:]
+        return records
+
+    def report(self, examples=None):
+        groups = dict()
+        for record in self.records:
+            groups.setdefault(record['what'], []).append(record)
+        # biggest groups first, ties in order of first appearance
+        ordered = sorted(groups.items(), key=lambda _: -len(_[1]))
+        return {
+            'count': len(self.records),
+            'groups': [{'what': what, 'count': len(records),
+                        'origin': records[0]['origin'],
+                        'occurrences': [{k: v for k, v in _.items()
+                                         if k not in {'what', 'origin'}}
+                                        for _ in records[:examples]]}
+                       for what, records in ordered],
+        }
+
+    def write_report(self, path, examples=None):
+        with open(path, 'w') as f:
+            json.dump(self.report(examples), f, indent=2)
+            f.write('\n')
+
+    def summarize(self, top=10):
+        # a few lines for stderr
+        report = self.report(examples=1)
+        groups = report['groups']
+        lines = [f'{report["count"]} unsupported constructs in '
+                 f'{len(groups)} groups']
+        for group in groups[:top]:
+            lines.append(f'  {group["count"]:5} {group["what"]} '
+                         f'({group["origin"]})')
+        if len(groups) > top:
+            lines.append(f'  ... and {len(groups) - top} more groups')
+        return lines
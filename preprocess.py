@@ -0,0 +1,62 @@
+import subprocess
+
+# In-process replacement for the clang++ | sed | clang-format | cat
+# chain that run.sh used to run over filtered.cpp. The preprocessor's
+# output is streamed line by line, only the part between the
+# __BEGIN_TARGET__ and __END_TARGET__ markers (see driver.cpp) is
+# kept, and header.cpp is stuck on the front, all without touching
+# the disk.
+
+begin_target = '__BEGIN_TARGET__'
+end_target = '__END_TARGET__'
+
+class PreprocessError(Exception):
+    pass
+
+def run_preprocessor(driver, include_dirs=(), defines=('D_WRAP',),
+                     clang='clang++'):
+    # NOTE: no -P: the line markers are how cpp2d.py splits the input
+    # back up into per-header chunks
+    command = [clang, '-E', '-CC']
+    command += [f'-D{_}' for _ in defines]
+    command += [f'-I{_}' for _ in include_dirs]
+    command.append(driver)
+    proc = subprocess.Popen(command, stdout=subprocess.PIPE, text=True,
+                            encoding='utf-8', errors='replace')
+    try:
+        yield from proc.stdout
+    finally:
+        proc.stdout.close()
+        returncode = proc.wait()
+    if returncode != 0:
+        raise PreprocessError(f'{" ".join(command)} exited with {returncode}')
+
+def extract_target(lines):
+    # same as the sed script this replaces: keep every line between a
+    # begin marker and the next end marker, but not the markers
+    # themselves
+    in_target = False
+    for line in lines:
+        if not in_target:
+            in_target = begin_target in line
+        elif end_target in line:
+            in_target = False
+        else:
+            yield line
+
+def format_source(text, clang_format='clang-format'):
+    result = subprocess.run([clang_format, '--assume-filename=filtered.cpp'],
+                            input=text, capture_output=True, text=True,
+                            encoding='utf-8')
+    if result.returncode != 0:
+        raise PreprocessError(f'{clang_format} failed:\n{result.stderr}')
+    return result.stdout
+
+def preprocess(driver, include_dirs=(), header=None, clang='clang++'):
+    parts = []
+    if header is not None:
+        with open(header, encoding='utf-8') as f:
+            parts.append(f.read())
+    parts.extend(extract_target(run_preprocessor(driver, include_dirs,
+                                                 clang=clang)))
+    return ''.join(parts)
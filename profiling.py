@@ -0,0 +1,184 @@
+import contextlib
+import heapq
+import json
+import resource
+import time
+import tracemalloc
+
+# Wall time for each stage of a regeneration, plus the time spent
+# emitting each top-level class. With trace_memory (--profile-memory),
+# memory per stage and per class too, traced with tracemalloc (which
+# makes everything a few times slower, hence not by default): how far
+# above where it started the stage's (or class's) Python heap peaked,
+# and how much of that a stage kept.
+# --jobs workers trace their own, and the biggest peak of any of them
+# during a stage gets reported with it. Child processes (clang,
+# clang-format, workers) aren't traced, but their max RSS shows up for
+# a stage if one of them was the biggest child yet.
+
+def get_children_max_rss():
+    return resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+
+def start_tracing():
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+def get_traced_kib():
+    return tracemalloc.get_traced_memory()[0]//1024
+
+def take_peak_kib():
+    # the peak since the last call (0 if not tracing)
+    peak = tracemalloc.get_traced_memory()[1]
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+    return peak//1024
+
+def start_peak():
+    # for a task in a worker: start measuring how far above where it
+    # is now the heap peaks (as returned by get_peak_since)
+    take_peak_kib()
+    return get_traced_kib()
+
+def get_peak_since(start_kib):
+    return max(take_peak_kib() - start_kib, 0)
+
+class Profiler:
+    def __init__(self, trace_memory=False):
+        self.stages = []
+        self.class_times = []
+        self.counters = dict()
+        self.trace_memory = trace_memory
+        # the memory use of each stage in progress (stages can nest, and
+        # an outer stage's peak covers those inside it)
+        self.memory = []
+        if trace_memory:
+            start_tracing()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        self.start_stage_memory()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.add_stage(name, seconds, **self.end_stage_memory())
+
+    def start_memory(self, **memory):
+        # (taking the peak resets it, so whatever it was so far goes to
+        # the stage or class this one is inside of)
+        peak_kib = take_peak_kib()
+        if self.memory:
+            outer = self.memory[-1]
+            outer['peak'] = max(outer['peak'], peak_kib)
+        self.memory.append({'start': get_traced_kib(), 'peak': 0, **memory})
+
+    def end_memory(self):
+        # the memory use of what's ending, and its peak
+        memory = self.memory.pop()
+        peak_kib = max(memory['peak'], take_peak_kib())
+        if self.memory:
+            outer = self.memory[-1]
+            outer['peak'] = max(outer['peak'], peak_kib)
+        return memory, peak_kib
+
+    def start_stage_memory(self):
+        if self.trace_memory:
+            self.start_memory(workers_peak=None,
+                              children=get_children_max_rss())
+
+    def end_stage_memory(self):
+        if not self.trace_memory:
+            return {}
+        memory, peak_kib = self.end_memory()
+        if memory['workers_peak'] is not None:
+            self.add_worker_peak(memory['workers_peak'])
+        result = {'peak_kib': peak_kib - memory['start'],
+                  'retained_kib': get_traced_kib() - memory['start']}
+        if memory['workers_peak'] is not None:
+            result['workers_peak_kib'] = memory['workers_peak']
+        children = get_children_max_rss()
+        if children > memory['children']:
+            result['children_max_rss_kib'] = children
+        return result
+
+    def add_stage(self, name, seconds, **memory):
+        self.stages.append({'name': name, 'seconds': seconds, **memory})
+
+    def add_worker_peak(self, peak_kib):
+        # (from a worker, during the current stage)
+        if self.memory:
+            memory = self.memory[-1]
+            memory['workers_peak'] = peak_kib \
+                if memory['workers_peak'] is None \
+                else max(memory['workers_peak'], peak_kib)
+
+    @contextlib.contextmanager
+    def time_class(self, name):
+        # (and its peak memory, if tracing it)
+        if self.trace_memory:
+            self.start_memory()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            peak_kib = None
+            if self.trace_memory:
+                memory, peak_kib = self.end_memory()
+                peak_kib -= memory['start']
+            self.class_times.append((seconds, name, peak_kib))
+
+    def start_worker_memory(self):
+        # for a task in a worker, whose peak memory take_worker_memory
+        # then returns
+        if self.trace_memory:
+            self.start_memory()
+
+    def take_worker_memory(self):
+        if not self.trace_memory:
+            return 0
+        memory, peak_kib = self.end_memory()
+        return max(peak_kib - memory['start'], 0)
+
+    def count(self, name, **counts):
+        self.counters[name] = counts
+
+    def report(self, top=20):
+        slowest = heapq.nlargest(top, self.class_times,
+                                 key=lambda _: _[0])
+        classes = {
+            'count': len(self.class_times),
+            'total_seconds': sum(_[0] for _ in self.class_times),
+            'slowest': [get_class_entry(*_) for _ in slowest],
+        }
+        if self.trace_memory:
+            largest = heapq.nlargest(top, self.class_times,
+                                     key=lambda _: _[2] or 0)
+            classes['largest'] = [get_class_entry(*_) for _ in largest]
+        return {
+            'stages': self.stages,
+            'classes': classes,
+            'counters': self.counters,
+        }
+
+    def write_report(self, path, top=20):
+        with open(path, 'w') as f:
+            json.dump(self.report(top), f, indent=2)
+            f.write('\n')
+
+def get_class_entry(seconds, name, peak_kib):
+    entry = {'name': name, 'seconds': seconds}
+    if peak_kib is not None:
+        entry['peak_kib'] = peak_kib
+    return entry
+
+def profile_stage(profiler, name):
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.stage(name)
+
+def profile_class(profiler, name):
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.time_class(name)
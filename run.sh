@@ -3,28 +3,72 @@
 HEADER_CPP=header.cpp
 HEADER_D=header.d
 DRIVER=driver.cpp
-INPUT=filtered.cpp
 OUTPUT=opennurbs.d
 OPENNURBS_PATH=../opennurbs
+JOBS=${JOBS:-$(nproc)}
 
-clang++ -DD_WRAP -I$OPENNURBS_PATH -E -P -CC $DRIVER > $INPUT
+# Set PROFILE_DIR to time each stage of the regeneration (see
+# profiling.py). The report ends up in $PROFILE_DIR/profile.json, and
+# cProfile stats for cpp2d.py in $PROFILE_DIR/cpp2d.prof. Set
+# PROFILE_MEMORY=1 to also trace memory per stage and class (slower).
+if [ -n "$PROFILE_DIR" ]; then
+    mkdir -p $PROFILE_DIR
+    PROFILE_ARGS="--profile $PROFILE_DIR/profile.json --cprofile $PROFILE_DIR/cpp2d.prof"
+    if [ -n "$PROFILE_MEMORY" ]; then
+        PROFILE_ARGS="$PROFILE_ARGS --profile-memory"
+    fi
+fi
 
-sed --in-place -n -f - $INPUT <<'EOF'
-/__BEGIN_TARGET__/,/__END_TARGET__/{
-    /__BEGIN_TARGET__/b
-    /__END_TARGET__/b
-    p
-}
-EOF
+# cxxheaderparser doesn't need its input to be formatted, but set
+# CLANG_FORMAT=1 to run clang-format over it anyway (e.g. to make
+# parse errors easier to read), and KEEP_INPUT=1 to save the
+# preprocessed input to filtered.cpp.
+if [ -n "$CLANG_FORMAT" ]; then
+    FORMAT_ARGS=--clang-format
+fi
+if [ -n "$KEEP_INPUT" ]; then
+    SAVE_ARGS="--save-input filtered.cpp"
+fi
 
-clang-format -i $INPUT
+# Set ROOTS_FROM to a D program (e.g. example_brep.d) to only emit
+# the declarations it can reach, with opaque stubs for everything else.
+if [ -n "$ROOTS_FROM" ]; then
+    ROOTS_ARGS="--roots-from $ROOTS_FROM --opaque-indirect"
+fi
 
-TMP=$(mktemp)
-cat $HEADER_CPP $INPUT > $TMP
-mv $TMP $INPUT
+# Set SPLIT_MODULES=1 to write one D module per header into
+# opennurbs/ (plus opennurbs/package.d) instead of opennurbs.d.
+OUTPUT_ARGS="-o $OUTPUT"
+if [ -n "$SPLIT_MODULES" ]; then
+    OUTPUT_ARGS="--package-dir opennurbs"
+fi
 
-./cpp2d.py > $OUTPUT
+# Set LAYOUT_PROBE=1 to also check the layouts of the D types against
+# the C++ ones. The probe prints opennurbs_layout.d, a module of static
+# asserts which fails to compile if any size or offset is off.
+if [ -n "$LAYOUT_PROBE" ]; then
+    PROBE_ARGS="--layout-probe layout_probe.cpp"
+fi
 
-TMP=$(mktemp)
-cat $HEADER_D $OUTPUT > $TMP
-mv $TMP $OUTPUT
+# Set NOGC=1 to mark the bindings @nogc, and nothrow wherever OpenNURBS
+# conventions say they can't throw (see NothrowRules in cpp2d.py), so
+# that they can be called from @nogc nothrow code. Set NOTHROW_RULES
+# to a file of extra "allow PATTERN"/"deny PATTERN" lines.
+if [ -n "$NOGC" ]; then
+    ATTRIBUTE_ARGS="--nogc --infer-nothrow"
+fi
+if [ -n "$NOTHROW_RULES" ]; then
+    ATTRIBUTE_ARGS="$ATTRIBUTE_ARGS --nothrow-rules $NOTHROW_RULES"
+fi
+
+# cpp2d.py runs the preprocessor itself, keeps only the target region
+# of driver.cpp, and puts header.cpp in front of it, all in memory
+./cpp2d.py --driver $DRIVER -I $OPENNURBS_PATH --header $HEADER_CPP \
+    --d-header $HEADER_D --incremental --jobs $JOBS \
+    $FORMAT_ARGS $SAVE_ARGS $ROOTS_ARGS $PROFILE_ARGS $OUTPUT_ARGS $PROBE_ARGS \
+    $ATTRIBUTE_ARGS || exit
+
+if [ -n "$LAYOUT_PROBE" ]; then
+    clang++ -DD_WRAP -I $OPENNURBS_PATH -o layout_probe layout_probe.cpp &&
+        ./layout_probe > opennurbs_layout.d
+fi
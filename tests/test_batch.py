@@ -0,0 +1,58 @@
+# --batch has to get through anything it doesn't understand, recording
+# it and leaving out (or stubbing) what it affects, instead of crashing.
+#
+#   $ python -m pytest tests
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.dirname(tests_dir)
+sys.path.insert(0, repo_dir)
+
+import cpp2d
+from diagnostics import Unsupported
+
+source = '''\
+typedef struct { int x; } Anon;
+class X : public Unknown { public: int a; };
+class Z : public X { public: int z; };
+class Y { public: int y; };
+'''
+
+def test_batch_skips_classes_it_cant_place():
+    translator = cpp2d.Translator()
+    translator.batch = True
+    d_source = translator.translate(cpp2d.parse_source(source))
+    what = [_['what'] for _ in translator.diagnostics.records]
+    assert 'anonymous class' in what
+    assert 'unknown base class Unknown' in what
+    # (and so Z, whose base class got left out)
+    assert 'unknown base class X' in what
+    skipped = {_['class'] for _ in translator.diagnostics.records
+               if _['skipped'] == 'class'}
+    assert skipped == {None, 'X', 'Z'}
+    assert 'struct Y {' in d_source
+    assert ' X ' not in d_source and ' Z ' not in d_source
+
+def test_without_batch_raises():
+    with pytest.raises(Unsupported):
+        cpp2d.Translator().translate(cpp2d.parse_source(
+            'class X : public Unknown { public: int a; };\n'))
+
+@pytest.mark.parametrize('args', [[], ['--stream'], ['-j', '2'],
+                                  ['--incremental']])
+def test_batch_command_line(tmp_path, args):
+    input_ = tmp_path / 'input.h'
+    input_.write_text(source)
+    output = tmp_path / 'out.d'
+    result = subprocess.run(
+        [sys.executable, os.path.join(repo_dir, 'cpp2d.py'), str(input_),
+         '-o', str(output), '--cache-dir', str(tmp_path / 'cache'),
+         '--batch', *args], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert 'unknown base class Unknown' in result.stderr
+    assert 'struct Y {' in output.read_text()
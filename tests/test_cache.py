@@ -0,0 +1,55 @@
+# The disk cache only walks its directory once per run, however many
+# entries get written, including by --jobs workers.
+#
+#   $ python -m pytest tests
+
+import os
+import pickle
+import sys
+
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.dirname(tests_dir)
+sys.path.insert(0, repo_dir)
+
+from cache import DiskCache, make_key
+
+def count_walks(monkeypatch):
+    walks = []
+    entries = DiskCache.entries
+    def counting_entries(self):
+        walks.append(self.path)
+        return entries(self)
+    monkeypatch.setattr(DiskCache, 'entries', counting_entries)
+    return walks
+
+def test_puts_walk_once(tmp_path, monkeypatch):
+    walks = count_walks(monkeypatch)
+    cache = DiskCache(str(tmp_path), 1 << 20)
+    for i in range(20):
+        cache.put(make_key(str(i)), i)
+    assert len(walks) == 1
+    assert cache.get(make_key('3')) == 3
+
+def test_worker_puts_dont_walk(tmp_path, monkeypatch):
+    walks = count_walks(monkeypatch)
+    cache = DiskCache(str(tmp_path), 1 << 20)
+    # (each task gets its own pickled copy, as with ProcessPoolExecutor)
+    worker_cache = cache.get_worker_cache()
+    written = 0
+    for i in range(20):
+        task_cache = pickle.loads(pickle.dumps(worker_cache))
+        task_cache.put(make_key(str(i)), i)
+        written += task_cache.written_bytes
+    cache.add_written(written)
+    assert len(walks) == 1 # (in get_worker_cache)
+    assert cache.total_bytes == sum(size for _, size, _ in cache.entries())
+
+def test_workers_leave_eviction_to_the_parent(tmp_path):
+    cache = DiskCache(str(tmp_path), 4096)
+    worker_cache = cache.get_worker_cache()
+    for i in range(20):
+        worker_cache.put(make_key(str(i)), bytes(1024))
+    assert len(cache.entries()) == 20
+    cache.add_written(worker_cache.written_bytes)
+    assert cache.total_bytes <= 4096*3//4
+    assert cache.total_bytes == sum(size for _, size, _ in cache.entries())
@@ -0,0 +1,85 @@
+# Splitting the preprocessed input into one chunk per header, and
+# falling back to the whole input when a chunk doesn't parse on its own.
+#
+#   $ python -m pytest tests
+
+import os
+import sys
+
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.dirname(tests_dir)
+sys.path.insert(0, repo_dir)
+
+import cpp2d
+from diagnostics import Diagnostics
+
+def no_cache():
+    return cpp2d.DiskCache(None, 0, enabled=False)
+
+def test_braces_in_comments_and_literals_dont_count():
+    # (clang -CC keeps comments)
+    text = '''\
+# 1 "a.h"
+// example: if (x) {
+/* a block comment with a { in it
+   over two lines */
+const char *open = "{";
+const char close = '}';
+class A { int a; };
+# 1 "b.h"
+class B { int b; };
+# 1 "c.h"
+class C { int c; };
+'''
+    chunks = cpp2d.split_chunks(text)
+    assert [name for name, _ in chunks] == ['a.h', 'b.h', 'c.h']
+
+def test_declaration_spanning_headers_stays_in_one_chunk():
+    text = '''\
+# 1 "a.h"
+class A {
+# 1 "b.h"
+  int b;
+# 3 "a.h"
+};
+# 1 "c.h"
+class C { int c; };
+'''
+    chunks = cpp2d.split_chunks(text)
+    assert [name for name, _ in chunks] == ['a.h', 'c.h']
+
+# neither half parses on its own, but together they're a typedef
+split_typedef = '''\
+# 1 "a.h"
+typedef unsigned int
+# 1 "b.h"
+MyInt;
+class A { MyInt a; };
+'''
+
+def test_falls_back_to_whole_input():
+    chunks = cpp2d.split_chunks(split_typedef)
+    assert len(chunks) == 2
+    chunks, parsed_chunks = cpp2d.parse_chunks_or_whole(
+        chunks, split_typedef, no_cache())
+    assert [name for name, _ in chunks] == [cpp2d.prologue_chunk_name]
+    namespace = parsed_chunks[0].namespace
+    assert [_.name for _ in namespace.typedefs] == ['MyInt']
+
+def test_batch_falls_back_to_whole_input():
+    # instead of leaving out the chunks that don't parse
+    diagnostics = Diagnostics()
+    chunks, parsed_chunks = cpp2d.parse_chunks_or_whole(
+        cpp2d.split_chunks(split_typedef), split_typedef, no_cache(),
+        diagnostics=diagnostics)
+    assert diagnostics.records == []
+    assert [_.name for _ in parsed_chunks[0].namespace.typedefs] == ['MyInt']
+
+def test_batch_records_what_doesnt_parse_at_all():
+    text = split_typedef + '# 1 "c.h"\nclass { oops\n'
+    diagnostics = Diagnostics()
+    chunks, parsed_chunks = cpp2d.parse_chunks_or_whole(
+        cpp2d.split_chunks(text), text, no_cache(), diagnostics=diagnostics)
+    assert len(diagnostics.records) == 1
+    assert diagnostics.records[0]['what'].startswith('parse error')
+    assert parsed_chunks[0].namespace.classes == []
@@ -0,0 +1,53 @@
+# Compiles the D side against bindings generated from the benchmark
+# corpus (bench/corpus/opennurbs_subset.cpp): header.d (InlineClass,
+# ArrayStorage, ClassInstanceSlice, cppRefMangle, rvalue), std_.d,
+# brep_topology.d and the binding benchmarks. Nothing gets linked, so
+# OpenNURBS itself isn't needed, but dmd or ldc2 is; without one this
+# is skipped (CI installs ldc2, see .github/workflows/tests.yml).
+#
+#   $ python -m pytest tests
+
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.dirname(tests_dir)
+corpus = os.path.join(repo_dir, 'bench', 'corpus', 'opennurbs_subset.cpp')
+
+def find_d_compiler():
+    return shutil.which(os.environ.get('DC', 'ldc2')) or shutil.which('ldc2') \
+        or shutil.which('dmd')
+
+# each program separately, since each has its own main
+programs = [
+    ['brep_topology.d'],
+    ['brep_topology.d', os.path.join('bench', 'bench_brep_topology.d')],
+    ['bench_bindings.d'],
+]
+
+@pytest.fixture(params=[[], ['--nogc', '--infer-nothrow']],
+                ids=['default', 'nogc'])
+def bindings(request, tmp_path):
+    d_compiler = find_d_compiler()
+    if d_compiler is None:
+        pytest.skip('no D compiler')
+    subprocess.run([sys.executable, os.path.join(repo_dir, 'cpp2d.py'),
+                    corpus, '--no-cache', '-o', str(tmp_path / 'opennurbs.d'),
+                    '--d-header', os.path.join(repo_dir, 'header.d'),
+                    *request.param],
+                   check=True, capture_output=True)
+    return d_compiler, tmp_path
+
+@pytest.mark.parametrize('sources', programs, ids=lambda _: _[-1])
+def test_compiles(bindings, sources):
+    d_compiler, tmp_path = bindings
+    result = subprocess.run(
+        [d_compiler, '-o-', f'-I{tmp_path}', f'-I{repo_dir}',
+         str(tmp_path / 'opennurbs.d'), os.path.join(repo_dir, 'std_.d'),
+         *[os.path.join(repo_dir, _) for _ in sources]],
+        capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
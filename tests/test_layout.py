@@ -0,0 +1,132 @@
+# Checks the layouts of the D bindings against C++, the way run.sh's
+# LAYOUT_PROBE=1 does, but on a small header of its own that has the
+# shapes that have gone wrong before: array classes held by value
+# inside other classes (e.g. ON_BrepFace's m_li, ON_Brep's m_V) and
+# arrays of class objects. The C++ side needs a C++ compiler, and
+# checking the D side needs dmd or ldc2; whatever's missing gets
+# skipped.
+#
+#   $ python -m pytest tests
+
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.dirname(tests_dir)
+
+layout_header = '''\
+template <class T> class Array {
+public:
+  Array();
+  virtual ~Array();
+  int Count() const;
+  T &operator[](int);
+protected:
+  T *m_a;
+  int m_count;
+  int m_capacity;
+};
+
+class IntArray : public Array<int> {
+public:
+  IntArray();
+};
+
+class Component {
+public:
+  Component();
+  virtual ~Component();
+  int m_index;
+};
+
+class Face : public Component {
+public:
+  Face();
+  Array<int> m_li;
+  int m_si;
+  bool m_bRev;
+};
+
+class FaceArray : public Array<Face> {
+public:
+  FaceArray();
+};
+
+class Mesh {
+public:
+  Mesh();
+  IntArray m_vertices;
+  Array<double> m_normals;
+  char m_tag;
+  FaceArray m_faces;
+};
+'''
+
+def find_cxx():
+    return shutil.which(os.environ.get('CXX', 'c++')) or shutil.which('g++') \
+        or shutil.which('clang++')
+
+def find_d_compiler():
+    return shutil.which('ldc2') or shutil.which('dmd')
+
+@pytest.fixture
+def probe(tmp_path):
+    # the bindings, and the D module of static asserts the probe prints
+    cxx = find_cxx()
+    if cxx is None:
+        pytest.skip('no C++ compiler')
+    header = tmp_path / 'layout.h'
+    header.write_text(layout_header)
+    subprocess.run([sys.executable, os.path.join(repo_dir, 'cpp2d.py'),
+                    str(header), '--no-cache', '-o',
+                    str(tmp_path / 'opennurbs.d'),
+                    '--d-header', os.path.join(repo_dir, 'header.d'),
+                    '--layout-probe', str(tmp_path / 'layout_probe.cpp'),
+                    '--probe-include', str(header)],
+                   check=True, capture_output=True)
+    subprocess.run([cxx, '-std=c++17', '-o', str(tmp_path / 'layout_probe'),
+                    str(tmp_path / 'layout_probe.cpp')],
+                   check=True, capture_output=True)
+    layout = subprocess.run([str(tmp_path / 'layout_probe')], check=True,
+                            capture_output=True, text=True).stdout
+    (tmp_path / 'opennurbs_layout.d').write_text(layout)
+    return tmp_path, layout
+
+def get_expected(layout, d_expr):
+    match = re.search(rf'static assert\({re.escape(d_expr)} == (\d+)', layout)
+    assert match is not None, f'no check for {d_expr}'
+    return int(match.group(1))
+
+def test_probe_checks_members_held_by_value(probe):
+    _, layout = probe
+    # every member, and the size of everything that gets stored by
+    # value or in arrays
+    for d_expr in ['Face.m_li.offsetof', 'Face.m_si.offsetof',
+                   'Face.m_bRev.offsetof', 'Mesh.m_vertices.offsetof',
+                   'Mesh.m_normals.offsetof', 'Mesh.m_tag.offsetof',
+                   'Mesh.m_faces.offsetof', 'InlineClass!(Face).sizeof',
+                   'InlineClass!(IntArray).sizeof', 'Mesh.sizeof']:
+        get_expected(layout, d_expr)
+    # (sanity check the C++ side: an array object is a vtable pointer,
+    # a pointer and two ints)
+    assert get_expected(layout, 'Mesh.m_normals.offsetof') - \
+        get_expected(layout, 'Mesh.m_vertices.offsetof') == \
+        get_expected(layout, 'InlineClass!(IntArray).sizeof') == 24
+
+def test_d_layout_matches_cxx(probe):
+    tmp_path, _ = probe
+    d_compiler = find_d_compiler()
+    if d_compiler is None:
+        pytest.skip('no D compiler')
+    # compiling the static asserts is the check
+    result = subprocess.run(
+        [d_compiler, '-o-', f'-I{repo_dir}', str(tmp_path / 'opennurbs.d'),
+         str(tmp_path / 'opennurbs_layout.d'),
+         os.path.join(repo_dir, 'std_.d')],
+        capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
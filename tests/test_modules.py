@@ -0,0 +1,74 @@
+# --package-dir: one D module per header, each importing the modules
+# whose names it uses, plus a package.d importing all of them, with the
+# same declarations between them as the single module output.
+#
+#   $ python -m pytest tests
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.dirname(tests_dir)
+sys.path.insert(0, repo_dir)
+
+import cpp2d
+
+corpus = os.path.join(repo_dir, 'bench', 'corpus', 'opennurbs_subset.cpp')
+
+def run_cpp2d(tmp_path, *args):
+    subprocess.run([sys.executable, os.path.join(repo_dir, 'cpp2d.py'),
+                    corpus, '--cache-dir', str(tmp_path / 'cache'), *args],
+                   check=True, capture_output=True)
+
+def write_package(tmp_path, *args, name='package'):
+    package_dir = tmp_path / name
+    run_cpp2d(tmp_path, '--package-dir', str(package_dir), *args)
+    return {_.name: _.read_text() for _ in sorted(package_dir.iterdir())}
+
+def get_declarations(text):
+    # (blank lines aside)
+    return {name: declaration.strip() for name, declaration
+            in cpp2d.split_declarations(text).items()
+            if not name.startswith(('module ', 'import ', 'public import '))}
+
+def test_one_module_per_header(tmp_path):
+    modules = write_package(tmp_path, '--no-cache')
+    assert 'brep.d' in modules and 'point.d' in modules
+    assert modules['brep.d'].startswith('module opennurbs.brep;\n')
+    # (what it refers to, but not what it doesn't)
+    assert 'import opennurbs.surfaceproxy;' in modules['brep.d']
+    assert 'import opennurbs.brep;' not in modules['point.d']
+    package = modules.pop('package.d')
+    assert package.startswith('module opennurbs;\n')
+    for name in modules:
+        assert f'public import opennurbs.{name[:-2]};' in package
+
+def test_same_declarations_as_one_module(tmp_path):
+    run_cpp2d(tmp_path, '--no-cache', '-o', str(tmp_path / 'opennurbs.d'))
+    expected = get_declarations((tmp_path / 'opennurbs.d').read_text())
+    declarations = dict()
+    for name, text in write_package(tmp_path, '--no-cache').items():
+        for key, declaration in get_declarations(text).items():
+            assert key not in declarations, f'{key} in two modules'
+            declarations[key] = declaration
+    assert declarations == expected
+
+def test_package_name_and_d_header(tmp_path):
+    modules = write_package(tmp_path, '--no-cache', '--package', 'on',
+                            '--d-header', os.path.join(repo_dir, 'header.d'))
+    assert modules['package.d'].startswith('module on;\n')
+    assert 'public import on.d_header;' in modules['package.d']
+    assert 'struct InlineClass' in modules['d_header.d']
+    # (only the default package name gets its prefix dropped)
+    assert 'import on.d_header;' in modules['opennurbs_brep.d']
+
+@pytest.mark.parametrize('args', [['-j', '3'], ['--incremental'],
+                                  ['--incremental', '-j', '3']])
+def test_matches_serial(tmp_path, args):
+    expected = write_package(tmp_path, '--no-cache', name='serial')
+    # (twice, for a cold and then a warm cache)
+    for _ in range(2):
+        assert write_package(tmp_path, *args) == expected
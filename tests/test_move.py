@@ -0,0 +1,80 @@
+# Copy and move constructors and assignment: moves get bound through
+# Rvalue (see header.d), copies as they are, and whatever is deleted
+# or defaulted (so may have no symbol to bind to) not at all.
+#
+#   $ python -m pytest tests
+
+import os
+import sys
+
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.dirname(tests_dir)
+sys.path.insert(0, repo_dir)
+
+import cpp2d
+
+def translate(source):
+    return cpp2d.Translator().translate(cpp2d.parse_source(source))
+
+base = '''\
+class ON_Base {
+public:
+  virtual ~ON_Base();
+  int m_b;
+};
+'''
+
+def test_class_moves_and_copies():
+    d_source = translate(base + '''\
+class ON_Thing : public ON_Base {
+public:
+  ON_Thing(const ON_Thing &);
+  ON_Thing(ON_Thing &&) noexcept;
+  ON_Thing &operator=(const ON_Thing &);
+  ON_Thing &operator=(ON_Thing &&);
+  void Take(ON_Thing &&);
+  int m_a;
+};
+''')
+    assert 'this(ref const(ON_Thing));' in d_source
+    assert "cppRefMangle!(moveConstruct__, \"C1\", 'O')" in d_source
+    assert 'this(Rvalue!(ON_Thing)) nothrow;' in d_source
+    assert 'final ON_Thing assign(const(ON_Thing));' in d_source
+    assert "cppRefMangle!(moveAssign__, \"aS\", 'O')" in d_source
+    assert 'final ON_Thing opAssign(Rvalue!(ON_Thing));' in d_source
+    # (anything else that takes an rvalue reference is left out)
+    assert 'Take' not in d_source
+
+def test_struct_moves():
+    d_source = translate('''\
+struct ON_Value {
+  ON_Value(ON_Value &&);
+  ON_Value &operator=(ON_Value &&);
+  double m_x;
+};
+''')
+    assert 'private final void moveConstruct__(ref ON_Value);' in d_source
+    assert 'this(Rvalue!(ON_Value));' in d_source
+    assert 'final ref ON_Value opAssign(Rvalue!(ON_Value));' in d_source
+
+def test_deleted_and_defaulted_arent_bound():
+    d_source = translate(base + '''\
+class ON_Thing : public ON_Base {
+public:
+  ON_Thing() = default;
+  ON_Thing(const ON_Thing &) = delete;
+  ON_Thing(ON_Thing &&) = default;
+  ON_Thing(double) = delete;
+  ON_Thing(int a);
+  ON_Thing &operator=(const ON_Thing &) = delete;
+  ON_Thing &operator=(ON_Thing &&) = default;
+  int m_a;
+};
+''')
+    thing = d_source[d_source.index('class ON_Thing'):]
+    assert 'this(int a);' in thing
+    assert 'this()' not in thing
+    assert 'this(ref const(ON_Thing))' not in thing
+    assert 'this(double' not in thing
+    assert 'Rvalue' not in thing
+    assert 'assign' not in thing and 'opAssign' not in thing
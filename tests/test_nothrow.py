@@ -0,0 +1,152 @@
+# Which methods --infer-nothrow marks nothrow (see NothrowRules in
+# cpp2d.py): only what a rule allows, and every override of a nothrow
+# method, matched by signature.
+#
+#   $ python -m pytest tests
+
+import os
+import sys
+
+import pytest
+
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.dirname(tests_dir)
+sys.path.insert(0, repo_dir)
+
+import cpp2d
+
+def translate(source, rules=None):
+    translator = cpp2d.Translator()
+    translator.nothrow_rules = cpp2d.NothrowRules()
+    if rules is not None:
+        translator.nothrow_rules.add_rules(rules)
+    return translator.translate(cpp2d.parse_source(source))
+
+def get_line(d_source, declaration):
+    return next(_.strip() for _ in d_source.splitlines()
+                if declaration in _)
+
+def is_nothrow(d_source, declaration):
+    return ' nothrow' in get_line(d_source, declaration)
+
+curve = '''\
+class ON_Curve {
+public:
+  ON_Curve(int dimension);
+  virtual ~ON_Curve();
+  virtual ON_Curve *DuplicateCurve() const;
+  virtual bool IsValid() const;
+  virtual int Dimension() const;
+  bool IsSet();
+  int SpanCount() const;
+  void Reverse();
+};
+'''
+
+@pytest.mark.parametrize('declaration, nothrow', [
+    ('DuplicateCurve', False), # allocates
+    ('this(int', False),
+    ('IsValid', True),
+    ('Dimension', True),
+    ('IsSet', False), # not const
+    ('SpanCount', True),
+    ('Reverse', False),
+])
+def test_default_rules(declaration, nothrow):
+    assert is_nothrow(translate(curve), declaration) == nothrow
+
+def test_fixed_size_math_types():
+    d_source = translate('''\
+class ON_3dVector {
+public:
+  bool Unitize();
+  double x, y, z;
+};
+''')
+    assert is_nothrow(d_source, 'Unitize')
+
+accessors = '''\
+class ON_Thing {
+public:
+  int Index() const { return m_index; }
+  int Next() { return m_index + 1; }
+  double X() const { return m_point.x; }
+  const ON_Thing *Parent() const { return this->m_parent; }
+  const ON_Point &Point() const { return m_point; }
+  ON_Point PointCopy() const { return m_point; }
+  ON_Point Sum() const { return m_point + m_point; }
+  int Scaled(int s) const;
+  virtual int Virtual() const { return m_index; }
+  int m_index;
+  ON_Point m_point;
+  ON_Thing *m_parent;
+};
+int ON_Thing::Scaled(int s) const { return m_index * s; }
+'''
+
+@pytest.mark.parametrize('declaration, nothrow', [
+    ('Index', True),
+    ('Next', True),
+    ('X', True),
+    ('Parent', True),
+    ('Point()', True), # (a reference, so nothing gets copied)
+    ('PointCopy', False), # copy constructor
+    ('Sum', False), # ON_Point's operator+
+    ('Scaled', True), # (defined outside of the class)
+    ('Virtual', False), # an override could do anything
+])
+def test_accessors(declaration, nothrow):
+    assert is_nothrow(translate(accessors), declaration) == nothrow
+
+def test_overrides_follow_signature():
+    # an override of a nothrow method has to be nothrow too (D won't
+    # have it otherwise), but an override of another overload with the
+    # same name needn't be
+    d_source = translate('''\
+class Base {
+public:
+  virtual ~Base();
+  virtual int Get(int) const noexcept;
+  virtual int Get(double) const;
+  virtual int Get(int);
+};
+class Derived : public Base {
+public:
+  int Get(int) const override;
+  int Get(double) const override;
+  int Get(int) override;
+};
+''')
+    derived = d_source[d_source.index('class Derived'):]
+    assert is_nothrow(derived, 'Get(int) const')
+    assert not is_nothrow(derived, 'Get(double) const')
+    assert not is_nothrow(derived, 'Get(int);')
+
+def test_rules_in_order():
+    rules = '''\
+allow ON_Curve::*
+deny ON_Curve::Duplicate*
+deny const ON_Curve::Is*
+'''
+    d_source = translate(curve, rules)
+    assert is_nothrow(d_source, 'this(int')
+    assert is_nothrow(d_source, 'IsSet') # (not const)
+    assert not is_nothrow(d_source, 'DuplicateCurve')
+    assert not is_nothrow(d_source, 'IsValid')
+
+def test_deny_accessors():
+    d_source = translate(accessors, 'deny accessor ON_Thing::*')
+    assert not is_nothrow(d_source, 'Index')
+
+def test_without_rules_only_noexcept():
+    translator = cpp2d.Translator()
+    d_source = translator.translate(cpp2d.parse_source(
+        'class A { public: int Count() const; int Size() const noexcept; };'))
+    assert not is_nothrow(d_source, 'Count')
+    assert is_nothrow(d_source, 'Size')
+
+@pytest.mark.parametrize('line', ['allow', 'allow * *', 'maybe *',
+                                  'allow virtual *', 'deny const a b'])
+def test_bad_rules(line):
+    with pytest.raises(ValueError):
+        cpp2d.NothrowRules(line)
@@ -0,0 +1,67 @@
+# Write-if-changed output: a file (or module, with --package-dir) whose
+# contents would stay the same isn't rewritten, so it keeps its mtime,
+# and what did change gets reported by top-level declaration.
+#
+#   $ python -m pytest tests
+
+import os
+import subprocess
+import sys
+
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.dirname(tests_dir)
+sys.path.insert(0, repo_dir)
+
+import cpp2d
+
+corpus = os.path.join(repo_dir, 'bench', 'corpus', 'opennurbs_subset.cpp')
+
+def run_cpp2d(tmp_path, input_, *args):
+    return subprocess.run([sys.executable, os.path.join(repo_dir, 'cpp2d.py'),
+                           str(input_), '--no-cache', *args],
+                          check=True, capture_output=True, text=True).stderr
+
+def age(path):
+    # back a day, so that a rewrite would show in the mtime
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns - 86400*10**9))
+    return os.stat(path).st_mtime_ns
+
+def test_unchanged_output_isnt_rewritten(tmp_path):
+    output = tmp_path / 'out.d'
+    assert 'created' in run_cpp2d(tmp_path, corpus, '-o', str(output))
+    mtime = age(output)
+    stderr = run_cpp2d(tmp_path, corpus, '-o', str(output))
+    assert 'updated' not in stderr
+    assert os.stat(output).st_mtime_ns == mtime
+    # (and the temporary file is gone)
+    assert os.listdir(tmp_path) == ['out.d']
+
+def test_changes_get_reported(tmp_path):
+    input_ = tmp_path / 'input.h'
+    input_.write_text('class A { public: int a; };\n'
+                      'class B { public: int b; };\n')
+    output = tmp_path / 'out.d'
+    run_cpp2d(tmp_path, input_, '-o', str(output))
+    input_.write_text('class A { public: int a; };\n'
+                      'class B { public: int b, c; };\n'
+                      'class C { public: int c; };\n')
+    stderr = run_cpp2d(tmp_path, input_, '-o', str(output))
+    assert 'updated' in stderr and '(1 added, 0 removed, 1 changed)' in stderr
+    assert 'added C' in stderr and 'changed B' in stderr
+    assert 'int c;' in output.read_text()
+
+def test_unchanged_modules_arent_rewritten(tmp_path):
+    package_dir = tmp_path / 'opennurbs'
+    run_cpp2d(tmp_path, corpus, '--package-dir', str(package_dir))
+    mtimes = {_.name: age(_) for _ in package_dir.iterdir()}
+    stderr = run_cpp2d(tmp_path, corpus, '--package-dir', str(package_dir))
+    assert f'0 of {len(mtimes)} files' in stderr
+    assert {_.name: os.stat(_).st_mtime_ns
+            for _ in package_dir.iterdir()} == mtimes
+
+def test_diff_declarations():
+    old = 'struct A {\n  int a;\n}\n\nalias B = int;\nenum C { c }\n'
+    new = 'struct A {\n  int b;\n}\n\nenum C { c }\nalias D = int;\n'
+    assert cpp2d.diff_declarations(old, new) == {
+        'added': ['D'], 'removed': ['B'], 'changed': ['A']}
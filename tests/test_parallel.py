@@ -0,0 +1,77 @@
+# --jobs has to produce exactly what a serial run does, on the
+# checked-in corpus and on a synthetic one big enough to be split
+# into several batches of classes.
+#
+#   $ python -m pytest tests
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.dirname(tests_dir)
+sys.path.insert(0, repo_dir)
+sys.path.insert(0, os.path.join(repo_dir, 'bench'))
+
+import cpp2d
+from bench_cpp2d import default_snapshot, generate_corpus
+from diagnostics import Unsupported
+
+def run_cpp2d(tmp_path, input_, *args):
+    output = tmp_path / 'out.d'
+    subprocess.run([sys.executable, os.path.join(repo_dir, 'cpp2d.py'),
+                    str(input_), '-o', str(output),
+                    '--cache-dir', str(tmp_path / 'cache'), *args],
+                   check=True, capture_output=True)
+    return output.read_text()
+
+@pytest.mark.parametrize('args', [[], ['--batch'], ['--no-native-bodies'],
+                                  ['--nogc', '--infer-nothrow']])
+@pytest.mark.parametrize('jobs', [2, 3])
+def test_jobs_matches_serial_on_corpus(tmp_path, jobs, args):
+    expected = run_cpp2d(tmp_path, default_snapshot, '--no-cache', *args)
+    assert run_cpp2d(tmp_path, default_snapshot, '--no-cache',
+                     '-j', str(jobs), *args) == expected
+
+def test_jobs_matches_serial_incremental(tmp_path):
+    expected = run_cpp2d(tmp_path, default_snapshot, '--no-cache')
+    # cold, then warm
+    for _ in range(2):
+        assert run_cpp2d(tmp_path, default_snapshot, '--incremental',
+                         '-j', '3') == expected
+
+def test_jobs_matches_serial_on_synthetic(tmp_path):
+    input_ = tmp_path / 'synthetic.cpp'
+    input_.write_text(generate_corpus(num_classes=60))
+    expected = run_cpp2d(tmp_path, input_, '--no-cache')
+    assert run_cpp2d(tmp_path, input_, '--no-cache', '-j', '4') == expected
+
+def test_jobs_counts_type_cache_lookups(tmp_path):
+    # the workers' lookups count too, not just the parent's
+    def get_lookups(*args):
+        profile = tmp_path / 'profile.json'
+        run_cpp2d(tmp_path, default_snapshot, '--no-cache',
+                  '--profile', str(profile), *args)
+        counts = json.loads(profile.read_text())['counters']['type cache']
+        return counts['hits'] + counts['misses']
+    # (each worker has its own cache, so only the total stays the same)
+    serial = get_lookups()
+    assert serial > 100
+    assert abs(get_lookups('-j', '3') - serial) < serial/10
+
+def test_unsupported_raises_in_worker(monkeypatch):
+    # a worker can't stop in the debugger, so it has to hand the
+    # problem back to the parent instead
+    text = 'class A { public: int operator%(int) const; };\n'
+    parsed = cpp2d.parse_cached(text, cpp2d.DiskCache(None, 0, enabled=False),
+                                '<test>')
+    translator = cpp2d.Translator()
+    translator.build_class_metadata(parsed.namespace.classes)
+    monkeypatch.setattr(cpp2d, 'interactive', True)
+    cpp2d.init_worker([parsed.namespace], translator.class_table, {}, [], {},
+                      None, translator.get_options())
+    with pytest.raises(Unsupported):
+        cpp2d.emit_worker_namespace(0)
@@ -0,0 +1,60 @@
+# --roots and --roots-from: only what's reachable from the roots gets
+# emitted, with opaque stubs for the other classes, and the pruned
+# output doesn't depend on how it was produced.
+#
+#   $ python -m pytest tests
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.dirname(tests_dir)
+corpus = os.path.join(repo_dir, 'bench', 'corpus', 'opennurbs_subset.cpp')
+
+def run_cpp2d(tmp_path, *args):
+    output = tmp_path / 'out.d'
+    subprocess.run([sys.executable, os.path.join(repo_dir, 'cpp2d.py'),
+                    corpus, '-o', str(output),
+                    '--cache-dir', str(tmp_path / 'cache'), *args],
+                   check=True, capture_output=True)
+    return output.read_text()
+
+def test_keeps_only_whats_reachable(tmp_path):
+    d_source = run_cpp2d(tmp_path, '--no-cache', '--roots', 'ON_Interval')
+    assert 'struct ON_Interval {' in d_source
+    # everything else is only there as a stub
+    assert 'class ON_Brep;' in d_source
+    assert 'class ON_Brep:' not in d_source
+
+def test_follows_what_the_roots_use(tmp_path):
+    # (ON_BrepFace points back at its ON_Brep, which holds everything)
+    d_source = run_cpp2d(tmp_path, '--no-cache', '--roots', 'ON_BrepFace')
+    for name in ['ON_BrepFace', 'ON_SurfaceProxy', 'ON_Brep', 'ON_Mesh']:
+        assert f'class {name}:' in d_source
+    # unless they only point at it
+    d_source = run_cpp2d(tmp_path, '--no-cache', '--roots', 'ON_BrepFace',
+                         '--opaque-indirect')
+    for name in ['ON_BrepFace', 'ON_SurfaceProxy', 'ON_Surface']:
+        assert f'class {name}:' in d_source
+    assert 'class ON_Brep;' in d_source
+    assert 'class ON_Mesh;' in d_source
+
+def test_roots_from_d_source(tmp_path):
+    program = tmp_path / 'program.d'
+    program.write_text('import opennurbs;\n'
+                       'void main() { ON_Interval i; i.Set(0, 1); }\n')
+    assert run_cpp2d(tmp_path, '--no-cache', '--roots-from', str(program)) \
+        == run_cpp2d(tmp_path, '--no-cache', '--roots', 'ON_Interval')
+
+@pytest.mark.parametrize('args', [['-j', '3'], ['--incremental'],
+                                  ['--incremental', '-j', '3'],
+                                  ['--no-cache', '--check-serial']])
+def test_pruned_matches_serial(tmp_path, args):
+    roots = ['--roots', 'ON_BrepFace', 'ON_3dPoint']
+    expected = run_cpp2d(tmp_path, '--no-cache', *roots)
+    # (twice, for a cold and then a warm cache)
+    for _ in range(2):
+        assert run_cpp2d(tmp_path, *args, *roots) == expected
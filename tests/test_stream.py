@@ -0,0 +1,50 @@
+# --stream has to produce exactly what a normal run does, while only
+# keeping one chunk's parse tree at a time.
+#
+#   $ python -m pytest tests
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.dirname(tests_dir)
+sys.path.insert(0, os.path.join(repo_dir, 'bench'))
+
+from bench_cpp2d import default_snapshot, generate_corpus
+
+def run_cpp2d(tmp_path, input_, *args, check=True):
+    output = tmp_path / 'out.d'
+    result = subprocess.run(
+        [sys.executable, os.path.join(repo_dir, 'cpp2d.py'), str(input_),
+         '-o', str(output), '--cache-dir', str(tmp_path / 'cache'), *args],
+        check=check, capture_output=True, text=True)
+    return output.read_text() if check else result
+
+@pytest.mark.parametrize('args', [[], ['--nogc', '--infer-nothrow'],
+                                  ['--d-header',
+                                   os.path.join(repo_dir, 'header.d')]])
+def test_stream_matches_normal_on_corpus(tmp_path, args):
+    expected = run_cpp2d(tmp_path, default_snapshot, '--no-cache', *args)
+    assert run_cpp2d(tmp_path, default_snapshot, '--no-cache', '--stream',
+                     *args) == expected
+    # (cold, then warm cache)
+    for _ in range(2):
+        assert run_cpp2d(tmp_path, default_snapshot, '--stream',
+                         *args) == expected
+
+def test_stream_matches_normal_on_synthetic(tmp_path):
+    input_ = tmp_path / 'synthetic.cpp'
+    input_.write_text(generate_corpus(num_classes=60))
+    expected = run_cpp2d(tmp_path, input_, '--no-cache')
+    assert run_cpp2d(tmp_path, input_, '--no-cache', '--stream') == expected
+
+@pytest.mark.parametrize('args', [['-j', '2'], ['--incremental'],
+                                  ['--roots', 'ON_Interval']])
+def test_stream_refuses_what_it_cant_do(tmp_path, args):
+    result = run_cpp2d(tmp_path, default_snapshot, '--stream', *args,
+                       check=False)
+    assert result.returncode != 0
+    assert '--stream only works' in result.stderr